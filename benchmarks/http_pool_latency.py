@@ -0,0 +1,107 @@
+"""
+Mede a latência das buscas com e sem o pool de conexões do http_session.
+
+Sobe um servidor HTTP local que responde como a página de resultados do
+DuckDuckGo e faz a mesma sequência de requisições de duas formas: com
+requests.get avulso (uma conexão nova por busca, como antes) e com a sessão
+compartilhada (conexões reaproveitadas). --atraso-conexao simula o custo do
+handshake TCP+TLS de um servidor remoto a cada conexão nova.
+
+Uso:
+    python benchmarks/http_pool_latency.py [quantidade] [--atraso-conexao MS]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_session import DEFAULT_HEADERS, HttpSession
+
+RESULT_PAGE = ''.join(
+    f'<div class="result"><a class="result__a" href="https://exemplo.com/{i}">Resultado {i}</a>'
+    f'<div class="result__snippet">Trecho do resultado número {i}.</div></div>'
+    for i in range(10)
+).encode('utf-8')
+
+
+def make_handler(connection_delay):
+    class StubHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 mantém a conexão aberta entre requisições
+        protocol_version = 'HTTP/1.1'
+        # Cabeçalho e corpo saem em escritas separadas; sem isto o Nagle + ACK
+        # atrasado somam ~40 ms às conexões reaproveitadas
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            # Chamado uma vez por conexão: simula o handshake de um servidor remoto
+            if connection_delay:
+                time.sleep(connection_delay)
+            super().setup()
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(RESULT_PAGE)))
+            self.end_headers()
+            self.wfile.write(RESULT_PAGE)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def measure(get, url, count):
+    """Latências (ms) de count buscas sequenciais"""
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        response = get(f"{url}?q=consulta+{i}")
+        response.text
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência de busca com e sem pool de conexões")
+    parser.add_argument('quantidade', type=int, nargs='?', default=500)
+    parser.add_argument('--atraso-conexao', type=float, default=0.0,
+                        help="Atraso simulado por conexão nova, em ms")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(args.atraso_conexao / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/html/"
+
+    def bare_get(target):
+        return requests.get(target, headers=DEFAULT_HEADERS, timeout=5)
+
+    session = HttpSession()
+
+    # Aquecimento (imports, primeira conexão)
+    measure(bare_get, url, 5)
+    measure(session.get, url, 5)
+
+    bare = measure(bare_get, url, args.quantidade)
+    pooled = measure(session.get, url, args.quantidade)
+
+    session.close()
+    server.shutdown()
+
+    print(f"Buscas: {args.quantidade} (atraso por conexão: {args.atraso_conexao:.0f} ms)")
+    for name, latencies in (("Sem pool", bare), ("Com pool", pooled)):
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        print(f"{name}: p50 {statistics.median(latencies):7.2f} ms   p99 {p99:7.2f} ms")
+    print(f"Redução do p50: {100 * (1 - statistics.median(pooled) / statistics.median(bare)):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
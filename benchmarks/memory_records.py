@@ -0,0 +1,70 @@
+"""
+Mede o consumo de memória por entrada do MemoryModule.
+
+Compara o formato antigo (dicionário com timestamp ISO e dicionário de
+contexto) com o registro compacto MemoryRecord.
+
+Uso:
+    python benchmarks/memory_records.py [quantidade]
+"""
+import os
+import sys
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from self_evolving_bot import MemoryRecord
+
+
+def build_dicts(inputs, responses, contexts):
+    """Formato anterior: um dicionário por memória"""
+    memory = deque(maxlen=len(inputs))
+    for input_text, response, context in zip(inputs, responses, contexts):
+        memory.append({
+            'input': input_text,
+            'response': response,
+            'context': context or {},
+            'timestamp': datetime.now().isoformat()
+        })
+    return memory
+
+
+def build_records(inputs, responses, contexts):
+    """Formato atual: MemoryRecord com __slots__"""
+    memory = deque(maxlen=len(inputs))
+    for input_text, response, context in zip(inputs, responses, contexts):
+        memory.append(MemoryRecord(input_text, response, context))
+    return memory
+
+
+def measure(builder, *args):
+    """Bytes alocados pela estrutura (os textos são compartilhados e não entram na conta)"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    memory = builder(*args)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return total, memory
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    inputs = [f"pergunta número {i}" for i in range(count)]
+    responses = [f"resposta número {i}" for i in range(count)]
+    # Um décimo das memórias vem da busca web e carrega contexto
+    contexts = [{'source': 'web_search'} if i % 10 == 0 else None for i in range(count)]
+
+    dict_bytes, _ = measure(build_dicts, inputs, responses, contexts)
+    record_bytes, _ = measure(build_records, inputs, responses, contexts)
+
+    print(f"Entradas: {count}")
+    print(f"Dicionários:  {dict_bytes / count:8.1f} bytes/entrada")
+    print(f"MemoryRecord: {record_bytes / count:8.1f} bytes/entrada")
+    print(f"Redução: {100 * (1 - record_bytes / dict_bytes):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
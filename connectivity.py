@@ -0,0 +1,183 @@
+"""
+Monitor de conectividade compartilhado pelos módulos de busca na web.
+
+Uma thread em segundo plano testa a conexão (TCP connect em um dos hosts de
+teste) e guarda o resultado; as buscas só leem o estado em cache, sem esperar
+pela rede. Enquanto online, a conexão é testada de novo a cada interval
+segundos; offline, os testes seguem um backoff exponencial (min_backoff,
+2*min_backoff, ... até max_backoff) para detectar a volta da conexão rápido
+sem ficar testando sem parar. Quem precisar reagir à mudança de estado
+registra um callback com add_listener().
+
+Os hosts de teste da instância compartilhada podem ser trocados pela variável
+de ambiente BOT_CONNECTIVITY_HOSTS (ex.: "127.0.0.1:8080,exemplo.com:443"),
+o que permite testar com um servidor local.
+"""
+import os
+import socket
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+DEFAULT_HOSTS = (("www.google.com", 80), ("1.1.1.1", 53))
+
+
+class ConnectivityMonitor:
+    """Estado da conexão com a internet, atualizado em segundo plano"""
+
+    def __init__(self,
+                 hosts: Sequence[Tuple[str, int]] = DEFAULT_HOSTS,
+                 timeout: float = 2.0,
+                 interval: float = 30.0,
+                 min_backoff: float = 1.0,
+                 max_backoff: float = 60.0):
+        """
+        Args:
+            hosts: Pares (host, porta) testados em ordem; basta um responder
+            timeout: Tempo limite de cada tentativa de conexão, em segundos
+            interval: Intervalo entre testes enquanto online
+            min_backoff: Primeiro intervalo entre testes depois de ficar offline
+            max_backoff: Maior intervalo entre testes enquanto offline
+        """
+        self.hosts = list(hosts)
+        self.timeout = timeout
+        self.interval = interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        # None enquanto o primeiro teste não termina
+        self._online: Optional[bool] = None
+        self.last_checked = 0.0
+        self.checks = 0
+        self._backoff = min_backoff
+        self._listeners: List[Callable[[bool], None]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._known = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def online(self) -> bool:
+        """Último estado conhecido; otimista enquanto o primeiro teste não termina"""
+        return self._online is not False
+
+    @property
+    def known(self) -> bool:
+        """Indica se algum teste já terminou"""
+        return self._online is not None
+
+    def start(self):
+        """Inicia a thread de monitoramento (sem efeito se já estiver rodando)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='ConnectivityMonitor', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Encerra a thread de monitoramento"""
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def add_listener(self, callback: Callable[[bool], None]):
+        """Registra uma função chamada com o novo estado (True = online) a cada mudança"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[bool], None]):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def check_now(self) -> bool:
+        """Testa a conexão imediatamente (bloqueia) e atualiza o estado"""
+        online = self._probe()
+        self._set_state(online)
+        return online
+
+    def report_failure(self):
+        """
+        Avisa que uma requisição falhou por erro de rede: o próximo teste é
+        antecipado, sem bloquear quem chamou.
+        """
+        self._wake.set()
+
+    def wait_until_known(self, timeout: Optional[float] = None) -> bool:
+        """Espera o primeiro teste terminar; retorna o estado"""
+        self._known.wait(timeout)
+        return self.online
+
+    def _probe(self) -> bool:
+        for host, port in self.hosts:
+            try:
+                socket.create_connection((host, port), timeout=self.timeout).close()
+                return True
+            except OSError:
+                continue
+        return False
+
+    def _set_state(self, online: bool):
+        with self._lock:
+            changed = online != self._online
+            self._online = online
+            self.last_checked = time.time()
+            self.checks += 1
+            self._known.set()
+            listeners = list(self._listeners) if changed else []
+        if changed:
+            if online:
+                print("Conexão com a internet disponível.")
+            else:
+                print("Aviso: Sem conexão com a internet. Modo offline ativado.")
+        for callback in listeners:
+            try:
+                callback(online)
+            except Exception as e:
+                print(f"Erro ao notificar mudança de conectividade: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            online = self.check_now()
+            if online:
+                self._backoff = self.min_backoff
+                delay = self.interval
+            else:
+                delay = self._backoff
+                self._backoff = min(self._backoff * 2, self.max_backoff)
+            # Limpa antes da próxima verificação: um pedido feito durante ela
+            # continua valendo e acorda a espera seguinte
+            if self._wake.wait(delay):
+                self._wake.clear()
+
+
+def _hosts_from_env() -> Sequence[Tuple[str, int]]:
+    value = os.environ.get('BOT_CONNECTIVITY_HOSTS', '').strip()
+    if not value:
+        return DEFAULT_HOSTS
+    hosts = []
+    for item in value.split(','):
+        host, _, port = item.strip().rpartition(':')
+        try:
+            hosts.append((host, int(port)))
+        except ValueError:
+            print(f"Host de conectividade inválido ignorado: {item}")
+    return hosts or DEFAULT_HOSTS
+
+
+_shared_monitor: Optional[ConnectivityMonitor] = None
+_shared_lock = threading.Lock()
+
+
+def get_connectivity_monitor() -> ConnectivityMonitor:
+    """Instância compartilhada, iniciada no primeiro uso"""
+    global _shared_monitor
+    with _shared_lock:
+        if _shared_monitor is None:
+            _shared_monitor = ConnectivityMonitor(_hosts_from_env())
+            _shared_monitor.start()
+        return _shared_monitor
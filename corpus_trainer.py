@@ -0,0 +1,271 @@
+"""
+Treinamento paralelo do modelo de linguagem em corpora grandes (map-reduce).
+
+Os arquivos de texto são divididos em blocos de bytes alinhados em quebras de
+linha; cada processo lê o seu bloco direto do disco. Cada linha é um texto,
+como em SimpleLanguageModel.train. O treino tem três fases, todas paralelas:
+
+1. Vocabulário: cada bloco conta suas palavras; o processo principal junta os
+   contadores e atribui ids globais.
+2. Contagem: cada bloco gera os n-gramas de todas as ordens com os ids globais,
+   soma os repetidos e grava o resultado em disco já ordenado por hash de
+   contexto, com os limites de cada fatia (shard) do espaço de hashes.
+3. Redução: cada shard junta a sua fatia de todos os blocos. Como os shards são
+   intervalos de hash, o modelo final é a simples concatenação deles, gravada
+   no formato binário do modelo (language_model.bin).
+
+Nenhuma fase tem uma etapa serial proporcional ao corpus, então o tempo cai
+quase linearmente com o número de núcleos.
+
+Uso:
+    python corpus_trainer.py dump_ptwiki.txt
+    python corpus_trainer.py corpus/*.txt --ordem 4 --processos 8 --bloco-mb 16
+    python corpus_trainer.py novos_textos.txt --mesclar
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ngram_table import NGramTable, aggregate_pairs, ngram_windows
+
+# Mesmos valores de self_evolving_bot; repetidos aqui para que os processos do
+# pool não precisem importar o bot inteiro (torch etc.)
+LANGUAGE_MODEL_FILE = 'language_model.bin'
+MAX_ORDER = 5
+
+_RUN_ARRAYS = ('ctx', 'next', 'counts', 'bounds')
+
+# Vocabulário global, enviado uma vez a cada processo da fase de contagem
+_worker_vocab: Dict[str, int] = {}
+
+
+def split_file(path: str, chunk_bytes: int) -> Iterator[Tuple[str, int, int]]:
+    """Divide um arquivo em blocos (caminho, início, tamanho) terminados em quebra de linha"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            yield path, start, end - start
+            start = end
+
+
+def _read_lines(path: str, start: int, length: int) -> List[str]:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(length)
+    return data.decode('utf-8', errors='replace').splitlines()
+
+
+def count_words(path: str, start: int, length: int) -> Tuple[Counter, int]:
+    """Fase 1: frequência das palavras de um bloco e número de linhas"""
+    lines = _read_lines(path, start, length)
+    words = Counter()
+    for line in lines:
+        words.update(line.split())
+    return words, len(lines)
+
+
+def _init_count_worker(vocab: Dict[str, int]):
+    global _worker_vocab
+    _worker_vocab = vocab
+
+
+def _shard_bounds(hashes: np.ndarray, shards: int) -> np.ndarray:
+    """Índices que dividem hashes ordenados em shards intervalos iguais do espaço de 64 bits"""
+    limits = np.array([(i << 64) // shards for i in range(1, shards)], dtype=np.uint64)
+    return np.concatenate([[0], np.searchsorted(hashes, limits), [len(hashes)]]).astype(np.int64)
+
+
+def _save_run(prefix: str, ctx: np.ndarray, next_ids: np.ndarray, counts: np.ndarray, bounds: np.ndarray):
+    for name, array in zip(_RUN_ARRAYS, (ctx, next_ids, counts, bounds)):
+        np.save(f"{prefix}.{name}.npy", array)
+
+
+def count_chunk(path: str, start: int, length: int, order: int, shards: int, prefix: str) -> str:
+    """Fase 2: conta os n-gramas de um bloco e grava o resultado dividido em shards"""
+    vocab = _worker_vocab
+    ids, positions = [], []
+    for line in _read_lines(path, start, length):
+        words = line.split()
+        ids.extend([vocab[word] for word in words])
+        positions.extend(range(len(words)))
+
+    ctx, next_ids = ngram_windows(np.asarray(ids, dtype=np.int32), np.asarray(positions, dtype=np.int64), order)
+    hashes, ctx, next_ids, counts = aggregate_pairs(ctx, next_ids, np.ones(len(next_ids), dtype=np.int64))
+    _save_run(prefix, ctx, next_ids, counts, _shard_bounds(hashes, shards))
+    return prefix
+
+
+def reduce_shard(prefixes: Sequence[str], shard: int, width: int):
+    """Fase 3: soma a fatia de um shard de todos os blocos"""
+    parts = []
+    for prefix in prefixes:
+        bounds = np.load(f"{prefix}.bounds.npy")
+        lo, hi = bounds[shard], bounds[shard + 1]
+        if lo == hi:
+            continue
+        ctx, next_ids, counts = (np.load(f"{prefix}.{name}.npy", mmap_mode='r')[lo:hi]
+                                 for name in _RUN_ARRAYS[:3])
+        if ctx.shape[1] < width:
+            ctx = np.hstack([ctx, np.full((len(ctx), width - ctx.shape[1]), -1, dtype=np.int32)])
+        parts.append((ctx, next_ids, counts))
+
+    if not parts:
+        return (np.zeros(0, dtype=np.uint64), np.zeros((0, width), dtype=np.int32),
+                np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int64))
+    return aggregate_pairs(*(np.concatenate([np.asarray(part[i]) for part in parts]) for i in range(3)))
+
+
+def _run_bounded(executor: ProcessPoolExecutor, function, tasks: Iterable[tuple], limit: int) -> Iterator:
+    """Executa as tarefas no pool com no máximo limit em andamento (ordem de conclusão)"""
+    running = set()
+    for args in tasks:
+        running.add(executor.submit(function, *args))
+        if len(running) >= limit:
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    for future in as_completed(running):
+        yield future.result()
+
+
+def train_corpus(paths: Sequence[str],
+                 order: int = 3,
+                 processes: Optional[int] = None,
+                 chunk_bytes: int = 8 * 1024 * 1024,
+                 base: Optional[NGramTable] = None,
+                 temp_dir: Optional[str] = None) -> Tuple[NGramTable, dict]:
+    """
+    Conta os n-gramas de vários arquivos em paralelo.
+
+    Args:
+        paths: Arquivos de texto (um texto por linha)
+        order: Ordem máxima dos n-gramas
+        processes: Número de processos (padrão: número de CPUs)
+        chunk_bytes: Tamanho aproximado de cada bloco enviado a um processo
+        base: Tabela existente à qual as contagens são somadas (opcional)
+        temp_dir: Diretório para os resultados intermediários (padrão: do sistema)
+
+    Returns:
+        Tupla (tabela, estatísticas com linhas, tokens, segundos e tokens/s)
+    """
+    processes = processes or os.cpu_count() or 1
+    limit = 2 * processes
+    shards = 4 * processes
+    start_time = time.perf_counter()
+    chunks = [chunk for path in paths for chunk in split_file(path, chunk_bytes)]
+    stats = {'lines': 0, 'tokens': 0}
+
+    # Fase 1: vocabulário global (palavras do modelo base mantêm seus ids)
+    words = Counter()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for chunk_words, lines in _run_bounded(executor, count_words, chunks, limit):
+            words.update(chunk_words)
+            stats['lines'] += lines
+    stats['tokens'] = sum(words.values())
+    vocabulary = base.all_words() if base is not None else []
+    vocab = {word: word_id for word_id, word in enumerate(vocabulary)}
+    for word, _ in words.most_common():
+        if word not in vocab:
+            vocab[word] = len(vocabulary)
+            vocabulary.append(word)
+    del words
+    print(f"Vocabulário: {len(vocabulary)} palavras, {stats['tokens']} tokens "
+          f"({time.perf_counter() - start_time:.2f}s)")
+
+    with tempfile.TemporaryDirectory(prefix='ngram_', dir=temp_dir) as spill_dir:
+        # Fase 2: contagem por bloco, gravada em disco por shard
+        prefixes = []
+        width = max(order - 1, 1)
+        if base is not None:
+            prefix = os.path.join(spill_dir, 'base')
+            hashes, ctx, next_ids, counts = aggregate_pairs(*base.to_coo())
+            _save_run(prefix, ctx, next_ids, counts, _shard_bounds(hashes, shards))
+            prefixes.append(prefix)
+            width = max(width, ctx.shape[1])
+
+        tasks = ((*chunk, order, shards, os.path.join(spill_dir, f"chunk_{i:06d}"))
+                 for i, chunk in enumerate(chunks))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_count_worker,
+                                 initargs=(vocab,)) as executor:
+            for done, prefix in enumerate(_run_bounded(executor, count_chunk, tasks, limit), 1):
+                prefixes.append(prefix)
+                elapsed = time.perf_counter() - start_time
+                print(f"Bloco {done}/{len(chunks)} contado ({elapsed:.2f}s)")
+
+        # Fase 3: redução por shard; a concatenação em ordem de shard já sai ordenada
+        results = [None] * shards
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = {executor.submit(reduce_shard, prefixes, shard, width): shard for shard in range(shards)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+    table = NGramTable()
+    table.words = vocabulary
+    table.vocab = vocab
+    table.load_sorted_pairs(*(np.concatenate([result[i] for result in results]) for i in range(4)))
+    table.modified = True
+    if base is not None:
+        # Os deltas do bot já incluídos na base continuam incluídos
+        table.checkpoint = base.checkpoint
+
+    stats['seconds'] = time.perf_counter() - start_time
+    stats['tokens_per_second'] = stats['tokens'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    return table, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Treina o modelo de n-gramas em arquivos de texto grandes usando vários processos."
+    )
+    parser.add_argument('arquivos', nargs='+', help="Arquivos de texto (um texto por linha)")
+    parser.add_argument('--ordem', type=int, default=3,
+                        help="Ordem máxima dos n-gramas (1 a %d, padrão: 3)" % MAX_ORDER)
+    parser.add_argument('--processos', type=int, default=None,
+                        help="Número de processos (padrão: número de CPUs)")
+    parser.add_argument('--bloco-mb', type=float, default=8,
+                        help="Tamanho de cada bloco enviado a um processo, em MB (padrão: 8)")
+    parser.add_argument('--saida', default=LANGUAGE_MODEL_FILE,
+                        help=f"Arquivo do modelo gerado (padrão: {LANGUAGE_MODEL_FILE})")
+    parser.add_argument('--mesclar', action='store_true',
+                        help="Soma as contagens ao modelo já existente no arquivo de saída")
+    parser.add_argument('--temp', default=None,
+                        help="Diretório para os resultados intermediários (padrão: do sistema)")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.arquivos if not os.path.exists(path)]
+    if missing:
+        print(f"Arquivo não encontrado: {', '.join(missing)}")
+        return 1
+
+    order = max(1, min(args.ordem, MAX_ORDER))
+    base = None
+    if args.mesclar and os.path.exists(args.saida):
+        base = NGramTable.open(args.saida)
+        print(f"Mesclando com o modelo existente: {len(base)} n-gramas")
+
+    table, stats = train_corpus(args.arquivos, order, args.processos,
+                                int(args.bloco_mb * 1024 * 1024), base, args.temp)
+    # A base está mapeada do arquivo de saída; o mapeamento precisa ser
+    # fechado antes de gravar sobre ele (no Windows a troca falharia)
+    del base
+    table.save(args.saida)
+
+    print(f"Treinamento concluído: {stats['lines']} linhas, {stats['tokens']} tokens, "
+          f"{stats['seconds']:.2f}s ({stats['tokens_per_second']:.0f} tokens/s)")
+    print(f"Modelo salvo em {args.saida}: {len(table)} n-gramas, {table.vocab_size} palavras")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
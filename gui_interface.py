@@ -3,7 +3,7 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QHBoxLayout, QTextEdit, QLineEdit, QPushButton, 
                             QLabel, QFrame, QScrollArea, QCheckBox)
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
-from PyQt6.QtGui import QFont, QIcon, QPixmap
+from PyQt6.QtGui import QFont, QIcon, QPixmap, QTextCharFormat, QTextCursor
 
 # Importação de temas com fallback
 theme_system = "qt_material"
@@ -51,6 +51,7 @@ except ImportError:
 class BotWorker(QThread):
     response_ready = pyqtSignal(str)
     thinking = pyqtSignal(bool)
+    partial_response = pyqtSignal(str)  # Cada trecho novo enquanto a resposta é gerada
     
     def __init__(self, bot, message):
         super().__init__()
@@ -61,7 +62,9 @@ class BotWorker(QThread):
         self.thinking.emit(True)
         
         # Verifica qual método de resposta o bot possui
-        if hasattr(self.bot, 'generate_response'):
+        if hasattr(self.bot, 'generate_response_stream'):
+            response = self._stream_response()
+        elif hasattr(self.bot, 'generate_response'):
             response = self.bot.generate_response(self.message)
         elif hasattr(self.bot, 'get_response'):
             response = self.bot.get_response(self.message)
@@ -70,6 +73,20 @@ class BotWorker(QThread):
             
         self.thinking.emit(False)
         self.response_ready.emit(response)
+    
+    def _stream_response(self):
+        """Emite cada trecho gerado e retorna a resposta final"""
+        stream = self.bot.generate_response_stream(self.message)
+        started = False
+        while True:
+            try:
+                chunk = next(stream)
+            except StopIteration as stop:
+                return stop.value
+            if not started:
+                self.thinking.emit(False)
+                started = True
+            self.partial_response.emit(chunk)
 
 class FeedbackWidget(QWidget):
     feedback_submitted = pyqtSignal(float)
@@ -111,6 +128,8 @@ class ChatWindow(QMainWindow):
         self.bot = bot_factory()  # Usa a fábrica de bot configurada
         self.dark_mode = False  # Inicialmente em modo claro
         self.last_response = None
+        self._partial_position = None  # Início da resposta parcial na área de chat
+        self._partial_cursor = None  # Fim da resposta parcial, onde entra o próximo trecho
         self.last_user_message = None  # Inicializar a variável para armazenar a última mensagem
         self.app = None  # Inicialização do atributo app como None
         
@@ -574,6 +593,7 @@ class ChatWindow(QMainWindow):
             self.worker = BotWorker(self.bot, message)
             self.worker.response_ready.connect(self.handle_response)
             self.worker.thinking.connect(self.handle_thinking)
+            self.worker.partial_response.connect(self.handle_partial_response)
             self.worker.start()
     
     def handle_training_response(self, response):
@@ -582,6 +602,8 @@ class ChatWindow(QMainWindow):
     
     def handle_response(self, response):
         """Processa a resposta do bot e a exibe na área de chat"""
+        # A resposta final substitui o texto parcial exibido durante a geração
+        self._remove_partial_message()
         self.add_message("Bot", response)
         
         # Verifica se a resposta contém indicação de pesquisa web
@@ -607,6 +629,39 @@ class ChatWindow(QMainWindow):
             
         self.feedback_widget.setVisible(True)
     
+    def handle_partial_response(self, chunk):
+        """
+        Exibe a resposta enquanto é gerada.
+        
+        Só o trecho novo é inserido no fim da mensagem parcial; a mensagem é
+        formatada uma única vez, quando a resposta final chega.
+        """
+        if self._partial_cursor is None:
+            cursor = QTextCursor(self.chat_area.document())
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            self._partial_position = cursor.position()
+            self.add_message("Bot", "")
+            self._partial_cursor = QTextCursor(self.chat_area.document())
+            self._partial_cursor.movePosition(QTextCursor.MoveOperation.End)
+            chunk = " " + chunk
+        # Formato padrão: sem ele o texto herdaria o estilo do nome do remetente
+        self._partial_cursor.insertText(chunk, QTextCharFormat())
+        
+        # Rola para o final
+        scroll_bar = self.chat_area.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
+    
+    def _remove_partial_message(self):
+        """Remove da área de chat a resposta parcial, se houver"""
+        if self._partial_position is None:
+            return
+        cursor = QTextCursor(self.chat_area.document())
+        cursor.setPosition(self._partial_position)
+        cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+        self._partial_position = None
+        self._partial_cursor = None
+    
     def handle_thinking(self, thinking):
         """Atualiza o indicador de "pensando"""""
         self.thinking_indicator.setVisible(thinking)
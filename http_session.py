@@ -0,0 +1,210 @@
+"""
+Sessão HTTP compartilhada pelos módulos de busca na web.
+
+Um requests.get avulso abre uma conexão nova (TCP + TLS) a cada consulta. A
+sessão daqui mantém as conexões abertas (keep-alive) em pools por host, repete
+as requisições que falham por erro de conexão ou por status temporário
+(429/5xx) com backoff exponencial e, opcionalmente, usa HTTP/2 via httpx.
+
+O tempo limite de conexão é dividido entre as tentativas, então um host
+inacessível falha em cerca de um tempo limite, não em (retries + 1). Erros
+de leitura (incluindo o tempo limite de leitura) não são repetidos: o
+servidor já recebeu a requisição e repetir só multiplicaria a espera.
+
+Configuração da instância compartilhada por variáveis de ambiente:
+    BOT_HTTP_POOL_SIZE  conexões mantidas por host (padrão 10)
+    BOT_HTTP_RETRIES    novas tentativas por requisição (padrão 2)
+    BOT_HTTP2           "1" para usar HTTP/2 (requer httpx[http2])
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Importação opcional do httpx (HTTP/2)
+try:
+    import httpx
+    httpx_available = True
+except ImportError:
+    httpx_available = False
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Status que costumam indicar falha temporária do servidor
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class HttpSession:
+    """Sessão HTTP com pool de conexões por host, novas tentativas e HTTP/2 opcional"""
+
+    def __init__(self,
+                 pool_size: int = 10,
+                 retries: int = 2,
+                 backoff_factor: float = 0.3,
+                 timeout: float = 10.0,
+                 http2: bool = False,
+                 host_pool_sizes: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            pool_size: Conexões mantidas abertas por host
+            retries: Novas tentativas após erro de conexão ou status temporário
+                (erros de leitura não são repetidos)
+            backoff_factor: Espera antes da n-ésima nova tentativa = backoff_factor * 2**(n-1)
+            timeout: Tempo limite padrão das requisições, em segundos; o de
+                conexão é dividido entre as tentativas
+            http2: Usa HTTP/2 via httpx quando disponível
+            host_pool_sizes: Tamanho do pool para hosts específicos (ex.: {'html.duckduckgo.com': 4})
+        """
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.http2 = http2 and self._http2_available()
+        self._lock = threading.Lock()
+
+        if self.http2:
+            self._client = self._create_httpx_client()
+            self._session = None
+        else:
+            self._client = None
+            self._session = self._create_requests_session()
+
+    @staticmethod
+    def _http2_available() -> bool:
+        if not httpx_available:
+            print("Aviso: httpx não encontrado. Usando HTTP/1.1.")
+            return False
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("Aviso: pacote h2 não encontrado (pip install httpx[http2]). Usando HTTP/1.1.")
+            return False
+        return True
+
+    def _retry(self) -> Retry:
+        return Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=0,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            # Quem chama trata o status final; um Retry-After longo não deve travar a busca
+            raise_on_status=False,
+            respect_retry_after_header=False,
+        )
+
+    def _adapter(self, pool_size: int) -> HTTPAdapter:
+        # pool_connections é quantos hosts o adaptador mantém; pool_maxsize, as conexões por host
+        return HTTPAdapter(pool_connections=10, pool_maxsize=pool_size,
+                           max_retries=self._retry())
+
+    def _create_requests_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        adapter = self._adapter(self.pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        for host, size in self.host_pool_sizes.items():
+            host_adapter = self._adapter(size)
+            session.mount(f'http://{host}/', host_adapter)
+            session.mount(f'https://{host}/', host_adapter)
+        return session
+
+    def _create_httpx_client(self):
+        def transport(size):
+            # O httpx só repete falhas de conexão; status temporários não são repetidos
+            return httpx.HTTPTransport(http2=True, retries=self.retries,
+                                       limits=httpx.Limits(max_connections=size,
+                                                           max_keepalive_connections=size))
+        mounts = {f'all://{host}': transport(size) for host, size in self.host_pool_sizes.items()}
+        return httpx.Client(headers=DEFAULT_HEADERS, timeout=self.timeout, follow_redirects=True,
+                            transport=transport(self.pool_size), mounts=mounts)
+
+    def set_host_pool_size(self, host: str, size: int):
+        """Define o tamanho do pool de conexões de um host"""
+        with self._lock:
+            self.host_pool_sizes[host] = size
+            if self._session is not None:
+                adapter = self._adapter(size)
+                self._session.mount(f'http://{host}/', adapter)
+                self._session.mount(f'https://{host}/', adapter)
+            else:
+                old_client = self._client
+                self._client = self._create_httpx_client()
+                old_client.close()
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[float] = None, **kwargs):
+        """
+        Faz um GET reaproveitando as conexões abertas.
+
+        A resposta tem status_code e text nos dois modos, e os erros do httpx
+        são convertidos nas exceções do requests, então quem chama trata
+        requests.ConnectionError / requests.RequestException como antes.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        connect_timeout = self._connect_timeout(timeout)
+        if self._session is not None:
+            if connect_timeout is not None:
+                timeout = (connect_timeout, timeout)
+            return self._session.get(url, headers=headers, timeout=timeout, **kwargs)
+
+        if connect_timeout is not None:
+            timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        try:
+            return self._client.get(url, headers=headers, timeout=timeout, **kwargs)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.RequestException(str(e)) from e
+
+    def _connect_timeout(self, timeout) -> Optional[float]:
+        """Tempo limite de cada tentativa de conexão (None se timeout não for um número)"""
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)):
+            return None
+        return timeout / (self.retries + 1)
+
+    def close(self):
+        """Fecha todas as conexões abertas"""
+        if self._session is not None:
+            self._session.close()
+        if self._client is not None:
+            self._client.close()
+
+
+def _int_from_env(name: str, default: int) -> int:
+    value = os.environ.get(name, '').strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Valor inválido para {name} ignorado: {value}")
+        return default
+
+
+_shared_session: Optional[HttpSession] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_session() -> HttpSession:
+    """Instância compartilhada, criada no primeiro uso"""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = HttpSession(
+                pool_size=_int_from_env('BOT_HTTP_POOL_SIZE', 10),
+                retries=_int_from_env('BOT_HTTP_RETRIES', 2),
+                http2=os.environ.get('BOT_HTTP2', '').strip() == '1',
+            )
+        return _shared_session
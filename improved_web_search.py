@@ -1,14 +1,18 @@
 import os
 import json
 import time
+import threading
 import requests
 from urllib.parse import quote_plus
 import re
-from collections import deque
-import socket
 from typing import Dict, List, Optional, Any, Union
 from datetime import datetime
 
+from connectivity import get_connectivity_monitor
+from http_session import get_http_session
+from search_orchestrator import SearchBackend, SearchOrchestrator
+from web_cache import RESULTS_NAMESPACE, get_web_cache
+
 # Importações opcionais com fallback
 try:
     from bs4 import BeautifulSoup
@@ -49,7 +53,8 @@ class WebSearcher:
     def __init__(self, api_key: Optional[str] = None, 
                  cache_results: bool = True,
                  max_results: int = 5,
-                 timeout: int = 10):
+                 timeout: int = 10,
+                 hedge_delay: float = 0.0):
         """
         Inicializa o buscador web.
         
@@ -58,6 +63,8 @@ class WebSearcher:
             cache_results: Se deve armazenar em cache os resultados
             max_results: Número máximo de resultados a retornar
             timeout: Tempo limite para requisições em segundos
+            hedge_delay: Segundos de espera pelo DuckDuckGo antes de consultar
+                também o Google (0 = os dois ao mesmo tempo)
         """
         self.api_key = api_key
         self.cache_results = cache_results
@@ -66,14 +73,20 @@ class WebSearcher:
         self.cache = {}
         self.last_search_time = 0
         self.search_delay = 1  # Segundos entre buscas para evitar bloqueios
-        # Verifica conexão com internet
-        try:
-            socket.create_connection(("www.google.com", 80), timeout=2)
-            self.online = True
-            print("WebSearcher: Conexão com a internet disponível.")
-        except:
-            self.online = False
-            print("WebSearcher: Sem conexão com a internet.")
+        # Estado da conexão mantido em segundo plano, lido sem acessar a rede
+        self.connectivity = get_connectivity_monitor()
+        # Conexões reaproveitadas entre buscas (keep-alive, novas tentativas)
+        self.http = get_http_session()
+        # DuckDuckGo e Google consultados em paralelo; vale o primeiro com resultados
+        self.orchestrator = SearchOrchestrator([
+            SearchBackend("DuckDuckGo", self._search_duckduckgo, deadline=timeout),
+            SearchBackend("Google", self._search_google, deadline=timeout, delay=hedge_delay),
+        ])
+    
+    @property
+    def online(self) -> bool:
+        """Indica se há conexão com a internet (último estado do monitor)"""
+        return self.connectivity.online
         
     def search(self, query: str) -> str:
         """
@@ -103,7 +116,7 @@ class WebSearcher:
             time.sleep(self.search_delay - time_since_last)
             
         try:
-            # Tenta primeiro com a busca usando DuckDuckGo web
+            # Busca no DuckDuckGo e no Google em paralelo
             print(f"Buscando informações sobre: '{query}'")
             results = self._direct_web_search(query)
             
@@ -133,7 +146,9 @@ class WebSearcher:
     
     def _direct_web_search(self, query: str) -> List[Dict[str, str]]:
         """
-        Realiza uma busca direta usando DuckDuckGo ou Google.
+        Realiza uma busca direta no DuckDuckGo e no Google ao mesmo tempo.
+        
+        Vale a primeira resposta com resultados; a outra é cancelada.
         
         Args:
             query: A consulta de busca
@@ -141,89 +156,91 @@ class WebSearcher:
         Returns:
             Lista de resultados com título, url e trecho
         """
+        if not bs4_available:
+            print("BeautifulSoup não disponível, usando resultados simulados.")
+            return self._get_simulated_results(query)
+        
+        return self.orchestrator.search(query)
+    
+    def _search_duckduckgo(self, query: str) -> List[Dict[str, str]]:
+        """Busca na versão HTML do DuckDuckGo"""
+        ddg_url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
+        
+        print(f"Conectando-se a {ddg_url}")
         try:
-            # Codifica a consulta para URL
-            encoded_query = quote_plus(query)
-            
-            # Tenta primeiro pelo DuckDuckGo
-            ddg_url = f"https://html.duckduckgo.com/html/?q={encoded_query}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            print(f"Conectando-se a {ddg_url}")
-            response = requests.get(ddg_url, headers=headers, timeout=self.timeout)
-            
-            if not bs4_available:
-                print("BeautifulSoup não disponível, usando resultados simulados.")
-                return self._get_simulated_results(query)
+            response = self.http.get(ddg_url, timeout=self.timeout)
+        except requests.ConnectionError:
+            self.connectivity.report_failure()
+            raise
+        
+        results = []
+        if response.status_code != 200:
+            print(f"Falha na busca DuckDuckGo (status code {response.status_code})")
+            return results
+        
+        soup = BeautifulSoup(response.text, 'html.parser')
+        result_elements = soup.select('.result')
+        
+        for i, result in enumerate(result_elements):
+            if i >= self.max_results:
+                break
                 
-            results = []
+            title_elem = result.select_one('.result__a')
+            snippet_elem = result.select_one('.result__snippet')
             
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                result_elements = soup.select('.result')
-                
-                for i, result in enumerate(result_elements):
-                    if i >= self.max_results:
-                        break
-                        
-                    title_elem = result.select_one('.result__a')
-                    snippet_elem = result.select_one('.result__snippet')
-                    
-                    if title_elem:
-                        title = title_elem.get_text(strip=True)
-                        url = title_elem.get('href', '')
-                        snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
-                        
-                        results.append({
-                            'title': title,
-                            'snippet': snippet,
-                            'url': url
-                        })
-                        
-                print(f"Encontrados {len(results)} resultados do DuckDuckGo")
-                return results
-                
-            print(f"Falha na busca DuckDuckGo (status code {response.status_code}), tentando Google")
+            if title_elem:
+                title = title_elem.get_text(strip=True)
+                url = title_elem.get('href', '')
+                snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
                 
-            # Se DuckDuckGo falhar, tenta com Google
-            google_url = f"https://www.google.com/search?q={encoded_query}"
-            response = requests.get(google_url, headers=headers, timeout=self.timeout)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+                results.append({
+                    'title': title,
+                    'snippet': snippet,
+                    'url': url
+                })
                 
-                # Busca divs que contêm resultados
-                for div in soup.find_all('div', class_=['g', 'tF2Cxc']):
-                    if len(results) >= self.max_results:
-                        break
-                        
-                    title_elem = div.find('h3')
-                    anchor = div.find('a')
-                    snippet_div = div.find('div', class_=['VwiC3b', 'yXK7lf'])
-                    
-                    if title_elem and anchor:
-                        title = title_elem.get_text(strip=True)
-                        url = anchor.get('href', '')
-                        snippet = snippet_div.get_text(strip=True) if snippet_div else ""
-                        
-                        if title and (url.startswith('http') or url.startswith('https')):
-                            results.append({
-                                'title': title,
-                                'snippet': snippet,
-                                'url': url
-                            })
+        print(f"Encontrados {len(results)} resultados do DuckDuckGo")
+        return results
+    
+    def _search_google(self, query: str) -> List[Dict[str, str]]:
+        """Busca na página de resultados do Google"""
+        google_url = f"https://www.google.com/search?q={quote_plus(query)}"
+        try:
+            response = self.http.get(google_url, timeout=self.timeout)
+        except requests.ConnectionError:
+            self.connectivity.report_failure()
+            raise
+        
+        results = []
+        if response.status_code != 200:
+            print(f"Falha na busca Google (status code {response.status_code})")
+            return results
+        
+        soup = BeautifulSoup(response.text, 'html.parser')
+        
+        # Busca divs que contêm resultados
+        for div in soup.find_all('div', class_=['g', 'tF2Cxc']):
+            if len(results) >= self.max_results:
+                break
                 
-                print(f"Encontrados {len(results)} resultados do Google")
-                return results
+            title_elem = div.find('h3')
+            anchor = div.find('a')
+            snippet_div = div.find('div', class_=['VwiC3b', 'yXK7lf'])
+            
+            if title_elem and anchor:
+                title = title_elem.get_text(strip=True)
+                url = anchor.get('href', '')
+                snippet = snippet_div.get_text(strip=True) if snippet_div else ""
                 
-        except Exception as e:
-            print(f"Erro na busca direta: {e}")
+                if title and (url.startswith('http') or url.startswith('https')):
+                    results.append({
+                        'title': title,
+                        'snippet': snippet,
+                        'url': url
+                    })
         
-        # Em caso de falha, retorna um resultado vazio
-        return []
+        print(f"Encontrados {len(results)} resultados do Google")
+        return results
     
     def _get_simulated_results(self, query: str) -> List[Dict[str, str]]:
         """Retorna resultados simulados quando os serviços reais não estão disponíveis"""
@@ -257,13 +274,10 @@ class WebSearcher:
         try:
             # Simulando uma busca - em uma implementação real, usaria uma API ou scraping ético
             encoded_query = quote_plus(query)
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
             
             # Nota: Em uma implementação real, este seria um endpoint de API válido
             # Esta linha está comentada pois não fará uma busca real
-            # response = requests.get(f"https://api.exemplo.com/search?q={encoded_query}", headers=headers, timeout=self.timeout)
+            # response = self.http.get(f"https://api.exemplo.com/search?q={encoded_query}", timeout=self.timeout)
             
             # Resultados simulados para demonstração
             simulated_results = [
@@ -351,24 +365,35 @@ class WebSearcher:
 class ImprovedWebSearch:
     """Módulo aprimorado para pesquisa web usando Selenium com Chrome"""
     
-    def __init__(self, cache_size=100, headless=True):
-        self.online = self._check_connection()
-        self.cache = {}
-        self.cache_size = cache_size
-        self.cache_keys = deque(maxlen=cache_size)
+    def __init__(self, cache_size=100, headless=True, browser_delay=2.0):
+        """
+        Args:
+            cache_size: Número máximo de pesquisas mantidas em cache
+            headless: Executa o Chrome sem janela
+            browser_delay: Segundos de espera pelas buscas via requests antes
+                de abrir também o Chrome (0 = todos ao mesmo tempo)
+        """
+        # Estado da conexão mantido em segundo plano, lido sem acessar a rede
+        self.connectivity = get_connectivity_monitor()
+        # Conexões reaproveitadas entre buscas (keep-alive, novas tentativas)
+        self.http = get_http_session()
+        # Cache compartilhado com WebSearchModule e WebEnabledBot
+        self.web_cache = get_web_cache()
+        self.web_cache.ensure_capacity(cache_size)
         self.driver = None
         self.headless = headless
-        self.load_cache()
+        self._driver_lock = threading.Lock()
+        # Buscas via requests em paralelo; o Chrome fica de reserva
+        self.orchestrator = SearchOrchestrator([
+            SearchBackend("DuckDuckGo", self._search_duckduckgo, deadline=5),
+            SearchBackend("Google", self._search_google_html, deadline=5),
+            SearchBackend("Chrome", self._selenium_search, deadline=30, delay=browser_delay),
+        ])
         
-    def _check_connection(self):
-        """Verifica se há conexão com a internet"""
-        try:
-            # Tenta conectar ao Google para testar a conexão
-            socket.create_connection(("www.google.com", 80), timeout=2)
-            return True
-        except (OSError, socket.timeout):
-            print("Aviso: Sem conexão com a internet. Modo offline ativado.")
-            return False
+    @property
+    def online(self):
+        """Indica se há conexão com a internet (último estado do monitor)"""
+        return self.connectivity.online
     
     def _initialize_driver(self):
         """Inicializa o driver do Chrome se ainda não estiver inicializado"""
@@ -438,30 +463,9 @@ class ImprovedWebSearch:
         
         return None
     
-    def load_cache(self):
-        """Carrega o cache de pesquisas do disco"""
-        if os.path.exists('web_cache.json'):
-            try:
-                with open('web_cache.json', 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                    self.cache = cache_data.get('cache', {})
-                    self.cache_keys = deque(cache_data.get('keys', []), maxlen=self.cache_size)
-                print(f"Cache de pesquisas carregado: {len(self.cache)} entradas")
-            except Exception as e:
-                print(f"Erro ao carregar cache de pesquisas: {e}")
-    
     def save_cache(self):
-        """Salva o cache de pesquisas no disco"""
-        try:
-            cache_data = {
-                'cache': self.cache,
-                'keys': list(self.cache_keys)
-            }
-            with open('web_cache.json', 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-            print(f"Cache de pesquisas salvo: {len(self.cache)} entradas")
-        except Exception as e:
-            print(f"Erro ao salvar cache de pesquisas: {e}")
+        """Grava as alterações pendentes do cache de pesquisas no disco"""
+        self.web_cache.flush()
     
     def close(self):
         """Fecha o driver do Chrome se estiver aberto"""
@@ -473,276 +477,278 @@ class ImprovedWebSearch:
                 pass
     
     def search_google(self, query, max_results=5):
-        """Realiza uma pesquisa no Google usando Selenium"""
+        """
+        Realiza uma pesquisa na web.
+        
+        DuckDuckGo e Google (via requests) são consultados ao mesmo tempo; o
+        Chrome com Selenium, mais lento, entra como reserva se nenhum dos dois
+        responder em browser_delay segundos ou se algum falhar. Vale o primeiro
+        que trouxer resultados.
+        """
         # Normaliza a consulta
         normalized_query = query.lower().strip()
         
-        # Verifica se a consulta está no cache
-        if normalized_query in self.cache:
+        # Verifica se a consulta está no cache; um resultado vencido ainda é
+        # usado enquanto uma nova busca o renova em segundo plano
+        cached = self.web_cache.get(RESULTS_NAMESPACE, normalized_query,
+                                    revalidate=lambda: self._fetch_results(query, max_results))
+        if cached is not None:
             print(f"Usando resultados em cache para: {normalized_query}")
-            return self.cache[normalized_query]
+            return cached[:max_results]
         
         # Se estiver offline, retorna vazio
         if not self.online:
             print("Dispositivo offline. Não é possível realizar pesquisa.")
             return []
         
-        # Inicializa o driver se necessário
-        if not self._initialize_driver():
-            print("Não foi possível inicializar o driver. Usando método alternativo.")
-            return self._fallback_search(query, max_results)
+        search_results = self._fetch_results(query, max_results)
+        
+        # Resultados simulados como último recurso (não vão para o cache)
+        if not search_results:
+            print("Sem resultados reais. Criando resultados demonstrativos.")
+            return self._simulated_results(query)
+        
+        # Adiciona ao cache (as entradas usadas há mais tempo saem quando ele enche);
+        # o arquivo é gravado depois, em segundo plano
+        self.web_cache.put(RESULTS_NAMESPACE, normalized_query, search_results)
         
+        return search_results
+    
+    def _fetch_results(self, query, max_results=5):
+        """Consulta os serviços de busca; retorna None se estiver offline ou sem resultados"""
+        if not self.online:
+            return None
+        return self.orchestrator.search(query, max_results=max_results) or None
+    
+    def _selenium_search(self, query, max_results=5):
+        """Realiza uma pesquisa no Google usando Selenium"""
+        # O driver não aceita duas pesquisas ao mesmo tempo, e uma pesquisa
+        # cancelada pelo orquestrador pode ainda estar em andamento
+        if not self._driver_lock.acquire(blocking=False):
+            print("Chrome ocupado com outra pesquisa.")
+            return []
         try:
-            print(f"Realizando pesquisa no Google para: '{query}'")
-            # Acessa o Google
-            self.driver.get("https://www.google.com")
+            # Inicializa o driver se necessário
+            if not self._initialize_driver():
+                print("Não foi possível inicializar o driver.")
+                return []
             
-            # Aguarda carregamento da página e aceita cookies se necessário
             try:
-                cookie_button = WebDriverWait(self.driver, 3).until(
-                    EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Aceito') or contains(text(), 'Accept') or contains(@aria-label, 'Accept')]"))
-                )
-                cookie_button.click()
-                print("Aceitou cookies do Google")
-            except Exception as e:
-                # Prossegue se não houver diálogo de cookies
-                print(f"Sem diálogo de cookies ou erro: {e}")
-                pass
+                print(f"Realizando pesquisa no Google para: '{query}'")
+                # Acessa o Google
+                self.driver.get("https://www.google.com")
                 
-            # Encontra a caixa de pesquisa e insere a consulta
-            try:
-                search_box = WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.NAME, "q"))
-                )
-                search_box.clear()
-                search_box.send_keys(query)
-                search_box.send_keys(Keys.RETURN)
-                print("Consulta enviada para o Google")
-            except Exception as e:
-                print(f"Erro ao enviar consulta para o Google: {e}")
-                return self._fallback_search(query, max_results)
+                # Aguarda carregamento da página e aceita cookies se necessário
+                try:
+                    cookie_button = WebDriverWait(self.driver, 3).until(
+                        EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Aceito') or contains(text(), 'Accept') or contains(@aria-label, 'Accept')]"))
+                    )
+                    cookie_button.click()
+                    print("Aceitou cookies do Google")
+                except Exception as e:
+                    # Prossegue se não houver diálogo de cookies
+                    print(f"Sem diálogo de cookies ou erro: {e}")
+                    pass
+                
+                # Encontra a caixa de pesquisa e insere a consulta
+                try:
+                    search_box = WebDriverWait(self.driver, 10).until(
+                        EC.presence_of_element_located((By.NAME, "q"))
+                    )
+                    search_box.clear()
+                    search_box.send_keys(query)
+                    search_box.send_keys(Keys.RETURN)
+                    print("Consulta enviada para o Google")
+                except Exception as e:
+                    print(f"Erro ao enviar consulta para o Google: {e}")
+                    return []
+                
+                # Aguarda os resultados carregarem
+                try:
+                    WebDriverWait(self.driver, 10).until(
+                        EC.presence_of_element_located((By.ID, "search"))
+                    )
+                    # Pequena pausa para garantir o carregamento completo
+                    time.sleep(2)
+                    print("Página de resultados carregada")
+                except Exception as e:
+                    print(f"Erro ao aguardar carregamento de resultados: {e}")
+                    # Tentar continuar mesmo sem o elemento específico
+                    time.sleep(3)
+                
+                # Extrai os resultados - versão mais robusta com múltiplos seletores
+                search_results = []
+                selectors = [
+                    "div.g", 
+                    "div.Gx5Zad", 
+                    "div.kvH3mc",
+                    "div.tF2Cxc",
+                    "div.yuRUbf"
+                ]
+                
+                result_elements = []
+                for selector in selectors:
+                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                    if elements:
+                        print(f"Encontrados {len(elements)} resultados com seletor {selector}")
+                        result_elements = elements
+                        break
+                
+                if not result_elements:
+                    print("Nenhum resultado encontrado com os seletores padrão")
+                    # Capturar qualquer div que possa conter resultados
+                    result_elements = self.driver.find_elements(By.CSS_SELECTOR, "div[data-hveid]")
+                    print(f"Tentativa alternativa: {len(result_elements)} elementos encontrados")
+                
+                for i, element in enumerate(result_elements):
+                    if i >= max_results:
+                        break
+                    
+                    try:
+                        # Extrai título, snippet e URL com múltiplas tentativas
+                        title = ""
+                        url = ""
+                        snippet = ""
+                        
+                        # Tenta diferentes seletores para o título
+                        for title_selector in ["h3", "h3.LC20lb", ".DKV0Md", ".vvjwJb"]:
+                            try:
+                                title_element = element.find_element(By.CSS_SELECTOR, title_selector)
+                                title = title_element.text
+                                if title:
+                                    break
+                            except:
+                                continue
+                        
+                        # Tenta diferentes seletores para o URL
+                        for url_selector in ["a", "a[href]", ".yuRUbf a", ".NJjxre a"]:
+                            try:
+                                link_element = element.find_element(By.CSS_SELECTOR, url_selector)
+                                url = link_element.get_attribute("href")
+                                if url:
+                                    break
+                            except:
+                                continue
+                        
+                        # Tenta diferentes seletores para o snippet
+                        for snippet_selector in ["div.VwiC3b", ".s3v9rd", ".VwiC3b", ".lEBKkf"]:
+                            try:
+                                snippet_element = element.find_element(By.CSS_SELECTOR, snippet_selector)
+                                snippet = snippet_element.text
+                                if snippet:
+                                    break
+                            except:
+                                continue
+                        
+                        if title or url or snippet:
+                            search_results.append({
+                                'title': title or "Sem título",
+                                'snippet': snippet or "Sem descrição",
+                                'url': url or ""
+                            })
+                            print(f"Resultado {i+1} extraído: {title[:30]}...")
+                    except Exception as result_error:
+                        print(f"Erro ao extrair resultado {i+1}: {result_error}")
+                        continue
+                
+                print(f"Total de resultados processados: {len(search_results)}")
+                return search_results
             
-            # Aguarda os resultados carregarem
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.ID, "search"))
-                )
-                # Pequena pausa para garantir o carregamento completo
-                time.sleep(2)
-                print("Página de resultados carregada")
             except Exception as e:
-                print(f"Erro ao aguardar carregamento de resultados: {e}")
-                # Tentar continuar mesmo sem o elemento específico
-                time.sleep(3)
-            
-            # Extrai os resultados - versão mais robusta com múltiplos seletores
-            search_results = []
-            selectors = [
-                "div.g", 
-                "div.Gx5Zad", 
-                "div.kvH3mc",
-                "div.tF2Cxc",
-                "div.yuRUbf"
-            ]
+                print(f"Erro ao realizar pesquisa com Selenium: {e}")
+                return []
+        finally:
+            self._driver_lock.release()
+    
+    def _search_duckduckgo(self, query, max_results=5):
+        """Pesquisa na versão HTML do DuckDuckGo usando requests"""
+        ddg_url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
+        try:
+            response = self.http.get(ddg_url, timeout=5)
+        except requests.ConnectionError:
+            self.connectivity.report_failure()
+            raise
+        
+        search_results = []
+        if response.status_code == 200:
+            print("Conexão com DuckDuckGo bem-sucedida")
+            soup = BeautifulSoup(response.text, 'html.parser')
+            results = soup.select('.result')
             
-            result_elements = []
-            for selector in selectors:
-                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                if elements:
-                    print(f"Encontrados {len(elements)} resultados com seletor {selector}")
-                    result_elements = elements
+            for i, result in enumerate(results):
+                if i >= max_results:
                     break
+                    
+                title_elem = result.select_one('.result__a')
+                snippet_elem = result.select_one('.result__snippet')
+                
+                if title_elem:
+                    title = title_elem.get_text(strip=True)
+                    url = title_elem.get('href', '')
+                    snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
+                    
+                    search_results.append({
+                        'title': title,
+                        'snippet': snippet,
+                        'url': url
+                    })
+                    print(f"Resultado DuckDuckGo {i+1} extraído: {title[:30]}...")
+        return search_results
+    
+    def _search_google_html(self, query, max_results=5):
+        """Pesquisa na página de resultados do Google usando requests"""
+        google_url = f"https://www.google.com/search?q={quote_plus(query)}"
+        try:
+            response = self.http.get(google_url, timeout=5)
+        except requests.ConnectionError:
+            self.connectivity.report_failure()
+            raise
+        
+        search_results = []
+        if response.status_code == 200:
+            print("Conexão com Google bem-sucedida")
+            soup = BeautifulSoup(response.text, 'html.parser')
             
-            if not result_elements:
-                print("Nenhum resultado encontrado com os seletores padrão")
-                # Capturar qualquer div que possa conter resultados
-                result_elements = self.driver.find_elements(By.CSS_SELECTOR, "div[data-hveid]")
-                print(f"Tentativa alternativa: {len(result_elements)} elementos encontrados")
-            
-            for i, element in enumerate(result_elements):
+            # Tenta extrair resultados do Google (mais difícil com JavaScript desativado)
+            for i, div in enumerate(soup.find_all('div', class_=['g', 'tF2Cxc', 'yuRUbf'])):
                 if i >= max_results:
                     break
                     
                 try:
-                    # Extrai título, snippet e URL com múltiplas tentativas
-                    title = ""
-                    url = ""
-                    snippet = ""
-                    
-                    # Tenta diferentes seletores para o título
-                    for title_selector in ["h3", "h3.LC20lb", ".DKV0Md", ".vvjwJb"]:
-                        try:
-                            title_element = element.find_element(By.CSS_SELECTOR, title_selector)
-                            title = title_element.text
-                            if title:
-                                break
-                        except:
-                            continue
-                    
-                    # Tenta diferentes seletores para o URL
-                    for url_selector in ["a", "a[href]", ".yuRUbf a", ".NJjxre a"]:
-                        try:
-                            link_element = element.find_element(By.CSS_SELECTOR, url_selector)
-                            url = link_element.get_attribute("href")
-                            if url:
-                                break
-                        except:
-                            continue
-                    
-                    # Tenta diferentes seletores para o snippet
-                    for snippet_selector in ["div.VwiC3b", ".s3v9rd", ".VwiC3b", ".lEBKkf"]:
-                        try:
-                            snippet_element = element.find_element(By.CSS_SELECTOR, snippet_selector)
-                            snippet = snippet_element.text
-                            if snippet:
-                                break
-                        except:
-                            continue
+                    title_elem = div.find('h3')
+                    a_elem = div.find('a')
+                    snippet_div = div.find('div', class_=['VwiC3b', 'yXK7lf'])
                     
-                    if title or url or snippet:
+                    if title_elem and a_elem:
+                        title = title_elem.get_text(strip=True)
+                        url = a_elem.get('href', '')
+                        snippet = snippet_div.get_text(strip=True) if snippet_div else ""
+                        
                         search_results.append({
-                            'title': title or "Sem título",
-                            'snippet': snippet or "Sem descrição",
-                            'url': url or ""
+                            'title': title,
+                            'snippet': snippet,
+                            'url': url
                         })
-                        print(f"Resultado {i+1} extraído: {title[:30]}...")
-                except Exception as result_error:
-                    print(f"Erro ao extrair resultado {i+1}: {result_error}")
+                        print(f"Resultado Google {i+1} extraído: {title[:30]}...")
+                except:
                     continue
-            
-            print(f"Total de resultados processados: {len(search_results)}")
-            if not search_results:
-                print("Nenhum resultado extraído. Usando método alternativo.")
-                return self._fallback_search(query, max_results)
-            
-            # Adiciona ao cache
-            self.cache[normalized_query] = search_results
-            self.cache_keys.append(normalized_query)
-            
-            # Se o cache atingiu o tamanho máximo, remove o item mais antigo
-            if len(self.cache) > self.cache_size:
-                oldest_key = self.cache_keys[0]
-                if oldest_key in self.cache:
-                    del self.cache[oldest_key]
-            
-            # Salva o cache atualizado
-            self.save_cache()
-            
-            return search_results
-            
-        except Exception as e:
-            print(f"Erro ao realizar pesquisa com Selenium: {e}")
-            # Tenta usar método alternativo se o Selenium falhar
-            return self._fallback_search(query, max_results)
+        return search_results
     
-    def _fallback_search(self, query, max_results=5):
-        """Método alternativo de pesquisa usando requests (fallback)"""
-        try:
-            print(f"Usando método de pesquisa alternativo para: '{query}'")
-            # Codifica a consulta para URL
-            encoded_query = quote_plus(query)
-            
-            # Tenta primeiro pelo DuckDuckGo
-            ddg_url = f"https://html.duckduckgo.com/html/?q={encoded_query}"
-            google_url = f"https://www.google.com/search?q={encoded_query}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    def _simulated_results(self, query):
+        """Resultados demonstrativos usados quando nenhum serviço responde"""
+        encoded_query = quote_plus(query)
+        return [
+            {
+                'title': f"Informações sobre {query}",
+                'snippet': f"Não foi possível obter informações reais sobre '{query}'. Este é um resultado simulado para demonstração.",
+                'url': f"https://www.google.com/search?q={encoded_query}"
+            },
+            {
+                'title': f"Busca por {query}",
+                'snippet': f"Este é um resultado simulado pois não foi possível obter resultados reais da web. A funcionalidade de busca pode precisar de configuração adicional.",
+                'url': f"https://duckduckgo.com/?q={encoded_query}"
             }
-            
-            # Tenta com DuckDuckGo
-            search_results = []
-            try:
-                response = requests.get(ddg_url, headers=headers, timeout=5)
-                
-                if response.status_code == 200:
-                    print("Conexão com DuckDuckGo bem-sucedida")
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    results = soup.select('.result')
-                    
-                    for i, result in enumerate(results):
-                        if i >= max_results:
-                            break
-                            
-                        title_elem = result.select_one('.result__a')
-                        snippet_elem = result.select_one('.result__snippet')
-                        
-                        if title_elem:
-                            title = title_elem.get_text(strip=True)
-                            url = title_elem.get('href', '')
-                            snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
-                            
-                            search_results.append({
-                                'title': title,
-                                'snippet': snippet,
-                                'url': url
-                            })
-                            print(f"Resultado DuckDuckGo {i+1} extraído: {title[:30]}...")
-            except Exception as ddg_error:
-                print(f"Erro ao pesquisar no DuckDuckGo: {ddg_error}")
-            
-            # Se não conseguiu resultados com DuckDuckGo, tenta Google como texto
-            if not search_results:
-                try:
-                    response = requests.get(google_url, headers=headers, timeout=5)
-                    
-                    if response.status_code == 200:
-                        print("Conexão com Google bem-sucedida")
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        
-                        # Tenta extrair resultados do Google (mais difícil com JavaScript desativado)
-                        for i, div in enumerate(soup.find_all('div', class_=['g', 'tF2Cxc', 'yuRUbf'])):
-                            if i >= max_results:
-                                break
-                                
-                            try:
-                                title_elem = div.find('h3')
-                                a_elem = div.find('a')
-                                snippet_div = div.find('div', class_=['VwiC3b', 'yXK7lf'])
-                                
-                                if title_elem and a_elem:
-                                    title = title_elem.get_text(strip=True)
-                                    url = a_elem.get('href', '')
-                                    snippet = snippet_div.get_text(strip=True) if snippet_div else ""
-                                    
-                                    search_results.append({
-                                        'title': title,
-                                        'snippet': snippet,
-                                        'url': url
-                                    })
-                                    print(f"Resultado Google {i+1} extraído: {title[:30]}...")
-                            except:
-                                continue
-                except Exception as google_error:
-                    print(f"Erro ao pesquisar no Google: {google_error}")
-            
-            # Resultados simulados como último recurso
-            if not search_results:
-                print("Sem resultados reais. Criando resultados demonstrativos.")
-                search_results = [
-                    {
-                        'title': f"Informações sobre {query}",
-                        'snippet': f"Não foi possível obter informações reais sobre '{query}'. Este é um resultado simulado para demonstração.",
-                        'url': f"https://www.google.com/search?q={encoded_query}"
-                    },
-                    {
-                        'title': f"Busca por {query}",
-                        'snippet': f"Este é um resultado simulado pois não foi possível obter resultados reais da web. A funcionalidade de busca pode precisar de configuração adicional.",
-                        'url': f"https://duckduckgo.com/?q={encoded_query}"
-                    }
-                ]
-            
-            # Adiciona ao cache
-            normalized_query = query.lower().strip()
-            self.cache[normalized_query] = search_results
-            self.cache_keys.append(normalized_query)
-            self.save_cache()
-            
-            return search_results
-            
-        except Exception as e:
-            print(f"Erro ao realizar pesquisa fallback: {e}")
-            return []
+        ]
     
     def search(self, query, max_results=5):
         """Método principal de pesquisa, tenta usar o Chrome primeiro"""
@@ -776,10 +782,7 @@ class ImprovedWebSearch:
             
         try:
             # Tenta primeiro com requests (mais rápido)
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.http.get(url, timeout=10)
             
             if response.status_code == 200:
                 soup = BeautifulSoup(response.text, 'html.parser')
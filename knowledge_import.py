@@ -0,0 +1,185 @@
+"""
+Importador em lote de pares pergunta/resposta para a base de conhecimento.
+
+Lê arquivos JSONL ou CSV em fluxo (sem carregar tudo na memória), ignora os
+pares repetidos, atualiza os índices da base e treina o modelo de linguagem em
+lote.
+O journal é gravado em blocos limitados e o snapshot é compactado uma única
+vez no final.
+
+Uso:
+    python knowledge_import.py perguntas.jsonl
+    python knowledge_import.py perguntas.csv --chunk-size 5000 --sem-modelo
+    python knowledge_import.py perguntas.jsonl --sqlite knowledge.db
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+from self_evolving_bot import KnowledgeBase, SimpleLanguageModel
+from knowledge_store import SQLiteKnowledgeBase
+
+# Nomes de campos aceitos para a pergunta e a resposta
+INPUT_FIELDS = ('input', 'pergunta', 'question', 'q')
+RESPONSE_FIELDS = ('response', 'resposta', 'answer', 'a')
+
+
+def _pick_field(record: dict, names: Tuple[str, ...]) -> Optional[str]:
+    """Retorna o valor do primeiro campo presente no registro."""
+    for name in names:
+        if name in record:
+            return record[name]
+    return None
+
+
+def read_jsonl(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Lê pares de um arquivo JSONL.
+
+    Cada linha pode ser um objeto (ex.: {"pergunta": ..., "resposta": ...})
+    ou uma lista [pergunta, resposta].
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                print(f"Linha {line_number} ignorada (JSON inválido): {e}")
+                continue
+
+            if isinstance(record, dict):
+                question = _pick_field(record, INPUT_FIELDS)
+                answer = _pick_field(record, RESPONSE_FIELDS)
+            elif isinstance(record, list) and len(record) >= 2:
+                question, answer = record[0], record[1]
+            else:
+                question = answer = None
+
+            if isinstance(question, str) and isinstance(answer, str):
+                yield question, answer
+            else:
+                print(f"Linha {line_number} ignorada (formato não reconhecido)")
+
+
+def read_csv(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Lê pares de um arquivo CSV (duas primeiras colunas).
+
+    Um cabeçalho com nomes conhecidos (ex.: pergunta,resposta) é ignorado.
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        for row_number, row in enumerate(reader, 1):
+            if len(row) < 2:
+                continue
+            if row_number == 1 and row[0].strip().lower() in INPUT_FIELDS:
+                continue
+            yield row[0], row[1]
+
+
+def normalize_pairs(pairs: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+    """
+    Normaliza a pergunta e descarta os pares vazios.
+
+    Os repetidos são ignorados pela própria base ao serem gravados, então a
+    memória usada não cresce com o tamanho do arquivo.
+    """
+    for question, answer in pairs:
+        normalized = question.lower().strip()
+        answer = answer.strip()
+        if normalized and answer:
+            yield normalized, answer
+
+
+def import_pairs(knowledge_base: KnowledgeBase,
+                 pairs: Iterable[Tuple[str, str]],
+                 language_model: Optional[SimpleLanguageModel] = None,
+                 chunk_size: int = 10000) -> dict:
+    """
+    Importa pares para a base de conhecimento em blocos e mede a vazão.
+
+    A compactação do journal fica suspensa durante a importação; quem chama
+    compacta uma vez no final (save_knowledge).
+
+    Args:
+        knowledge_base: Base de conhecimento de destino
+        pairs: Iterável de pares (pergunta, resposta)
+        language_model: Modelo treinado em lote com as respostas novas (opcional)
+        chunk_size: Número de pares por bloco gravado no journal
+
+    Returns:
+        Estatísticas da importação (lidos, adicionados, segundos, pares/s)
+    """
+    start = time.perf_counter()
+    stats = {'read': 0, 'added': 0}
+
+    def counted(source):
+        for pair in source:
+            stats['read'] += 1
+            yield pair
+
+    chunk = []
+    for pair in counted(normalize_pairs(pairs)):
+        chunk.append(pair)
+        if len(chunk) >= chunk_size:
+            stats['added'] += knowledge_base.add_knowledge_bulk(chunk, language_model, chunk_size,
+                                                                compact=False)
+            chunk = []
+            elapsed = time.perf_counter() - start
+            print(f"{stats['read']} pares processados ({stats['read'] / elapsed:.0f} pares/s)")
+    if chunk:
+        stats['added'] += knowledge_base.add_knowledge_bulk(chunk, language_model, chunk_size,
+                                                            compact=False)
+
+    stats['seconds'] = time.perf_counter() - start
+    stats['pairs_per_second'] = stats['read'] / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Importa pares pergunta/resposta (JSONL ou CSV) para a base de conhecimento."
+    )
+    parser.add_argument('arquivo', help="Arquivo .jsonl ou .csv com os pares")
+    parser.add_argument('--formato', choices=['jsonl', 'csv'],
+                        help="Formato do arquivo (padrão: deduzido pela extensão)")
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help="Pares por bloco gravado em disco (padrão: 10000)")
+    parser.add_argument('--sem-modelo', action='store_true',
+                        help="Não treina o modelo de linguagem com as respostas")
+    parser.add_argument('--sqlite', nargs='?', const='knowledge.db', metavar='BANCO',
+                        help="Importa para a base SQLite (padrão: knowledge.db)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.arquivo):
+        print(f"Arquivo não encontrado: {args.arquivo}")
+        return 1
+
+    file_format = args.formato or ('csv' if args.arquivo.lower().endswith('.csv') else 'jsonl')
+    reader = read_csv if file_format == 'csv' else read_jsonl
+
+    knowledge_base = SQLiteKnowledgeBase(args.sqlite) if args.sqlite else KnowledgeBase()
+    language_model = None if args.sem_modelo else SimpleLanguageModel()
+
+    stats = import_pairs(knowledge_base, reader(args.arquivo), language_model, args.chunk_size)
+
+    # Persiste o resultado uma única vez
+    knowledge_base.save_knowledge()
+    if language_model is not None:
+        # Grava a imagem completa: um processo curto não espera a compactação em segundo plano
+        language_model.compact_model()
+
+    print(f"Importação concluída: {stats['read']} pares lidos, {stats['added']} novos, "
+          f"{stats['seconds']:.2f}s ({stats['pairs_per_second']:.0f} pares/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+Armazenamento da base de conhecimento em SQLite.
+
+Alternativa ao knowledge.json para bases muito grandes: nada é carregado na
+memória na inicialização, o banco usa WAL (vários processos podem ler ao mesmo
+tempo) e a busca por similaridade usa um índice FTS5 sobre as perguntas.
+
+Migração a partir do formato JSON:
+    python knowledge_store.py migrar knowledge.json knowledge.db
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from self_evolving_bot import KnowledgeBase, KNOWLEDGE_FILE
+
+KNOWLEDGE_DB_FILE = 'knowledge.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS knowledge (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    responses TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_fts USING fts5(
+    key, content='knowledge', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 0'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS knowledge_vocab USING fts5vocab(knowledge_fts, 'row');
+CREATE TRIGGER IF NOT EXISTS knowledge_ai AFTER INSERT ON knowledge BEGIN
+    INSERT INTO knowledge_fts(rowid, key) VALUES (new.id, new.key);
+END;
+CREATE TRIGGER IF NOT EXISTS knowledge_ad AFTER DELETE ON knowledge BEGIN
+    INSERT INTO knowledge_fts(knowledge_fts, rowid, key) VALUES ('delete', old.id, old.key);
+END;
+"""
+
+# Aproximação do tokenizador unicode61: sequências de letras e números
+_FTS_TERM_RE = re.compile(r'[^\W_]+')
+
+
+class SQLiteKnowledgeBase(KnowledgeBase):
+    """Base de conhecimento com a mesma API de KnowledgeBase, persistida em SQLite"""
+
+    def __init__(self, db_path=KNOWLEDGE_DB_FILE):
+        self.db_path = db_path
+        self._conn = None
+        super().__init__()
+
+    def load_knowledge(self):
+        """Abre (ou cria) o banco; nenhuma entrada é carregada na memória"""
+        try:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            print(f"Base de conhecimento SQLite aberta: {self.db_path}")
+        except sqlite3.Error as e:
+            print(f"Erro ao abrir base de conhecimento SQLite: {e}")
+            raise
+
+    def save_knowledge(self):
+        """Transfere o WAL para o arquivo principal do banco"""
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            except sqlite3.Error as e:
+                print(f"Erro ao salvar base de conhecimento SQLite: {e}")
+
+    def flush(self):
+        """Cada adição já é confirmada em sua própria transação"""
+        pass
+
+    def close(self):
+        """Fecha a conexão com o banco"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM knowledge").fetchone()[0]
+
+    def _get_responses(self, normalized_input):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT responses FROM knowledge WHERE key = ?", (normalized_input,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _store_entries(self, entries):
+        new_entries = []
+        with self._lock:
+            try:
+                with self._conn:
+                    for normalized_input, response in entries:
+                        row = self._conn.execute(
+                            "SELECT id, responses FROM knowledge WHERE key = ?", (normalized_input,)
+                        ).fetchone()
+                        if row is None:
+                            self._conn.execute(
+                                "INSERT INTO knowledge(key, responses) VALUES (?, ?)",
+                                (normalized_input, json.dumps([response], ensure_ascii=False))
+                            )
+                        else:
+                            responses = json.loads(row[1])
+                            if not isinstance(responses, list):
+                                responses = [responses]
+                            elif response in responses:
+                                continue
+                            responses.append(response)
+                            self._conn.execute(
+                                "UPDATE knowledge SET responses = ? WHERE id = ?",
+                                (json.dumps(responses, ensure_ascii=False), row[0])
+                            )
+                        new_entries.append((normalized_input, response))
+            except sqlite3.Error as e:
+                print(f"Erro ao gravar na base de conhecimento SQLite: {e}")
+                return []
+        return new_entries
+
+    def _maybe_compact(self):
+        """O SQLite gerencia a própria compactação"""
+        pass
+
+    def _find_similar_key(self, normalized_input):
+        """Busca por similaridade (mínimo de 50% de palavras em comum) via FTS5"""
+        words_input = set(normalized_input.split())
+        if not words_input:
+            return None
+
+        # Mesmo filtro de prefixo da versão em memória: basta procurar pelas
+        # (n - mínimo + 1) palavras mais raras segundo o vocabulário do FTS
+        min_common = len(words_input) // 2 + 1
+        needed = len(words_input) - min_common + 1
+
+        with self._lock:
+            term_docs = self._term_document_counts(words_input)
+            ranked = sorted(words_input, key=lambda word: self._word_frequency(word, term_docs))
+            selected = ranked[:needed]
+
+            if all(_FTS_TERM_RE.search(word) for word in selected):
+                query = ' OR '.join('"%s"' % word.replace('"', '""') for word in selected)
+                rows = self._conn.execute(
+                    "SELECT k.id, k.key FROM knowledge_fts JOIN knowledge k ON k.id = knowledge_fts.rowid "
+                    "WHERE knowledge_fts MATCH ?", (query,)
+                )
+            else:
+                # Palavras só com pontuação não são indexadas pelo FTS
+                rows = self._conn.execute("SELECT id, key FROM knowledge")
+
+            best_match = None
+            best_score = 0
+            best_id = None
+            for row_id, key in rows:
+                words_key = set(key.split())
+                if not words_key:
+                    continue
+                score = len(words_input.intersection(words_key)) / max(len(words_input), len(words_key))
+                if score > 0.5 and (score > best_score or (score == best_score and row_id < best_id)):
+                    best_score = score
+                    best_match = key
+                    best_id = row_id
+
+        return best_match
+
+    def _term_document_counts(self, words):
+        """Consulta no vocabulário do FTS quantas chaves contêm cada termo"""
+        terms = {term for word in words for term in _FTS_TERM_RE.findall(word)}
+        if not terms:
+            return {}
+        placeholders = ','.join('?' * len(terms))
+        return dict(self._conn.execute(
+            f"SELECT term, doc FROM knowledge_vocab WHERE term IN ({placeholders})", tuple(terms)
+        ))
+
+    @staticmethod
+    def _word_frequency(word, term_docs):
+        """Estimativa do número de chaves que contêm a palavra"""
+        terms = _FTS_TERM_RE.findall(word)
+        if not terms:
+            return float('inf')
+        return min(term_docs.get(term, 0) for term in terms)
+
+
+def migrate_json_to_sqlite(json_path=KNOWLEDGE_FILE, db_path=KNOWLEDGE_DB_FILE, chunk_size=10000):
+    """
+    Copia a base de conhecimento JSON (snapshot + journal) para o SQLite.
+
+    Args:
+        json_path: Caminho do knowledge.json de origem
+        db_path: Caminho do banco SQLite de destino
+        chunk_size: Número de pares por transação
+
+    Returns:
+        Número de pares novos gravados no banco
+    """
+    if os.path.abspath(json_path) == os.path.abspath(KNOWLEDGE_FILE):
+        # Arquivo padrão: inclui as adições ainda pendentes no journal
+        knowledge = KnowledgeBase().custom_knowledge
+    else:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            knowledge = json.load(f)
+
+    def pairs():
+        for key, responses in knowledge.items():
+            for response in (responses if isinstance(responses, list) else [responses]):
+                yield key, response
+
+    target = SQLiteKnowledgeBase(db_path)
+    try:
+        return target.add_knowledge_bulk(pairs(), chunk_size=chunk_size)
+    finally:
+        target.save_knowledge()
+        target.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ferramentas da base de conhecimento SQLite.")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    migrate = subparsers.add_parser('migrar', help="Migra knowledge.json para SQLite")
+    migrate.add_argument('origem', nargs='?', default=KNOWLEDGE_FILE)
+    migrate.add_argument('destino', nargs='?', default=KNOWLEDGE_DB_FILE)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.origem):
+        print(f"Arquivo não encontrado: {args.origem}")
+        return 1
+
+    start = time.perf_counter()
+    added = migrate_json_to_sqlite(args.origem, args.destino)
+    print(f"Migração concluída: {added} pares gravados em {args.destino} "
+          f"({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Persistência incremental das memórias em segmentos append-only.
+
+Cada memória é gravada uma única vez como um registro com prefixo de tamanho
+(4 bytes little-endian + pickle do registro). Os registros vão para o
+segmento atual até ele encher; então um novo segmento é aberto e os segmentos
+mais antigos, que já não cabem na janela de max_records memórias, são
+apagados. O disco funciona como um buffer circular: guarda no máximo
+max_records + segment_size registros, e o custo de salvar depende só da
+quantidade de memórias novas.
+"""
+import os
+import pickle
+import struct
+from typing import Iterable, Iterator, List, Tuple
+
+_LENGTH = struct.Struct('<I')
+_SEGMENT_PREFIX = 'segment_'
+_SEGMENT_SUFFIX = '.log'
+
+
+class MemorySegmentLog:
+    """Log de memórias em segmentos, com janela limitada a max_records"""
+
+    def __init__(self, directory: str = 'memories', max_records: int = 1000, segment_size: int = None):
+        self.directory = directory
+        self.max_records = max_records
+        self.segment_size = segment_size or max(1, max_records // 4)
+        # Lista de [número do segmento, registros no segmento], do mais antigo ao mais novo
+        self.segments: List[List[int]] = []
+        self._handle = None
+
+    def exists(self) -> bool:
+        """Indica se já há segmentos gravados"""
+        return bool(self._list_segments())
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"{_SEGMENT_PREFIX}{number:09d}{_SEGMENT_SUFFIX}")
+
+    def _list_segments(self) -> List[int]:
+        if not os.path.isdir(self.directory):
+            return []
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+                try:
+                    numbers.append(int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(numbers)
+
+    def load(self) -> Iterator[Tuple]:
+        """Lê os registros de todos os segmentos, do mais antigo ao mais novo"""
+        self.close()
+        self.segments = []
+        for number in self._list_segments():
+            path = self._segment_path(number)
+            count = 0
+            for record in self._read_segment(path):
+                count += 1
+                yield record
+            self.segments.append([number, count])
+
+    def _read_segment(self, path: str) -> Iterator[Tuple]:
+        """Lê um segmento; um registro final incompleto (queda na escrita) é descartado"""
+        with open(path, 'rb') as f:
+            good_offset = 0
+            while True:
+                header = f.read(_LENGTH.size)
+                if not header:
+                    break
+                record = None
+                if len(header) == _LENGTH.size:
+                    payload = f.read(_LENGTH.unpack(header)[0])
+                    try:
+                        record = pickle.loads(payload)
+                    except Exception:
+                        record = None
+                if record is None:
+                    break
+                good_offset = f.tell()
+                yield record
+            truncated = good_offset < os.path.getsize(path)
+        if truncated:
+            print(f"Registro incompleto descartado em {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(good_offset)
+
+    def append(self, records: Iterable[Tuple]):
+        """Acrescenta registros ao log, abrindo novos segmentos quando necessário"""
+        os.makedirs(self.directory, exist_ok=True)
+        for record in records:
+            if not self.segments or self.segments[-1][1] >= self.segment_size:
+                self._open_new_segment()
+            elif self._handle is None:
+                self._handle = open(self._segment_path(self.segments[-1][0]), 'ab')
+            payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+            self._handle.write(_LENGTH.pack(len(payload)) + payload)
+            self.segments[-1][1] += 1
+        if self._handle is not None:
+            self._handle.flush()
+        self._drop_old_segments()
+
+    def _open_new_segment(self):
+        self.close()
+        number = self.segments[-1][0] + 1 if self.segments else 1
+        self._handle = open(self._segment_path(number), 'ab')
+        self.segments.append([number, 0])
+
+    def _drop_old_segments(self):
+        """Apaga segmentos cujas memórias já saíram da janela de max_records"""
+        total = sum(count for _, count in self.segments)
+        while len(self.segments) > 1 and total - self.segments[0][1] >= self.max_records:
+            number, count = self.segments.pop(0)
+            total -= count
+            try:
+                os.remove(self._segment_path(number))
+            except OSError as e:
+                print(f"Erro ao remover segmento de memórias: {e}")
+
+    def rewrite(self, records: Iterable[Tuple]):
+        """Substitui todo o conteúdo do log (usado na migração do formato antigo)"""
+        self.close()
+        for number in self._list_segments():
+            os.remove(self._segment_path(number))
+        self.segments = []
+        self.append(records)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
@@ -0,0 +1,931 @@
+"""
+Tabela de n-gramas compacta: vocabulário inteiro e arrays no estilo CSR.
+
+As palavras são mapeadas para ids int32. Os contextos (tuplas de ids) e seus
+sucessores ficam em arrays NumPy congelados:
+
+    ctx_hashes   hash de 64 bits de cada contexto, em ordem crescente
+    ctx_tokens   ids do contexto (uma linha por contexto, completada com -1)
+    indptr       início dos sucessores de cada contexto
+    successors   ids das próximas palavras
+    cumulative   contagens acumuladas dos sucessores, reiniciadas a cada contexto
+
+O treino grava em uma área de preparação mutável (dicionário de deltas) que é
+consolidada nos arrays quando cresce demais ou antes de salvar. A amostragem
+combina as duas partes sem consolidar: sorteia-se um número em
+[0, total congelado + total em preparação) e a parte correspondente escolhe a
+palavra pela busca binária nas contagens acumuladas.
+
+Contextos de tamanhos diferentes (0 a ordem-1 palavras) convivem na mesma
+tabela, o que permite o backoff entre ordens com uma consulta de hash por ordem.
+
+Para limitar a memória, pruned() gera uma cópia sem os pares raros e os
+contextos menos usados (LFU: contagem de treino mais o número de vezes em que
+o contexto foi usado na geração), removendo só o necessário para chegar ao
+limite pedido, e refaz o vocabulário sem as palavras que deixaram de ser usadas.
+
+O modelo é salvo em um formato binário versionado (cabeçalho + vocabulário +
+arrays) que é aberto com np.memmap, sem desserialização: a geração começa a
+ler as páginas sob demanda e vários processos compartilham o mesmo arquivo
+pelo cache de páginas do sistema operacional. O mesmo formato serve para
+arquivos delta com as contagens novas, somadas com apply_delta(); o cabeçalho
+guarda o número do último delta já incluído na imagem (checkpoint).
+
+Conversão do formato pickle antigo:
+    python ngram_table.py converter language_model.pkl language_model.bin
+"""
+import argparse
+import bisect
+import os
+import pickle
+import random
+import struct
+import sys
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_HASH_SEED = 0xcbf29ce484222325
+_HASH_PRIME = 0x100000001b3
+_HASH_MASK = (1 << 64) - 1
+
+# Formato binário: cabeçalho seguido das seções, cada uma alinhada em 64 bytes
+FORMAT_MAGIC = b'NGRAMTBL'
+# A versão 2 acrescenta o número do último arquivo delta incluído (checkpoint)
+FORMAT_VERSION = 2
+_HEADERS = {
+    1: struct.Struct('<8sII5Q8Q'),
+    2: struct.Struct('<8sII6Q8Q'),
+}
+_HEADER = _HEADERS[FORMAT_VERSION]
+_ALIGNMENT = 64
+
+
+def _hash_context(context: Sequence[int]) -> int:
+    """Hash FNV-1a de 64 bits sobre os ids do contexto"""
+    h = _HASH_SEED
+    for token in context:
+        h = ((h ^ token) * _HASH_PRIME) & _HASH_MASK
+    return h
+
+
+def _hash_rows(ctx_tokens: np.ndarray) -> np.ndarray:
+    """Mesmo hash de _hash_context, calculado para todas as linhas de uma vez"""
+    hashes = np.full(len(ctx_tokens), _HASH_SEED, dtype=np.uint64)
+    prime = np.uint64(_HASH_PRIME)
+    valid = ctx_tokens >= 0
+    padded = ~valid.all(axis=0)
+    for column, tokens in enumerate(ctx_tokens.astype(np.uint64).T):
+        mixed = (hashes ^ tokens) * prime
+        hashes = np.where(valid[:, column], mixed, hashes) if padded[column] else mixed
+    return hashes
+
+
+def _sort_order(hashes: np.ndarray, ctx_tokens: np.ndarray, next_ids: np.ndarray) -> np.ndarray:
+    """Ordem dos pares por (hash do contexto, contexto, próxima palavra)"""
+    if len(hashes):
+        # Caminho rápido: posição do hash * vocabulário + próxima palavra em
+        # uma única chave int64, ordenada com um argsort só
+        unique_hashes, rank = np.unique(hashes, return_inverse=True)
+        bound = int(next_ids.max()) + 1
+        if len(unique_hashes) * bound < 2 ** 62:
+            rank = rank.reshape(-1)
+            order = np.argsort(rank.astype(np.int64) * bound + next_ids, kind='stable')
+            # Contextos distintos com o mesmo hash ficariam intercalados
+            sorted_ctx, sorted_rank = ctx_tokens[order], rank[order]
+            collision = (sorted_rank[1:] == sorted_rank[:-1]) & np.any(sorted_ctx[1:] != sorted_ctx[:-1], axis=1)
+            if not collision.any():
+                return order
+    keys = [next_ids] + [ctx_tokens[:, i] for i in range(ctx_tokens.shape[1] - 1, -1, -1)] + [hashes]
+    return np.lexsort(keys)
+
+
+def aggregate_pairs(ctx_tokens: np.ndarray, next_ids: np.ndarray,
+                    counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ordena pares (contexto, próxima palavra) e soma as contagens dos repetidos.
+
+    Returns:
+        Tupla (hashes, contextos, próximas palavras, contagens) ordenada por
+        (hash do contexto, contexto, próxima palavra), o layout dos arrays congelados
+    """
+    hashes = _hash_rows(ctx_tokens)
+    order = _sort_order(hashes, ctx_tokens, next_ids)
+    ctx_tokens, next_ids, counts, hashes = ctx_tokens[order], next_ids[order], counts[order], hashes[order]
+
+    # Pares iguais ficam adjacentes
+    if len(order):
+        new_pair = np.ones(len(order), dtype=bool)
+        new_pair[1:] = np.any(ctx_tokens[1:] != ctx_tokens[:-1], axis=1) | (next_ids[1:] != next_ids[:-1])
+        starts = np.flatnonzero(new_pair)
+        counts = np.add.reduceat(counts, starts)
+        ctx_tokens, next_ids, hashes = ctx_tokens[starts], next_ids[starts], hashes[starts]
+    return hashes, ctx_tokens, next_ids, counts.astype(np.int64)
+
+
+def ngram_windows(ids: np.ndarray, positions: np.ndarray, order: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Todos os pares (contexto, próxima palavra) de tamanho 1 até order.
+
+    Args:
+        ids: Ids das palavras de vários textos concatenados
+        positions: Posição de cada palavra dentro do seu texto
+        order: Ordem máxima dos n-gramas
+
+    Returns:
+        Tupla (contextos completados com -1, próximas palavras), os mesmos pares
+        que NGramTable.train geraria texto a texto
+    """
+    width = max(order - 1, 1)
+    ctx_parts, next_parts = [], []
+    for size in range(order):
+        # Posições com pelo menos size palavras anteriores no mesmo texto
+        index = np.flatnonzero(positions >= size)
+        ctx = np.full((len(index), width), -1, dtype=np.int32)
+        for column in range(size):
+            ctx[:, column] = ids[index - size + column]
+        ctx_parts.append(ctx)
+        next_parts.append(ids[index])
+    return np.concatenate(ctx_parts), np.concatenate(next_parts).astype(np.int32)
+
+
+def _in_memory(array: np.ndarray) -> np.ndarray:
+    """O próprio array se já está na memória; uma cópia se ele vem de um arquivo mapeado"""
+    base = array
+    while base is not None:
+        if isinstance(base, np.memmap):
+            return np.array(array)
+        base = base.base
+    return array
+
+
+class _MappedVocabulary:
+    """Vocabulário lido do arquivo mapeado (palavras concatenadas em UTF-8)"""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray, sorted_ids: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+        self.sorted_ids = sorted_ids
+
+    def __len__(self):
+        return len(self.sorted_ids)
+
+    def _encoded(self, word_id: int) -> bytes:
+        return self.blob[int(self.offsets[word_id]):int(self.offsets[word_id + 1])].tobytes()
+
+    def word(self, word_id: int) -> str:
+        return self._encoded(word_id).decode('utf-8')
+
+    def get(self, word: str) -> Optional[int]:
+        """Busca binária pela palavra na ordem dos bytes UTF-8"""
+        target = word.encode('utf-8')
+        lo, hi = 0, len(self.sorted_ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._encoded(int(self.sorted_ids[mid])) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.sorted_ids):
+            word_id = int(self.sorted_ids[lo])
+            if self._encoded(word_id) == target:
+                return word_id
+        return None
+
+
+class NGramTable:
+    """Contagens de n-gramas sobre um vocabulário inteiro, com amostragem ponderada"""
+
+    # Limite de contextos com tabela de amostragem em cache (área de preparação)
+    SAMPLER_CACHE_SIZE = 10000
+    # Estimativa de bytes da área de preparação (dicionários e inteiros Python)
+    STAGED_CONTEXT_BYTES = 300
+    STAGED_PAIR_BYTES = 100
+    # Estimativa de bytes por palavra do vocabulário em memória (str, entrada
+    # no dicionário e na lista)
+    VOCAB_WORD_BYTES = 120
+
+    def __init__(self, freeze_threshold: int = 50000):
+        self.freeze_threshold = freeze_threshold
+
+        # Vocabulário mapeado do arquivo (ids 0..base-1) e palavras novas em memória
+        self._mapped_vocab: Optional[_MappedVocabulary] = None
+        self._base_vocab_size = 0
+        self.vocab: Dict[str, int] = {}
+        self.words: List[str] = []
+        self.modified = False
+        # Número do último arquivo delta incluído nas contagens
+        self.checkpoint = 0
+        # Arquivo mapeado de onde vêm o vocabulário e os arrays (None = memória)
+        self.mapped_path: Optional[str] = None
+
+        self.ctx_hashes = np.zeros(0, dtype=np.uint64)
+        self.ctx_tokens = np.zeros((0, 1), dtype=np.int32)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.successors = np.zeros(0, dtype=np.int32)
+        self.cumulative = np.zeros(0, dtype=np.int32)
+        # Usos de cada contexto congelado na geração (para a evicção LFU)
+        self.hits = np.zeros(0, dtype=np.uint32)
+
+        # Área de preparação: contexto -> {id da próxima palavra: contagem}
+        self.staging: Dict[Tuple[int, ...], Dict[int, int]] = {}
+        self._staged_pairs = 0
+        self._samplers = {}
+        # Contagens acumuladas globais para sample_batch: (cumulative de origem, array)
+        self._sample_keys = (None, None)
+
+    def __len__(self):
+        """Número de contextos distintos"""
+        frozen = len(self.ctx_hashes)
+        return frozen + sum(1 for context in self.staging if self._find_row(context) < 0)
+
+    def __contains__(self, context: Tuple[int, ...]):
+        return context in self.staging or self._find_row(context) >= 0
+
+    @property
+    def vocab_size(self) -> int:
+        return self._base_vocab_size + len(self.words)
+
+    def word(self, word_id: int) -> str:
+        """Palavra correspondente a um id"""
+        if word_id < self._base_vocab_size:
+            return self._mapped_vocab.word(word_id)
+        return self.words[word_id - self._base_vocab_size]
+
+    def _word_id(self, word: str) -> Optional[int]:
+        word_id = self.vocab.get(word)
+        if word_id is None and self._mapped_vocab is not None:
+            word_id = self._mapped_vocab.get(word)
+        return word_id
+
+    def encode(self, words: Iterable[str]) -> List[int]:
+        """Converte palavras em ids, acrescentando as novas ao vocabulário"""
+        ids = []
+        for word in words:
+            word_id = self._word_id(word)
+            if word_id is None:
+                word_id = self.vocab_size
+                self.vocab[word] = word_id
+                self.words.append(word)
+            ids.append(word_id)
+        return ids
+
+    def lookup(self, words: Iterable[str]) -> Optional[Tuple[int, ...]]:
+        """Ids das palavras, ou None se alguma não estiver no vocabulário"""
+        ids = []
+        for word in words:
+            word_id = self._word_id(word)
+            if word_id is None:
+                return None
+            ids.append(word_id)
+        return tuple(ids)
+
+    def add(self, context: Tuple[int, ...], next_id: int, count: int = 1):
+        """Soma uma ocorrência de (contexto, próxima palavra) na área de preparação"""
+        successors = self.staging.get(context)
+        if successors is None:
+            successors = self.staging[context] = {}
+        if next_id not in successors:
+            self._staged_pairs += 1
+        successors[next_id] = successors.get(next_id, 0) + count
+        self._samplers.pop(context, None)
+        self.modified = True
+
+    def train(self, words: Sequence[str], order: int = 2):
+        """Conta os n-gramas de tamanho 1 até order de uma sequência de palavras"""
+        if not words:
+            return
+        ids = self.encode(words)
+        for i, next_id in enumerate(ids):
+            for size in range(min(order - 1, i) + 1):
+                self.add(tuple(ids[i - size:i]), next_id)
+        if self._staged_pairs >= self.freeze_threshold:
+            self.freeze()
+
+    def apply_delta(self, delta: 'NGramTable'):
+        """
+        Soma as contagens de uma tabela pequena (ex.: um arquivo delta) na área
+        de preparação. O custo depende só do tamanho do delta.
+        """
+        mapping = self.encode(delta.all_words())
+        ctx, next_ids, counts = delta.to_coo()
+        for context, next_id, count in zip(ctx.tolist(), next_ids.tolist(), counts.tolist()):
+            self.add(tuple(mapping[token] for token in context if token >= 0), mapping[next_id], count)
+        if self._staged_pairs >= self.freeze_threshold:
+            self.freeze()
+
+    def merge(self, others: Iterable['NGramTable']):
+        """Soma as contagens de outras tabelas (com vocabulários próprios) nesta"""
+        self.freeze()
+        parts = [self.to_coo()]
+        for other in others:
+            other.freeze()
+            mapping = np.asarray(self.encode(other.all_words()), dtype=np.int32)
+            ctx, next_ids, counts = other.to_coo()
+            ctx = np.where(ctx >= 0, mapping[np.maximum(ctx, 0)], -1).astype(np.int32)
+            parts.append((ctx, mapping[next_ids], counts))
+
+        width = max(part[0].shape[1] for part in parts)
+        ctx = np.concatenate([
+            np.hstack([part[0], np.full((len(part[0]), width - part[0].shape[1]), -1, dtype=np.int32)])
+            for part in parts
+        ])
+        self._load_coo(ctx, np.concatenate([part[1] for part in parts]),
+                       np.concatenate([part[2] for part in parts]))
+        self.modified = True
+
+    def _find_row(self, context: Tuple[int, ...]) -> int:
+        """Linha do contexto nos arrays congelados, ou -1"""
+        if not len(self.ctx_hashes) or len(context) > self.ctx_tokens.shape[1]:
+            return -1
+        h = np.uint64(_hash_context(context))
+        row = int(np.searchsorted(self.ctx_hashes, h, side='left'))
+        width = self.ctx_tokens.shape[1]
+        padded = tuple(context) + (-1,) * (width - len(context))
+        # Colisões de hash ficam em linhas vizinhas
+        while row < len(self.ctx_hashes) and self.ctx_hashes[row] == h:
+            if tuple(self.ctx_tokens[row].tolist()) == padded:
+                return row
+            row += 1
+        return -1
+
+    def _find_rows(self, ctx_tokens: np.ndarray) -> np.ndarray:
+        """Versão vetorizada de _find_row (um contexto por linha, completado com -1)"""
+        if not len(self.ctx_hashes) or not len(ctx_tokens):
+            return np.full(len(ctx_tokens), -1, dtype=np.int64)
+        width = self.ctx_tokens.shape[1]
+        if ctx_tokens.shape[1] > width:
+            # Colunas além da largura da tabela precisam ser só preenchimento
+            fits = np.all(ctx_tokens[:, width:] < 0, axis=1)
+            rows = self._find_rows(ctx_tokens[:, :width])
+            rows[~fits] = -1
+            return rows
+
+        size = ctx_tokens.shape[1]
+        hashes = _hash_rows(ctx_tokens)
+        rows = np.searchsorted(self.ctx_hashes, hashes, side='left')
+        np.minimum(rows, len(self.ctx_hashes) - 1, out=rows)
+        same_hash = self.ctx_hashes[rows] == hashes
+        candidates = self.ctx_tokens[rows]
+        match = same_hash & np.all(candidates[:, :size] == ctx_tokens, axis=1)
+        if size < width:
+            match &= np.all(candidates[:, size:] < 0, axis=1)
+
+        # Colisões de hash ficam em linhas vizinhas
+        for i in np.flatnonzero(same_hash & ~match).tolist():
+            context = tuple(token for token in ctx_tokens[i].tolist() if token >= 0)
+            rows[i] = self._find_row(context)
+            match[i] = rows[i] >= 0
+        rows[~match] = -1
+        return rows
+
+    def _frozen_range(self, row: int) -> Tuple[int, int, int]:
+        """(início, fim, total) dos sucessores de uma linha"""
+        start, end = int(self.indptr[row]), int(self.indptr[row + 1])
+        return start, end, int(self.cumulative[end - 1])
+
+    def _frozen_counts(self) -> np.ndarray:
+        """Contagem de cada par congelado (desfaz a soma acumulada por linha)"""
+        counts = np.diff(self.cumulative.astype(np.int64), prepend=0)
+        starts = self.indptr[1:-1][np.diff(self.indptr)[1:] > 0]
+        counts[starts] = self.cumulative[starts]
+        return counts
+
+    def successor_counts(self, context: Tuple[int, ...]) -> Dict[int, int]:
+        """Contagens dos sucessores do contexto (parte congelada + preparação)"""
+        counts = {}
+        row = self._find_row(context)
+        if row >= 0:
+            start, end, _ = self._frozen_range(row)
+            values = np.diff(self.cumulative[start:end].astype(np.int64), prepend=0)
+            counts = dict(zip(self.successors[start:end].tolist(), values.tolist()))
+        for next_id, count in self.staging.get(context, {}).items():
+            counts[next_id] = counts.get(next_id, 0) + count
+        return counts
+
+    def context_total(self, context: Tuple[int, ...]) -> int:
+        """Número de ocorrências do contexto (soma das contagens dos sucessores)"""
+        row = self._find_row(context)
+        total = self._frozen_range(row)[2] if row >= 0 else 0
+        staged = self._staged_sampler(context)
+        return total + (staged[1][-1] if staged else 0)
+
+    def count(self, context: Tuple[int, ...], next_id: int) -> int:
+        """Contagem do par (contexto, próxima palavra)"""
+        total = self.staging.get(context, {}).get(next_id, 0)
+        row = self._find_row(context)
+        if row >= 0:
+            # Sucessores de cada contexto ficam ordenados por id
+            start, end, _ = self._frozen_range(row)
+            index = start + int(np.searchsorted(self.successors[start:end], next_id))
+            if index < end and self.successors[index] == next_id:
+                previous = int(self.cumulative[index - 1]) if index > start else 0
+                total += int(self.cumulative[index]) - previous
+        return total
+
+    def backoff_score(self, context: Tuple[int, ...], next_id: int, alpha: float = 0.4) -> float:
+        """
+        Pontuação "stupid backoff" da próxima palavra.
+
+        Usa a frequência relativa no maior contexto em que o par aparece,
+        multiplicada por alpha a cada ordem descartada.
+        """
+        penalty = 1.0
+        for start in range(len(context) + 1):
+            suffix = context[start:]
+            pair_count = self.count(suffix, next_id)
+            if pair_count:
+                return penalty * pair_count / self.context_total(suffix)
+            penalty *= alpha
+        return 0.0
+
+    def sample(self, context: Tuple[int, ...]) -> Optional[int]:
+        """Sorteia a próxima palavra com probabilidade proporcional à contagem"""
+        row = self._find_row(context)
+        frozen_total = 0
+        if row >= 0:
+            start, end, frozen_total = self._frozen_range(row)
+        staged = self._staged_sampler(context)
+        staged_total = staged[1][-1] if staged else 0
+        if not frozen_total and not staged_total:
+            return None
+
+        draw = random.randrange(frozen_total + staged_total)
+        if row >= 0:
+            self.hits[row] += 1
+        if draw < frozen_total:
+            index = int(np.searchsorted(self.cumulative[start:end], draw, side='right'))
+            return int(self.successors[start + index])
+        words, cumulative = staged
+        return words[bisect.bisect_right(cumulative, draw - frozen_total)]
+
+    def sample_batch(self, history: np.ndarray, min_size: Optional[int] = None) -> np.ndarray:
+        """
+        Versão vetorizada de sample com backoff: sorteia a próxima palavra de
+        várias sequências de uma vez.
+
+        Os contextos de todos os tamanhos (history.shape[1] até min_size) são
+        procurados em uma única busca vetorizada; cada sequência usa o maior
+        deles que tenha sucessores. O sorteio e a escolha do sucessor também
+        são vetorizados; só os contextos com pares na área de preparação passam
+        por Python.
+
+        Args:
+            history: Últimas palavras de cada sequência, uma por linha (sem -1)
+            min_size: Menor contexto do backoff (0 inclui os unigramas; padrão:
+                sem backoff)
+
+        Returns:
+            Id sorteado para cada sequência, ou -1 se nenhum contexto tem sucessores
+        """
+        count, max_size = history.shape
+        sizes = list(range(max_size, (max_size if min_size is None else min_size) - 1, -1))
+        result = np.full(count, -1, dtype=np.int64)
+        if not sizes or not count:
+            return result
+
+        width = max(max_size, 1)
+        queries = np.full((len(sizes), count, width), -1, dtype=np.int32)
+        for level, size in enumerate(sizes):
+            queries[level, :, :size] = history[:, max_size - size:]
+        rows = self._find_rows(queries.reshape(-1, width)).reshape(len(sizes), count)
+
+        staged = {}
+        if self.staging:
+            # O contexto escolhido é o maior com sucessores congelados ou em preparação
+            chosen = np.full(count, -1, dtype=np.int64)
+            for i, line in enumerate(history.tolist()):
+                for level, size in enumerate(sizes):
+                    sampler = self._staged_sampler(tuple(line[max_size - size:]))
+                    if sampler:
+                        staged[i] = sampler
+                    if sampler or rows[level, i] >= 0:
+                        chosen[i] = rows[level, i]
+                        break
+        else:
+            chosen = rows[np.argmax(rows >= 0, axis=0), np.arange(count)]
+
+        found = np.flatnonzero(chosen >= 0)
+        rows = chosen[found]
+        np.add.at(self.hits, rows, 1)
+
+        # Contagens acumuladas sem reinício por linha: um único searchsorted
+        # escolhe o sucessor de todas as sequências
+        keys = self._global_cumulative()
+        offsets = keys[self.indptr[rows]]
+        frozen_total = keys[self.indptr[rows + 1]] - offsets
+        draws = np.minimum((np.random.random(len(rows)) * frozen_total).astype(np.int64), frozen_total - 1)
+        result[found] = self.successors[np.searchsorted(keys, offsets + draws, side='right') - 1]
+
+        if staged:
+            # O sorteio congelado é mantido com probabilidade total congelado / total
+            frozen_totals = dict(zip(found.tolist(), frozen_total.tolist()))
+            for i, (words, cumulative) in staged.items():
+                frozen = frozen_totals.get(i, 0)
+                draw = random.randrange(frozen + cumulative[-1])
+                if draw >= frozen:
+                    result[i] = words[bisect.bisect_right(cumulative, draw - frozen)]
+        return result
+
+    def _global_cumulative(self) -> np.ndarray:
+        """Contagens acumuladas de todos os pares congelados, com 0 no início (uma vez por consolidação)"""
+        source, keys = self._sample_keys
+        if source is not self.cumulative:
+            keys = np.concatenate([[0], np.cumsum(self._frozen_counts())]).astype(np.int64)
+            self._sample_keys = (self.cumulative, keys)
+        return keys
+
+    def _staged_sampler(self, context):
+        successors = self.staging.get(context)
+        if not successors:
+            return None
+        sampler = self._samplers.get(context)
+        if sampler is None:
+            sampler = (list(successors), list(accumulate(successors.values())))
+            if len(self._samplers) >= self.SAMPLER_CACHE_SIZE:
+                self._samplers.clear()
+            self._samplers[context] = sampler
+        return sampler
+
+    def to_coo(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Todas as contagens como (contextos, sucessores, contagens), uma linha por par"""
+        lengths = np.diff(self.indptr)
+        ctx_parts = [np.repeat(self.ctx_tokens, lengths, axis=0)]
+        next_parts = [self.successors]
+        count_parts = [self._frozen_counts()]
+
+        if self.staging:
+            width = max(self.ctx_tokens.shape[1], max(len(context) for context in self.staging))
+            if width > ctx_parts[0].shape[1]:
+                extra = np.full((len(ctx_parts[0]), width - ctx_parts[0].shape[1]), -1, dtype=np.int32)
+                ctx_parts[0] = np.hstack([ctx_parts[0], extra])
+            staged_ctx, staged_next, staged_counts = [], [], []
+            for context, successors in self.staging.items():
+                padded = tuple(context) + (-1,) * (width - len(context))
+                for next_id, count in successors.items():
+                    staged_ctx.append(padded)
+                    staged_next.append(next_id)
+                    staged_counts.append(count)
+            ctx_parts.append(np.asarray(staged_ctx, dtype=np.int32).reshape(-1, width))
+            next_parts.append(np.asarray(staged_next, dtype=np.int32))
+            count_parts.append(np.asarray(staged_counts, dtype=np.int64))
+
+        return (np.concatenate(ctx_parts), np.concatenate(next_parts),
+                np.concatenate(count_parts).astype(np.int64))
+
+    def freeze(self):
+        """Consolida a área de preparação nos arrays compactos"""
+        if not self.staging:
+            return
+        old_hashes, old_hits = self.ctx_hashes, self.hits
+        self._load_coo(*self.to_coo())
+        # Preserva os usos dos contextos que já estavam congelados
+        if old_hits.any():
+            self.hits[np.searchsorted(self.ctx_hashes, old_hashes)] = old_hits
+        self.staging = {}
+        self._staged_pairs = 0
+        self._samplers = {}
+
+    def _load_coo(self, ctx_tokens: np.ndarray, next_ids: np.ndarray, counts: np.ndarray):
+        """Monta os arrays congelados a partir de pares, somando os repetidos"""
+        self.load_sorted_pairs(*aggregate_pairs(ctx_tokens, next_ids, counts))
+
+    def load_sorted_pairs(self, hashes: np.ndarray, ctx_tokens: np.ndarray,
+                          next_ids: np.ndarray, counts: np.ndarray):
+        """Monta os arrays congelados a partir de pares já agregados (ver aggregate_pairs)"""
+        new_ctx = np.ones(len(next_ids), dtype=bool)
+        new_ctx[1:] = np.any(ctx_tokens[1:] != ctx_tokens[:-1], axis=1)
+        rows = np.flatnonzero(new_ctx)
+        self.ctx_hashes = hashes[rows]
+        self.ctx_tokens = np.ascontiguousarray(ctx_tokens[rows], dtype=np.int32)
+        self.indptr = np.append(rows, len(next_ids)).astype(np.int64)
+        self.successors = next_ids.astype(np.int32)
+        cumulative = np.cumsum(counts, dtype=np.int64)
+        if len(cumulative):
+            # Soma acumulada reiniciada no início de cada contexto
+            row_base = np.concatenate([[0], cumulative[self.indptr[1:-1] - 1]])
+            cumulative -= np.repeat(row_base, np.diff(self.indptr))
+        dtype = np.int32 if not len(cumulative) or cumulative.max() < 2 ** 31 else np.int64
+        self.cumulative = cumulative.astype(dtype)
+        self.hits = np.zeros(len(rows), dtype=np.uint32)
+
+    def memory_usage(self) -> int:
+        """Estimativa dos bytes ocupados pelas contagens (arrays + área de preparação) e pelo vocabulário"""
+        arrays = (self.ctx_hashes, self.ctx_tokens, self.indptr, self.successors, self.cumulative, self.hits)
+        if self._mapped_vocab is not None:
+            arrays += (self._mapped_vocab.offsets, self._mapped_vocab.blob, self._mapped_vocab.sorted_ids)
+        # As contagens acumuladas globais de sample_batch são contadas mesmo
+        # antes de criadas, para a estimativa não saltar no primeiro uso
+        return (sum(array.nbytes for array in arrays)
+                + (len(self.successors) + 1) * 8
+                + len(self.staging) * self.STAGED_CONTEXT_BYTES
+                + self._staged_pairs * self.STAGED_PAIR_BYTES
+                + len(self.words) * self.VOCAB_WORD_BYTES)
+
+    def copy(self) -> 'NGramTable':
+        """
+        Cópia para processamento em segundo plano.
+
+        Os arrays congelados nunca são alterados no lugar e o vocabulário é
+        compartilhado (palavras novas ficam visíveis nas duas tabelas); só a
+        área de preparação e os usos são copiados.
+        """
+        table = self._empty_like()
+        for name in ('ctx_hashes', 'ctx_tokens', 'indptr', 'successors', 'cumulative'):
+            setattr(table, name, getattr(self, name))
+        table.hits = self.hits.copy()
+        table.staging = {context: dict(successors) for context, successors in self.staging.items()}
+        table._staged_pairs = self._staged_pairs
+        return table
+
+    def _empty_like(self) -> 'NGramTable':
+        """Tabela vazia que compartilha o vocabulário desta"""
+        table = NGramTable(self.freeze_threshold)
+        table._mapped_vocab = self._mapped_vocab
+        table._base_vocab_size = self._base_vocab_size
+        table.vocab = self.vocab
+        table.words = self.words
+        table.checkpoint = self.checkpoint
+        table.mapped_path = self.mapped_path
+        return table
+
+    def detach(self):
+        """
+        Copia para a memória o que ainda é lido do arquivo mapeado.
+
+        No Windows um arquivo mapeado não pode ser substituído nem apagado;
+        depois disto (e sem outras tabelas com arrays do mesmo arquivo) o
+        mapeamento é fechado e save() pode gravar sobre ele. O vocabulário
+        mapeado é compartilhado, então é liberado em todas as tabelas que o usam.
+        """
+        source, keys = self._sample_keys
+        cached = source is self.cumulative
+        for name in ('ctx_hashes', 'ctx_tokens', 'indptr', 'successors', 'cumulative'):
+            setattr(self, name, _in_memory(getattr(self, name)))
+        # O cache guarda o array de origem; sem isto ele manteria o mapeamento aberto
+        self._sample_keys = (self.cumulative, keys) if cached else (None, None)
+        vocab = self._mapped_vocab
+        if vocab is not None:
+            vocab.offsets = _in_memory(vocab.offsets)
+            vocab.blob = _in_memory(vocab.blob)
+            vocab.sorted_ids = _in_memory(vocab.sorted_ids)
+        self.mapped_path = None
+
+    def pruned(self, min_count: int = 2, max_bytes: Optional[int] = None) -> Tuple['NGramTable', dict]:
+        """
+        Cópia podada da tabela, com o vocabulário refeito só com as palavras
+        ainda usadas (os ids mudam).
+
+        Sem max_bytes, remove os pares com contagem menor que min_count (menos
+        os unigramas). Com max_bytes, remove só o necessário para chegar ao
+        limite (memory_usage, incluindo o vocabulário), em uma única ordem LFU:
+        primeiro os pares com contagem menor que min_count, depois os dos
+        contextos de menor frequência (contagem de treino + usos na geração);
+        dentro de um contexto, os pares de menor contagem.
+
+        Returns:
+            Tupla (tabela podada, estatísticas: pares, contextos e palavras
+            removidos, bytes liberados)
+        """
+        self.freeze()
+        hits = self.hits
+        bytes_before = self.memory_usage()
+
+        row_lengths = np.diff(self.indptr)
+        num_rows, num_pairs = len(row_lengths), len(self.successors)
+        pair_rows = np.repeat(np.arange(num_rows), row_lengths)
+        pair_ctx = self.ctx_tokens[pair_rows]
+        counts = self._frozen_counts()
+        rare = counts < min_count
+
+        if max_bytes is None:
+            unigram_rows = np.all(self.ctx_tokens < 0, axis=1)
+            remove = rare & ~unigram_rows[pair_rows]
+        else:
+            frequency = np.bincount(pair_rows, weights=counts, minlength=num_rows) + hits
+            order = np.lexsort((counts, frequency[pair_rows], ~rare))
+            rank = np.empty(num_pairs, dtype=np.int64)
+            rank[order] = np.arange(num_pairs)
+
+            # Uma linha (ou palavra) deixa de existir quando o último par que a
+            # usa é removido: guarda a maior posição na ordem entre esses pares
+            row_last = np.full(num_rows, -1, dtype=np.int64)
+            np.maximum.at(row_last, pair_rows, rank)
+            word_last = np.full(self.vocab_size, -1, dtype=np.int64)
+            np.maximum.at(word_last, self.successors, rank)
+            used = pair_ctx >= 0
+            np.maximum.at(word_last, pair_ctx[used], np.broadcast_to(rank[:, None], pair_ctx.shape)[used])
+
+            # Tamanho estimado após remover os k primeiros pares, para cada k
+            row_bytes = 8 + 8 + self.ctx_tokens.shape[1] * 4 + 4
+            # Inclui as contagens acumuladas globais de sample_batch (ver memory_usage)
+            pair_bytes = 4 + self.cumulative.dtype.itemsize + 8
+            rows_freed = np.cumsum(np.bincount(row_last + 1, minlength=num_pairs + 1))
+            words_freed = np.cumsum(np.bincount(word_last + 1, minlength=num_pairs + 1))
+            # 16 = posição extra de indptr + chave extra das acumuladas globais
+            size = (16 + (num_pairs - np.arange(num_pairs + 1)) * pair_bytes
+                    + (num_rows - rows_freed) * row_bytes
+                    + (self.vocab_size - words_freed) * self.VOCAB_WORD_BYTES)
+            fits = np.flatnonzero(size <= max_bytes)
+            evict = int(fits[0]) if len(fits) else num_pairs
+            remove = np.zeros(num_pairs, dtype=bool)
+            remove[order[:evict]] = True
+
+        keep = ~remove
+        kept_ctx, kept_next = pair_ctx[keep], self.successors[keep]
+        used_ids = np.unique(np.concatenate([kept_next, kept_ctx[kept_ctx >= 0]]))
+        # O último elemento traduz o preenchimento -1 para ele mesmo
+        remap = np.full(self.vocab_size + 1, -1, dtype=np.int32)
+        remap[used_ids] = np.arange(len(used_ids), dtype=np.int32)
+
+        table = NGramTable(self.freeze_threshold)
+        table.words = [self.word(word_id) for word_id in used_ids.tolist()]
+        table.vocab = {word: word_id for word_id, word in enumerate(table.words)}
+        table.checkpoint = self.checkpoint
+        table._load_coo(remap[kept_ctx], remap[kept_next], counts[keep].astype(np.int64))
+        if len(table.ctx_hashes):
+            # Preserva os usos dos contextos mantidos
+            kept_rows = np.flatnonzero(np.bincount(pair_rows[keep], minlength=num_rows) > 0)
+            table.hits[table._find_rows(remap[self.ctx_tokens[kept_rows]])] = hits[kept_rows]
+        table.modified = True
+
+        stats = {
+            'entries_pruned': int(remove.sum()),
+            'contexts_evicted': int(num_rows - len(table.ctx_hashes)),
+            'words_removed': int(self.vocab_size - table.vocab_size),
+            'bytes_reclaimed': max(0, bytes_before - table.memory_usage()),
+        }
+        return table, stats
+
+    def all_words(self) -> List[str]:
+        """Vocabulário completo na ordem dos ids"""
+        return [self.word(word_id) for word_id in range(self.vocab_size)]
+
+    def __getstate__(self):
+        self.freeze()
+        return {
+            'freeze_threshold': self.freeze_threshold,
+            'words': self.all_words(),
+            'ctx_hashes': self.ctx_hashes,
+            'ctx_tokens': self.ctx_tokens,
+            'indptr': self.indptr,
+            'successors': self.successors,
+            'cumulative': self.cumulative,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state['freeze_threshold'])
+        self.words = state['words']
+        self.vocab = {word: i for i, word in enumerate(self.words)}
+        for name in ('ctx_hashes', 'ctx_tokens', 'indptr', 'successors', 'cumulative'):
+            setattr(self, name, state[name])
+
+    @classmethod
+    def from_dict(cls, ngrams: dict) -> 'NGramTable':
+        """Converte o formato antigo {tupla de palavras: lista ou contagens}"""
+        table = cls()
+        for key, successors in ngrams.items():
+            if isinstance(successors, list):
+                items = [(word, 1) for word in successors]
+            else:
+                items = successors.items()
+            context = tuple(table.encode(key))
+            for word, count in items:
+                next_id = table.encode([word])[0]
+                table.add(context, next_id, count)
+                # O formato antigo só tinha bigramas: os unigramas vêm dos sucessores
+                if len(context) == 1:
+                    table.add((), next_id, count)
+        table.freeze()
+        return table
+
+    def save(self, path: str):
+        """
+        Grava o modelo no formato binário (arquivo temporário + troca atômica).
+
+        Gravar sobre o próprio arquivo mapeado o copia antes para a memória
+        (ver detach).
+        """
+        if self.mapped_path is not None and os.path.abspath(path) == self.mapped_path:
+            self.detach()
+        self.freeze()
+        encoded = [word.encode('utf-8') for word in self.all_words()]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+        offsets[1:] = np.cumsum([len(word) for word in encoded])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        sorted_ids = np.asarray(sorted(range(len(encoded)), key=encoded.__getitem__), dtype='<i4')
+        cumulative_dtype = '<i8' if self.cumulative.dtype.itemsize == 8 else '<i4'
+
+        sections = [
+            offsets, blob, sorted_ids,
+            self.ctx_hashes.astype('<u8'),
+            self.ctx_tokens.astype('<i4').ravel(),
+            self.indptr.astype('<i8'),
+            self.successors.astype('<i4'),
+            self.cumulative.astype(cumulative_dtype),
+        ]
+        positions = []
+        position = _HEADER.size
+        for section in sections:
+            position = -(-position // _ALIGNMENT) * _ALIGNMENT
+            positions.append(position)
+            position += section.nbytes
+
+        header = _HEADER.pack(
+            FORMAT_MAGIC, FORMAT_VERSION, self.cumulative.dtype.itemsize,
+            len(encoded), len(self.ctx_hashes), self.ctx_tokens.shape[1],
+            len(self.successors), len(blob), self.checkpoint, *positions
+        )
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            for section, start in zip(sections, positions):
+                f.write(b'\0' * (start - f.tell()))
+                f.write(section.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.modified = False
+
+    @classmethod
+    def open(cls, path: str) -> 'NGramTable':
+        """Abre um modelo binário com np.memmap (somente leitura, páginas sob demanda)"""
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        if len(data) < _HEADERS[1].size:
+            raise ValueError(f"Arquivo de modelo truncado: {path}")
+        magic, version = struct.unpack('<8sI', data[:12].tobytes())
+        if magic != FORMAT_MAGIC:
+            raise ValueError(f"Arquivo não é um modelo de n-gramas: {path}")
+        if version not in _HEADERS:
+            raise ValueError(f"Versão de modelo não suportada: {version}")
+        header = _HEADERS[version]
+        if len(data) < header.size:
+            raise ValueError(f"Arquivo de modelo truncado: {path}")
+        fields = header.unpack(data[:header.size].tobytes())
+        cumulative_size, vocab_size, num_contexts, width, num_pairs, blob_size = fields[2:8]
+        checkpoint = fields[8] if version >= 2 else 0
+        positions = fields[-8:]
+
+        counts = [vocab_size + 1, blob_size, vocab_size, num_contexts,
+                  num_contexts * width, num_contexts + 1, num_pairs, num_pairs]
+        dtypes = ['<u8', np.uint8, '<i4', '<u8', '<i4', '<i8', '<i4',
+                  '<i8' if cumulative_size == 8 else '<i4']
+        arrays = []
+        for start, count, dtype in zip(positions, counts, dtypes):
+            end = start + count * np.dtype(dtype).itemsize
+            if end > len(data):
+                raise ValueError(f"Arquivo de modelo truncado: {path}")
+            arrays.append(data[start:end].view(dtype))
+
+        table = cls()
+        table._mapped_vocab = _MappedVocabulary(arrays[0], arrays[1], arrays[2])
+        table._base_vocab_size = vocab_size
+        table.ctx_hashes = arrays[3]
+        table.ctx_tokens = arrays[4].reshape(num_contexts, width)
+        table.indptr = arrays[5]
+        table.successors = arrays[6]
+        table.cumulative = arrays[7]
+        table.hits = np.zeros(num_contexts, dtype=np.uint32)
+        table.checkpoint = checkpoint
+        table.mapped_path = os.path.abspath(path)
+        return table
+
+
+def load_pickle(path: str) -> NGramTable:
+    """Lê um modelo salvo em pickle (dicionário antigo ou NGramTable)"""
+    with open(path, 'rb') as f:
+        ngrams = pickle.load(f)
+    # Modelos antigos eram um dicionário {tupla de palavras: sucessores}
+    if isinstance(ngrams, dict):
+        ngrams = NGramTable.from_dict(ngrams)
+    return ngrams
+
+
+def convert_pickle(pickle_path: str, binary_path: str) -> NGramTable:
+    """Converte um modelo em pickle para o formato binário"""
+    table = load_pickle(pickle_path)
+    table.save(binary_path)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ferramentas do modelo de n-gramas.")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    convert = subparsers.add_parser('converter', help="Converte language_model.pkl para o formato binário")
+    convert.add_argument('origem', nargs='?', default='language_model.pkl')
+    convert.add_argument('destino', nargs='?', default='language_model.bin')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.origem):
+        print(f"Arquivo não encontrado: {args.origem}")
+        return 1
+
+    table = convert_pickle(args.origem, args.destino)
+    print(f"Conversão concluída: {len(table)} contextos, {table.vocab_size} palavras "
+          f"gravados em {args.destino}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Índice de recuperação vetorizado (matriz termo-documento esparsa com BM25).
+
+As postagens ficam em um segmento principal no formato CSC (colunas = termos),
+mais um pequeno segmento de adições recentes ainda não consolidadas. Pontuar
+uma consulta contra todos os documentos equivale a um produto matriz-vetor
+esparso: as colunas dos termos da consulta são concatenadas e somadas por
+documento com np.bincount.
+"""
+from collections import Counter
+from typing import Iterable, Tuple
+
+import numpy as np
+
+
+class _GrowableArray:
+    """Vetor NumPy com capacidade dobrada a cada realocação (append amortizado O(1))"""
+
+    def __init__(self, dtype, capacity=1024):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+
+    def append(self, value):
+        if self.size == len(self.data):
+            self.data = np.concatenate([self.data, np.zeros(len(self.data), dtype=self.data.dtype)])
+        self.data[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            capacity = max(needed, 2 * len(self.data))
+            grown = np.zeros(capacity, dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    def view(self):
+        return self.data[:self.size]
+
+    def drop_prefix(self, count):
+        """Remove os primeiros elementos"""
+        self.data = self.data[count:self.size].copy()
+        self.size = len(self.data)
+
+    def clear(self):
+        self.size = 0
+
+
+class RetrievalIndex:
+    """
+    Índice invertido BM25 com inserção incremental e remoção de documentos.
+
+    Os documentos recebem ids sequenciais na ordem de inserção. A busca retorna
+    apenas os documentos que compartilham ao menos um termo com a consulta,
+    junto com o número de termos em comum e a pontuação BM25.
+    """
+
+    def __init__(self, k1=1.5, b=0.75, min_merge=1024, merge_ratio=0.1):
+        self.k1 = k1
+        self.b = b
+        self.min_merge = min_merge
+        self.merge_ratio = merge_ratio
+
+        self.vocab = {}
+        self.doc_freq = _GrowableArray(np.int32)
+
+        # Dados por documento (indexados por id interno = id - id_offset)
+        self.id_offset = 0
+        self.doc_lengths = _GrowableArray(np.int32)
+        self.unique_counts = _GrowableArray(np.int32)
+        self.alive = _GrowableArray(np.bool_)
+        self.alive_docs = 0
+        self.total_length = 0
+
+        # Segmento principal (CSC) e adições pendentes (COO)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.post_docs = np.zeros(0, dtype=np.int32)
+        self.post_tfs = np.zeros(0, dtype=np.float32)
+        self.pending_terms = _GrowableArray(np.int32)
+        self.pending_docs = _GrowableArray(np.int32)
+        self.pending_tfs = _GrowableArray(np.float32)
+
+    def __len__(self):
+        return self.alive_docs
+
+    def add(self, tokens: Iterable[str]) -> int:
+        """Indexa um documento (lista de termos) e retorna seu id"""
+        tokens = list(tokens)
+        counts = Counter(tokens)
+        internal_id = self.doc_lengths.size
+
+        term_ids = []
+        for term in counts:
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                term_id = len(self.vocab)
+                self.vocab[term] = term_id
+                self.doc_freq.append(0)
+            term_ids.append(term_id)
+
+        if term_ids:
+            term_ids = np.asarray(term_ids, dtype=np.int32)
+            self.doc_freq.data[term_ids] += 1
+            self.pending_terms.extend(term_ids)
+            self.pending_docs.extend(np.full(len(term_ids), internal_id, dtype=np.int32))
+            self.pending_tfs.extend(list(counts.values()))
+
+        self.doc_lengths.append(len(tokens))
+        self.unique_counts.append(len(counts))
+        self.alive.append(True)
+        self.alive_docs += 1
+        self.total_length += len(tokens)
+
+        if self.pending_docs.size > max(self.min_merge, self.merge_ratio * len(self.post_docs)):
+            self._merge()
+        return internal_id + self.id_offset
+
+    def remove(self, doc_id: int, tokens: Iterable[str]):
+        """Remove um documento; suas postagens são descartadas na próxima consolidação"""
+        internal_id = doc_id - self.id_offset
+        if internal_id < 0 or internal_id >= self.alive.size or not self.alive.data[internal_id]:
+            return
+
+        tokens = list(tokens)
+        self.alive.data[internal_id] = False
+        self.alive_docs -= 1
+        self.total_length -= len(tokens)
+        term_ids = [self.vocab[term] for term in set(tokens) if term in self.vocab]
+        if term_ids:
+            self.doc_freq.data[np.asarray(term_ids, dtype=np.int32)] -= 1
+
+    def unique_lengths(self, doc_ids: np.ndarray) -> np.ndarray:
+        """Número de termos distintos de cada documento"""
+        return self.unique_counts.data[doc_ids - self.id_offset]
+
+    def search(self, tokens: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pontua a consulta contra todos os documentos.
+
+        Returns:
+            Tupla (ids dos documentos, termos em comum, pontuação BM25), apenas
+            para documentos vivos com pelo menos um termo em comum
+        """
+        term_ids = np.asarray(sorted({self.vocab[t] for t in tokens if t in self.vocab}), dtype=np.int64)
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64))
+        if not len(term_ids) or not self.alive_docs:
+            return empty
+
+        # Coleta as postagens das colunas da consulta nos dois segmentos
+        docs_parts, tfs_parts, terms_parts = [], [], []
+        main_terms = term_ids[term_ids < len(self.indptr) - 1]
+        if len(main_terms):
+            starts = self.indptr[main_terms]
+            lengths = self.indptr[main_terms + 1] - starts
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            docs_parts.append(self.post_docs[positions])
+            tfs_parts.append(self.post_tfs[positions])
+            terms_parts.append(np.repeat(main_terms, lengths))
+        if self.pending_docs.size:
+            mask = np.isin(self.pending_terms.view(), term_ids)
+            docs_parts.append(self.pending_docs.view()[mask])
+            tfs_parts.append(self.pending_tfs.view()[mask])
+            terms_parts.append(self.pending_terms.view()[mask])
+
+        docs = np.concatenate(docs_parts)
+        tfs = np.concatenate(tfs_parts).astype(np.float64)
+        terms = np.concatenate(terms_parts)
+        live = self.alive.data[docs]
+        docs, tfs, terms = docs[live], tfs[live], terms[live]
+        if not len(docs):
+            return empty
+
+        # Pesos BM25 de cada postagem
+        df = self.doc_freq.data[terms].astype(np.float64)
+        idf = np.log1p((self.alive_docs - df + 0.5) / (df + 0.5))
+        avg_length = self.total_length / self.alive_docs if self.total_length else 1.0
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths.data[docs] / avg_length)
+        weights = idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+        # Soma por documento (produto matriz-vetor esparso)
+        unique_docs, inverse = np.unique(docs, return_inverse=True)
+        common = np.bincount(inverse, minlength=len(unique_docs)).astype(np.int32)
+        scores = np.bincount(inverse, weights=weights, minlength=len(unique_docs))
+        return unique_docs.astype(np.int64) + self.id_offset, common, scores
+
+    def _merge(self):
+        """Consolida as adições pendentes no segmento principal (CSC)"""
+        n_main_terms = len(self.indptr) - 1
+        main_terms = np.repeat(np.arange(n_main_terms, dtype=np.int32), np.diff(self.indptr))
+        terms = np.concatenate([main_terms, self.pending_terms.view()])
+        docs = np.concatenate([self.post_docs, self.pending_docs.view()])
+        tfs = np.concatenate([self.post_tfs, self.pending_tfs.view()])
+
+        # Descarta postagens de documentos removidos
+        live = self.alive.data[docs]
+        terms, docs, tfs = terms[live], docs[live], tfs[live]
+
+        # Documentos removidos no início (ex.: janela deslizante) liberam espaço
+        first_alive = int(np.argmax(self.alive.view())) if self.alive_docs else self.alive.size
+        if first_alive > self.alive.size // 2:
+            for array in (self.doc_lengths, self.unique_counts, self.alive):
+                array.drop_prefix(first_alive)
+            docs = docs - first_alive
+            self.id_offset += first_alive
+
+        # Termos que não aparecem em nenhum documento vivo liberam o vocabulário
+        doc_freq = self.doc_freq.view()
+        unused = doc_freq == 0
+        if unused.sum() > max(self.min_merge, len(self.vocab) // 2):
+            keep = ~unused
+            remap = (np.cumsum(keep) - 1).astype(np.int32)
+            terms = remap[terms]
+            self.vocab = {term: int(remap[term_id]) for term, term_id in self.vocab.items() if keep[term_id]}
+            kept = doc_freq[keep]
+            self.doc_freq.clear()
+            self.doc_freq.extend(kept)
+
+        order = np.lexsort((docs, terms))
+        self.post_docs = docs[order].astype(np.int32)
+        self.post_tfs = tfs[order].astype(np.float32)
+        counts = np.bincount(terms, minlength=len(self.vocab))
+        self.indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        self.pending_terms.clear()
+        self.pending_docs.clear()
+        self.pending_tfs.clear()
@@ -0,0 +1,194 @@
+"""
+Busca em vários serviços ao mesmo tempo; vale a primeira resposta útil.
+
+Antes cada módulo tentava um serviço e só passava para o próximo depois que o
+anterior falhava, então o pior caso era a soma de todos os tempos limite. O
+SearchOrchestrator dispara a consulta em todos os serviços configurados com
+asyncio, devolve os resultados do primeiro que responder com algo útil e
+cancela os demais.
+
+Cada serviço (SearchBackend) tem seu próprio prazo (deadline) e pode ser um
+pedido "de reserva" (hedge): com delay > 0 ele só é disparado se ninguém tiver
+respondido até lá, ou antes disso se algum serviço já iniciado falhar. Serve
+para deixar serviços caros (ex.: navegador) como reserva dos mais leves.
+
+Os serviços podem ser funções comuns (rodam em um pool de threads) ou
+corrotinas. Uma função comum cancelada não é interrompida: termina em segundo
+plano (limitada pelo próprio timeout da requisição) e o resultado é descartado.
+
+Um mesmo orquestrador pode ser usado por várias threads ao mesmo tempo: o
+serviço vencedor é devolvido junto com os resultados (search_with_backend) e
+as estatísticas são atualizadas com uma trava.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Pool próprio: o asyncio.run espera as threads do pool padrão terminarem ao
+# sair, o que faria a busca esperar os serviços cancelados
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='SearchBackend')
+        return _executor
+
+
+class SearchBackend:
+    """Um serviço de busca e seus limites de tempo"""
+
+    def __init__(self, name: str, search: Callable[..., Any],
+                 deadline: float = 10.0, delay: float = 0.0):
+        """
+        Args:
+            name: Nome exibido nos logs e nas estatísticas
+            search: Função (ou corrotina) que recebe a consulta e retorna a lista de resultados
+            deadline: Tempo máximo de espera pela resposta, em segundos
+            delay: Espera antes de disparar (0 = imediatamente); o pedido é
+                antecipado se outro serviço falhar
+        """
+        self.name = name
+        self.search = search
+        self.deadline = deadline
+        self.delay = delay
+
+
+class SearchOrchestrator:
+    """Dispara a consulta em vários serviços e fica com a primeira resposta útil"""
+
+    def __init__(self, backends: Sequence[SearchBackend],
+                 timeout: Optional[float] = None,
+                 is_usable: Optional[Callable[[Any], bool]] = None):
+        """
+        Args:
+            backends: Serviços consultados
+            timeout: Tempo máximo da busca inteira (None = limitado pelos prazos de cada serviço)
+            is_usable: Decide se uma resposta serve (padrão: lista não vazia)
+        """
+        self.backends = list(backends)
+        self.timeout = timeout
+        self.is_usable = is_usable or bool
+        self.stats: Dict[str, Dict[str, int]] = {
+            backend.name: {'wins': 0, 'empty': 0, 'errors': 0, 'timeouts': 0, 'cancelled': 0}
+            for backend in self.backends
+        }
+        self._stats_lock = threading.Lock()
+
+    def search(self, query: str, **kwargs) -> List[Any]:
+        """Versão síncrona de search_async; retorna [] se nenhum serviço responder"""
+        return self.search_with_backend(query, **kwargs)[0]
+
+    def search_with_backend(self, query: str, **kwargs) -> Tuple[List[Any], Optional[str]]:
+        """
+        Versão síncrona de search_async_with_backend.
+
+        Pode ser chamada de dentro de um loop asyncio em execução (onde
+        asyncio.run falharia): nesse caso a busca roda em uma thread do pool.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.search_async_with_backend(query, **kwargs))
+        return _get_executor().submit(
+            asyncio.run, self.search_async_with_backend(query, **kwargs)).result()
+
+    async def search_async(self, query: str, **kwargs) -> List[Any]:
+        """
+        Consulta todos os serviços e retorna os resultados do primeiro que
+        responder com algo útil; os demais são cancelados.
+
+        Os argumentos extras são repassados a cada serviço.
+        """
+        return (await self.search_async_with_backend(query, **kwargs))[0]
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Cópia das estatísticas por serviço"""
+        with self._stats_lock:
+            return {name: dict(counts) for name, counts in self.stats.items()}
+
+    def _count(self, name: str, key: str):
+        with self._stats_lock:
+            self.stats[name][key] += 1
+
+    async def search_async_with_backend(self, query: str, **kwargs) -> Tuple[List[Any], Optional[str]]:
+        """
+        Como search_async, mas retorna (resultados, nome do serviço vencedor);
+        o nome é None se nenhum serviço responder.
+        """
+        if not self.backends:
+            return [], None
+
+        failed = asyncio.Event()
+        tasks = {
+            asyncio.ensure_future(self._run_backend(backend, query, kwargs, failed)): backend
+            for backend in self.backends
+        }
+        started = time.perf_counter()
+        try:
+            pending = set(tasks)
+            while pending:
+                remaining = None
+                if self.timeout is not None:
+                    remaining = self.timeout - (time.perf_counter() - started)
+                    if remaining <= 0:
+                        break
+                done, pending = await asyncio.wait(pending, timeout=remaining,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    print(f"Tempo limite da busca esgotado para: '{query}'")
+                    break
+                for task in done:
+                    results = task.result()
+                    if results is not None:
+                        backend = tasks[task]
+                        self._count(backend.name, 'wins')
+                        print(f"Resultados de {backend.name} em {time.perf_counter() - started:.2f}s")
+                        return results, backend.name
+            return [], None
+        finally:
+            unfinished = [task for task in tasks if not task.done()]
+            for task in unfinished:
+                task.cancel()
+                self._count(tasks[task].name, 'cancelled')
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+
+    async def _run_backend(self, backend: SearchBackend, query: str,
+                           kwargs: Dict[str, Any], failed: asyncio.Event):
+        """Executa um serviço; retorna os resultados ou None se não forem úteis"""
+        if backend.delay > 0:
+            # Pedido de reserva: espera o atraso, ou até outro serviço falhar
+            try:
+                await asyncio.wait_for(failed.wait(), backend.delay)
+            except asyncio.TimeoutError:
+                pass
+
+        try:
+            if asyncio.iscoroutinefunction(backend.search):
+                call = backend.search(query, **kwargs)
+            else:
+                loop = asyncio.get_running_loop()
+                call = loop.run_in_executor(_get_executor(), lambda: backend.search(query, **kwargs))
+            results = await asyncio.wait_for(call, backend.deadline)
+        except asyncio.TimeoutError:
+            print(f"{backend.name} não respondeu em {backend.deadline:.1f}s")
+            self._count(backend.name, 'timeouts')
+            failed.set()
+            return None
+        except Exception as e:
+            print(f"Erro na busca em {backend.name}: {e}")
+            self._count(backend.name, 'errors')
+            failed.set()
+            return None
+
+        if not self.is_usable(results):
+            self._count(backend.name, 'empty')
+            failed.set()
+            return None
+        return results
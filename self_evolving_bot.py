@@ -14,7 +14,29 @@ import time
 import requests
 from urllib.parse import quote_plus
 import html
-import socket
+import hashlib
+import sys
+
+from retrieval_index import RetrievalIndex
+from memory_log import MemorySegmentLog
+from ngram_table import NGramTable, load_pickle
+from connectivity import get_connectivity_monitor
+from http_session import get_http_session
+from web_cache import RESULTS_NAMESPACE, get_web_cache
+
+# Arquivos de persistência da base de conhecimento
+KNOWLEDGE_FILE = 'knowledge.json'
+KNOWLEDGE_JOURNAL_FILE = 'knowledge.journal'
+
+# Persistência das memórias (formato antigo e log de segmentos)
+MEMORIES_FILE = 'memories.pkl'
+MEMORIES_DIR = 'memories'
+
+# Metadados do estado do bot (ex.: versão dos dados de treinamento padrão)
+BOT_STATE_FILE = 'bot_state.json'
+LANGUAGE_MODEL_FILE = 'language_model.bin'
+LEGACY_LANGUAGE_MODEL_FILE = 'language_model.pkl'
+LANGUAGE_MODEL_DELTA_DIR = 'language_model.deltas'
 
 class KnowledgeBase:
     """Base de conhecimento com respostas predefinidas"""
@@ -79,214 +101,975 @@ class KnowledgeBase:
             ]
         }
         
+        # Expressão única com todos os padrões, compilada sob demanda, e os
+        # padrões que não podem entrar nela, testados um a um
+        self._pattern_regex = None
+        self._pattern_keys = []
+        self._separate_patterns = []
+        
         # Carrega conhecimento personalizado se existir
         self.custom_knowledge = {}
+        # Índice BM25 das chaves, usado na busca por similaridade
+        self.retrieval_index = RetrievalIndex()
+        self.index_keys = []
+        
+        # Journal de escrita antecipada: cada adição vira uma linha no final do
+        # arquivo e a compactação no snapshot acontece em segundo plano
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._journal = None
+        self.journal_entries = 0
+        self.compact_min_entries = 500
+        self._compacting = False
         self.load_knowledge()
     
     def load_knowledge(self):
-        """Carrega conhecimento personalizado do disco"""
-        if os.path.exists('knowledge.json'):
+        """Carrega conhecimento personalizado do disco (snapshot + journal)"""
+        if os.path.exists(KNOWLEDGE_FILE):
             try:
-                with open('knowledge.json', 'r', encoding='utf-8') as f:
+                with open(KNOWLEDGE_FILE, 'r', encoding='utf-8') as f:
                     self.custom_knowledge = json.load(f)
                 print(f"Base de conhecimento carregada: {len(self.custom_knowledge)} entradas")
             except Exception as e:
                 print(f"Erro ao carregar base de conhecimento: {e}")
                 self.custom_knowledge = {}
+        self._rebuild_index()
+        
+        # Reaplica as adições que ainda não foram compactadas no snapshot
+        replayed = 0
+        for path in (KNOWLEDGE_JOURNAL_FILE + '.compacting', KNOWLEDGE_JOURNAL_FILE):
+            replayed += self._replay_journal(path)
+        self.journal_entries = replayed
+        if replayed:
+            print(f"Journal da base de conhecimento reaplicado: {replayed} entradas")
+    
+    def _replay_journal(self, path):
+        """Reaplica as entradas de um arquivo de journal"""
+        if not os.path.exists(path):
+            return 0
+        
+        count = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Linha incompleta (queda durante a escrita): ignora
+                        continue
+                    self._apply_knowledge(entry['input'], entry['response'])
+                    count += 1
+        except Exception as e:
+            print(f"Erro ao reaplicar journal da base de conhecimento: {e}")
+        return count
+    
+    def _rebuild_index(self):
+        """Reconstrói o índice de busca a partir do conhecimento carregado"""
+        self.retrieval_index = RetrievalIndex()
+        self.index_keys = []
+        for key in self.custom_knowledge:
+            self._index_key(key)
+    
+    def _index_key(self, key):
+        """Registra uma nova chave no índice (o id do documento é sua posição)"""
+        self.retrieval_index.add(key.split())
+        self.index_keys.append(key)
+    
+    def _find_similar_key(self, normalized_input):
+        """Encontra a chave mais relevante com sobreposição de palavras acima de 50%"""
+        words_input = set(normalized_input.split())
+        if not words_input:
+            return None
+        
+        # Uma única passada pelo índice retorna, para todas as chaves com alguma
+        # palavra em comum, o número de palavras compartilhadas e a pontuação BM25
+        doc_ids, common, bm25 = self.retrieval_index.search(words_input)
+        if not len(doc_ids):
+            return None
+        
+        overlap = common / np.maximum(len(words_input), self.retrieval_index.unique_lengths(doc_ids))
+        eligible = np.flatnonzero(overlap > 0.5)  # 50% de correspondência mínima
+        if not len(eligible):
+            return None
+        
+        # Entre as elegíveis vence a maior pontuação BM25; empates ficam com a mais antiga
+        best = eligible[np.lexsort((doc_ids[eligible], -bm25[eligible]))[0]]
+        return self.index_keys[doc_ids[best]]
+    
+    def add_pattern(self, pattern, responses):
+        """
+        Adiciona (ou substitui) um padrão de intenção em tempo de execução.
+        
+        Raises:
+            re.error: Se o padrão for inválido
+        """
+        # Valida o padrão isoladamente antes de invalidar a expressão combinada
+        re.compile(pattern, re.IGNORECASE)
+        self.patterns[pattern] = list(responses)
+        self._pattern_regex = None
+    
+    @staticmethod
+    def _combinable(pattern):
+        """Indica se o padrão pode entrar na alternância combinada sem mudar de sentido"""
+        # Grupos nomeados colidiriam com os pN, referências a grupos mudariam de
+        # número e flags globais só são aceitas no início da expressão inteira
+        if re.compile(pattern, re.IGNORECASE).groupindex:
+            return False
+        return not re.search(r'\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)', pattern)
+    
+    def remove_pattern(self, pattern):
+        """Remove um padrão de intenção"""
+        if self.patterns.pop(pattern, None) is not None:
+            self._pattern_regex = None
+    
+    def _compile_patterns(self):
+        """Compila os padrões em uma única alternância com grupos nomeados"""
+        self._pattern_keys = list(self.patterns)
+        combined = []
+        self._separate_patterns = []
+        for i, pattern in enumerate(self._pattern_keys):
+            if self._combinable(pattern):
+                combined.append(f'(?P<p{i}>{pattern})')
+            else:
+                self._separate_patterns.append((i, re.compile(pattern, re.IGNORECASE)))
+        # Sem padrões combináveis a expressão não casa com nada
+        alternation = '|'.join(combined) or '(?!)'
+        try:
+            # O lookahead de largura zero testa todos os padrões a partir de cada
+            # posição, então nenhuma ocorrência sobreposta deixa de ser vista
+            self._pattern_regex = re.compile(f'(?=(?:{alternation}))', re.IGNORECASE)
+        except re.error as e:
+            # Um padrão não previsto em _combinable não derruba a busca: todos
+            # passam a ser testados um a um
+            print(f"Erro ao combinar padrões de intenção: {e}")
+            self._pattern_regex = re.compile(r'(?!)')
+            self._separate_patterns = [(i, re.compile(pattern, re.IGNORECASE))
+                                       for i, pattern in enumerate(self._pattern_keys)]
+    
+    def _match_pattern(self, normalized_input):
+        """Retorna o primeiro padrão (na ordem do dicionário) presente no texto"""
+        if self._pattern_regex is None:
+            self._compile_patterns()
+        
+        # Em cada posição a alternância escolhe o padrão de menor índice; o menor
+        # índice entre todas as posições é o mesmo que a varredura padrão a padrão
+        best_index = None
+        for match in self._pattern_regex.finditer(normalized_input):
+            index = int(match.lastgroup[1:])
+            if best_index is None or index < best_index:
+                best_index = index
+                if index == 0:
+                    break
+        
+        for index, regex in self._separate_patterns:
+            if best_index is not None and index > best_index:
+                break
+            if regex.search(normalized_input):
+                best_index = index
+                break
+        
+        return None if best_index is None else self._pattern_keys[best_index]
     
     def save_knowledge(self):
-        """Salva conhecimento personalizado no disco"""
+        """Compacta o journal, gravando um snapshot completo no disco"""
+        with self._compact_lock:
+            with self._lock:
+                # Copia o estado e rotaciona o journal de forma atômica em relação
+                # às adições; a serialização acontece fora da trava
+                snapshot = {key: list(value) if isinstance(value, list) else value
+                            for key, value in self.custom_knowledge.items()}
+                self._rotate_journal()
+                self.journal_entries = 0
+            
+            try:
+                tmp_path = KNOWLEDGE_FILE + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, KNOWLEDGE_FILE)
+                if os.path.exists(KNOWLEDGE_JOURNAL_FILE + '.compacting'):
+                    os.remove(KNOWLEDGE_JOURNAL_FILE + '.compacting')
+                print(f"Base de conhecimento salva: {len(snapshot)} entradas")
+            except Exception as e:
+                print(f"Erro ao salvar base de conhecimento: {e}")
+    
+    def _rotate_journal(self):
+        """Move o journal atual para o arquivo em compactação"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if not os.path.exists(KNOWLEDGE_JOURNAL_FILE):
+            return
+        
+        compacting_path = KNOWLEDGE_JOURNAL_FILE + '.compacting'
+        if os.path.exists(compacting_path):
+            # Sobra de uma compactação interrompida: preserva as entradas
+            with open(KNOWLEDGE_JOURNAL_FILE, 'r', encoding='utf-8') as src, \
+                 open(compacting_path, 'a', encoding='utf-8') as dst:
+                dst.write(src.read())
+            os.remove(KNOWLEDGE_JOURNAL_FILE)
+        else:
+            os.replace(KNOWLEDGE_JOURNAL_FILE, compacting_path)
+    
+    def _append_journal(self, entries):
+        """Acrescenta entradas ao final do journal"""
         try:
-            with open('knowledge.json', 'w', encoding='utf-8') as f:
-                json.dump(self.custom_knowledge, f, ensure_ascii=False, indent=2)
-            print(f"Base de conhecimento salva: {len(self.custom_knowledge)} entradas")
+            if self._journal is None:
+                self._journal = open(KNOWLEDGE_JOURNAL_FILE, 'a', encoding='utf-8')
+            self._journal.write(''.join(
+                json.dumps({'input': key, 'response': response}, ensure_ascii=False) + '\n'
+                for key, response in entries
+            ))
+            self._journal.flush()
+            self.journal_entries += len(entries)
         except Exception as e:
-            print(f"Erro ao salvar base de conhecimento: {e}")
+            print(f"Erro ao gravar journal da base de conhecimento: {e}")
+    
+    def _maybe_compact(self):
+        """Dispara a compactação em segundo plano quando o journal cresce demais"""
+        # O limite acompanha o tamanho da base para manter o custo amortizado constante
+        threshold = max(self.compact_min_entries, len(self.custom_knowledge) // 4)
+        if self._compacting or self.journal_entries < threshold:
+            return
+        
+        self._compacting = True
+        def compact():
+            try:
+                self.save_knowledge()
+            finally:
+                self._compacting = False
+        threading.Thread(target=compact, daemon=True).start()
+    
+    def flush(self):
+        """Garante que o journal foi gravado em disco"""
+        with self._lock:
+            if self._journal is not None:
+                try:
+                    self._journal.flush()
+                    os.fsync(self._journal.fileno())
+                except Exception as e:
+                    print(f"Erro ao sincronizar journal da base de conhecimento: {e}")
     
     def get_response(self, input_text):
         """Retorna uma resposta com base no texto de entrada"""
         # Verifica primeiro no conhecimento personalizado (correspondência exata)
         normalized_input = input_text.lower().strip()
-        if normalized_input in self.custom_knowledge:
-            responses = self.custom_knowledge[normalized_input]
+        responses = self._get_responses(normalized_input)
+        if responses is not None:
             return random.choice(responses) if isinstance(responses, list) else responses
         
         # Verifica padrões predefinidos
-        for pattern, responses in self.patterns.items():
-            if re.search(pattern, normalized_input, re.IGNORECASE):
-                return random.choice(responses)
+        pattern = self._match_pattern(normalized_input)
+        if pattern is not None:
+            return random.choice(self.patterns[pattern])
         
         # Tenta similaridade no conhecimento personalizado
-        best_match = None
-        best_score = 0
-        for key in self.custom_knowledge:
-            # Verifica palavras em comum
-            words_input = set(normalized_input.split())
-            words_key = set(key.split())
-            common_words = words_input.intersection(words_key)
-            
-            # Calcula pontuação simples de similaridade
-            if len(words_input) > 0 and len(words_key) > 0:
-                score = len(common_words) / max(len(words_input), len(words_key))
-                if score > 0.5 and score > best_score:  # 50% de correspondência mínima
-                    best_score = score
-                    best_match = key
+        best_match = self._find_similar_key(normalized_input)
         
         if best_match:
-            responses = self.custom_knowledge[best_match]
+            responses = self._get_responses(best_match)
             return random.choice(responses) if isinstance(responses, list) else responses
         
         return None
     
+    def _get_responses(self, normalized_input):
+        """Retorna as respostas armazenadas para uma chave (ou None)"""
+        return self.custom_knowledge.get(normalized_input)
+    
     def add_knowledge(self, input_text, response):
         """Adiciona nova entrada à base de conhecimento"""
         normalized_input = input_text.lower().strip()
         
+        self._add_chunk([(normalized_input, response)])
+        self._maybe_compact()
+        return True
+    
+    def add_knowledge_bulk(self, pairs, language_model=None, chunk_size=10000, compact=True):
+        """
+        Adiciona vários pares (pergunta, resposta) de uma vez.
+        
+        Os pares são consumidos em blocos de até chunk_size, e cada bloco é
+        gravado no journal com uma única escrita. Pares já conhecidos são
+        ignorados. Se language_model for informado, ele é treinado em lote com
+        as respostas efetivamente adicionadas. Com compact=False a compactação
+        do journal não é disparada (quem chama compacta uma vez no final, com
+        save_knowledge).
+        
+        Returns:
+            Número de pares novos adicionados
+        """
+        added = 0
+        chunk = []
+        for input_text, response in pairs:
+            chunk.append((input_text.lower().strip(), response))
+            if len(chunk) >= chunk_size:
+                added += self._add_chunk(chunk, language_model)
+                chunk = []
+        if chunk:
+            added += self._add_chunk(chunk, language_model)
+        
+        if compact:
+            self._maybe_compact()
+        return added
+    
+    def _add_chunk(self, entries, language_model=None):
+        """Armazena um bloco de entradas normalizadas e treina o modelo com as novas"""
+        new_entries = self._store_entries(entries)
+        if language_model is not None and new_entries:
+            language_model.train_batch(response for _, response in new_entries)
+        return len(new_entries)
+    
+    def _store_entries(self, entries):
+        """Aplica e grava no journal as entradas, retornando as que eram novas"""
+        with self._lock:
+            # Entradas repetidas não alteram nada e não precisam ir para o journal
+            new_entries = [entry for entry in entries if self._apply_knowledge(*entry)]
+            if new_entries:
+                self._append_journal(new_entries)
+        return new_entries
+    
+    def _apply_knowledge(self, normalized_input, response):
+        """Aplica uma entrada ao conhecimento em memória e ao índice"""
         if normalized_input in self.custom_knowledge:
             if isinstance(self.custom_knowledge[normalized_input], list):
-                if response not in self.custom_knowledge[normalized_input]:
-                    self.custom_knowledge[normalized_input].append(response)
+                if response in self.custom_knowledge[normalized_input]:
+                    return False
+                self.custom_knowledge[normalized_input].append(response)
             else:
                 current = self.custom_knowledge[normalized_input]
                 self.custom_knowledge[normalized_input] = [current, response]
         else:
             self.custom_knowledge[normalized_input] = [response]
-        
-        self.save_knowledge()
+            self._index_key(normalized_input)
         return True
 
+class MemoryRecord:
+    """Registro compacto de uma memória (slots, timestamp em segundos desde a época)"""
+    __slots__ = ('input', 'response', 'context', 'timestamp')
+    
+    def __init__(self, input_text, response, context=None, timestamp=None):
+        self.input = input_text
+        self.response = response
+        # Contexto vazio não aloca dicionário; as chaves são internadas para
+        # serem compartilhadas entre todas as memórias
+        self.context = {sys.intern(key): value for key, value in context.items()} if context else None
+        self.timestamp = time.time() if timestamp is None else timestamp
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Converte uma memória no formato antigo (dicionário com timestamp ISO)"""
+        timestamp = data.get('timestamp')
+        if isinstance(timestamp, str):
+            try:
+                timestamp = datetime.fromisoformat(timestamp).timestamp()
+            except ValueError:
+                timestamp = None
+        return cls(data.get('input', ''), data.get('response', ''), data.get('context'), timestamp)
+    
+    def to_dict(self):
+        """Representação em dicionário (formato antigo)"""
+        return {
+            'input': self.input,
+            'response': self.response,
+            'context': dict(self.context) if self.context else {},
+            'timestamp': datetime.fromtimestamp(self.timestamp).isoformat()
+        }
+    
+    def __getitem__(self, key):
+        # Compatibilidade com o acesso no estilo memory['response']
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return self.to_dict()[key] if key in ('context', 'timestamp') else getattr(self, key)
+    
+    def __getstate__(self):
+        return (self.input, self.response, self.context, self.timestamp)
+    
+    def __setstate__(self, state):
+        self.input, self.response, self.context, self.timestamp = state
+    
+    def __repr__(self):
+        return f"MemoryRecord(input={self.input!r}, response={self.response!r})"
+
 class MemoryModule:
-    def __init__(self, max_size=1000):
+    def __init__(self, max_size=1000, storage_dir=MEMORIES_DIR):
         self.memory = deque(maxlen=max_size)
+        # Log em disco: cada memória é gravada uma única vez
+        self.log = MemorySegmentLog(storage_dir, max_records=max_size)
+        self._unsaved = 0
+        # Palavras de cada memória, extraídas uma única vez na inserção
+        self._memory_tokens = deque(maxlen=max_size)
+        # Índice BM25 das entradas; os ids dos documentos acompanham a ordem do deque
+        self.retrieval_index = RetrievalIndex()
+        self._first_doc_id = 0
         
     def add_memory(self, input_text, response, context=None):
-        self.memory.append({
-            'input': input_text,
-            'response': response,
-            'context': context or {},
-            'timestamp': datetime.now().isoformat()
-        })
+        # Remove do índice a memória que o deque vai descartar
+        if len(self.memory) == self.memory.maxlen:
+            self.retrieval_index.remove(self._first_doc_id, self._memory_tokens[0])
+            self._first_doc_id += 1
+        
+        self.memory.append(MemoryRecord(input_text, response, context))
+        self._index_memory(input_text)
+        self._unsaved = min(self._unsaved + 1, len(self.memory))
+    
+    def _index_memory(self, input_text):
+        """Extrai as palavras da memória e as registra no índice"""
+        tokens = tuple(input_text.lower().split())
+        self._memory_tokens.append(tokens)
+        self.retrieval_index.add(tokens)
+    
+    def _rebuild_index(self):
+        """Reconstrói o índice a partir das memórias carregadas"""
+        self._memory_tokens = deque(maxlen=self.memory.maxlen)
+        self.retrieval_index = RetrievalIndex()
+        self._first_doc_id = 0
+        for memory in self.memory:
+            self._index_memory(memory.input)
     
     def get_relevant_memories(self, query, top_k=5):
-        # Busca simples por similaridade de texto
-        relevant_memories = []
+        # Pontua a consulta contra todas as memórias com uma passada pelo índice
         query_words = set(query.lower().split())
+        doc_ids, _, scores = self.retrieval_index.search(query_words)
+        if not len(doc_ids) or top_k <= 0:
+            return []
         
-        for memory in self.memory:
-            memory_words = set(memory['input'].lower().split())
-            # Calcula interseção de palavras
-            common_words = query_words.intersection(memory_words)
-            if common_words:
-                # Pontuação baseada em palavras em comum
-                score = len(common_words) / max(len(query_words), len(memory_words))
-                relevant_memories.append((memory, score))
-        
-        # Ordena por pontuação e retorna os top_k
-        relevant_memories.sort(key=lambda x: x[1], reverse=True)
-        return [memory for memory, _ in relevant_memories[:top_k]]
+        # Seleciona os top_k sem ordenar todos os candidatos: só os que empatam
+        # ou superam a k-ésima pontuação são ordenados (empates ficam com a
+        # memória mais antiga)
+        if len(doc_ids) > top_k:
+            kth_score = -np.partition(-scores, top_k - 1)[top_k - 1]
+            selected = np.flatnonzero(scores >= kth_score)
+        else:
+            selected = np.arange(len(doc_ids))
+        selected = selected[np.lexsort((doc_ids[selected], -scores[selected]))][:top_k]
+        return [self.memory[doc_ids[i] - self._first_doc_id] for i in selected]
     
     def save_memories(self):
-        """Salva memórias no disco"""
-        memories_list = list(self.memory)
+        """Grava no disco apenas as memórias adicionadas desde o último salvamento"""
+        if not self._unsaved:
+            return
         try:
-            with open('memories.pkl', 'wb') as f:
-                pickle.dump(memories_list, f)
-            print(f"Memórias salvas: {len(memories_list)} entradas")
+            new_records = [self.memory[i].__getstate__() for i in range(-self._unsaved, 0)]
+            self.log.append(new_records)
+            self._unsaved = 0
+            print(f"Memórias salvas: {len(new_records)} novas entradas")
         except Exception as e:
             print(f"Erro ao salvar memórias: {e}")
     
     def load_memories(self):
         """Carrega memórias do disco"""
-        if os.path.exists('memories.pkl'):
-            try:
-                with open('memories.pkl', 'rb') as f:
-                    memories_list = pickle.load(f)
-                    self.memory = deque(memories_list, maxlen=self.memory.maxlen)
+        if not self.log.exists() and os.path.exists(MEMORIES_FILE):
+            self._migrate_pickle()
+            return
+        
+        try:
+            # Os segmentos são lidos em fluxo; o deque mantém só as mais recentes
+            records = (MemoryRecord(*state) for state in self.log.load())
+            self.memory = deque(records, maxlen=self.memory.maxlen)
+            self._unsaved = 0
+            self._rebuild_index()
+            if self.memory:
                 print(f"Memórias carregadas: {len(self.memory)} entradas")
-            except Exception as e:
-                print(f"Erro ao carregar memórias: {e}")
+        except Exception as e:
+            print(f"Erro ao carregar memórias: {e}")
+    
+    def _migrate_pickle(self):
+        """Converte o memories.pkl antigo para o log de segmentos"""
+        try:
+            with open(MEMORIES_FILE, 'rb') as f:
+                memories_list = pickle.load(f)
+            # Memórias antigas eram dicionários; converte para o registro compacto
+            memories_list = [
+                MemoryRecord.from_dict(memory) if isinstance(memory, dict) else memory
+                for memory in memories_list
+            ]
+            self.memory = deque(memories_list, maxlen=self.memory.maxlen)
+            self._rebuild_index()
+            self.log.rewrite(memory.__getstate__() for memory in self.memory)
+            self._unsaved = 0
+            os.replace(MEMORIES_FILE, MEMORIES_FILE + '.bak')
+            print(f"Memórias carregadas e migradas para '{self.log.directory}': {len(self.memory)} entradas")
+        except Exception as e:
+            print(f"Erro ao carregar memórias: {e}")
 
 class SimpleLanguageModel:
     """Modelo de linguagem simples para geração de texto"""
     
-    def __init__(self):
-        # Dicionário de n-gramas
-        self.ngrams = {}
+    MAX_ORDER = 5
+    # Fator de desconto do "stupid backoff" a cada ordem descartada
+    BACKOFF_ALPHA = 0.4
+    # Durante uma poda o treino continua até esta fração do orçamento; acima
+    # dela, espera a poda terminar
+    PRUNE_TOLERANCE = 1.25
+    
+    def __init__(self, order=3, memory_budget=None, prune_min_count=2):
+        """
+        Args:
+            order: Ordem máxima dos n-gramas (1 a MAX_ORDER)
+            memory_budget: Limite em bytes para as contagens; ao ser excedido, o
+                modelo é podado em segundo plano (None = sem limite)
+            prune_min_count: Contagem mínima de um par para sobreviver à poda
+        """
+        self.order = max(1, min(order, self.MAX_ORDER))
+        self.memory_budget = memory_budget
+        self.prune_min_count = prune_min_count
+        # Tabela de n-gramas de todas as ordens: contexto (ids) -> contagens das próximas palavras
+        self.ngrams = NGramTable()
+        
+        self._lock = threading.RLock()
+        self._pruning = False
+        self._pruning_done = threading.Event()
+        self._pruning_done.set()
+        # Textos treinados durante uma poda, reaplicados na tabela podada
+        self._pruning_replay = None
+        self.pruning_stats = {'runs': 0, 'entries_pruned': 0, 'contexts_evicted': 0,
+                              'words_removed': 0, 'bytes_reclaimed': 0}
+        
+        # Contagens ainda não gravadas: salvar grava só elas, em um arquivo delta,
+        # e a compactação na imagem base acontece em segundo plano. Também
+        # ocupam memória, então viram um delta ao passar de pending_max_bytes
+        self._pending = NGramTable()
+        self.pending_max_bytes = min(1024 * 1024, memory_budget // 8) if memory_budget else 1024 * 1024
+        self.delta_files = []  # (caminho, bytes) dos deltas ainda não compactados
+        self._delta_seq = 0
+        self._compact_lock = threading.Lock()
+        self._compacting = False
+        self.compact_max_deltas = 50
+        self.compact_min_bytes = 1024 * 1024
+        # Após uma compactação com erro, a próxima tentativa automática espera
+        # um intervalo que dobra a cada falha seguida
+        self._compact_failures = 0
+        self._compact_retry_at = 0.0
+        # Acima destes limites a espera é ignorada: deltas demais deixam a
+        # carga lenta e ocupam disco sem limite
+        self.compact_hard_max_deltas = 200
+        self.compact_hard_min_bytes = 16 * 1024 * 1024
+        # Depois de uma poda a imagem base precisa ser regravada: os deltas
+        # ainda têm as contagens removidas
+        self._compact_requested = False
         self.load_model()
     
-    def train(self, text, n=2):
-        """Treina o modelo com texto e n-gramas de tamanho n"""
+    def train(self, text, n=None):
+        """Treina o modelo com texto e n-gramas de tamanho 1 até n (padrão: self.order)"""
+        # Chave é a tupla de ids das até n-1 palavras anteriores; valor é a
+        # contagem da próxima palavra
         words = text.split()
-        if len(words) < n:
+        order = min(n or self.order, self.MAX_ORDER)
+        with self._lock:
+            self.ngrams.train(words, order)
+            self._pending.train(words, order)
+            if self._pruning_replay is not None:
+                self._pruning_replay.append((words, order))
+            flush = self._pending.memory_usage() > self.pending_max_bytes
+        if flush:
+            self._flush_pending()
+        self._maybe_prune()
+    
+    def memory_usage(self):
+        """Estimativa dos bytes ocupados pelo modelo (contagens e contagens ainda não gravadas)"""
+        with self._lock:
+            return self.ngrams.memory_usage() + self._pending.memory_usage()
+    
+    def _flush_pending(self):
+        """Grava as contagens pendentes em um delta para liberar a memória delas"""
+        try:
+            with self._lock:
+                self._write_delta()
+        except Exception as e:
+            print(f"Erro ao salvar modelo: {e}")
+        self._maybe_compact()
+    
+    def _maybe_prune(self):
+        """
+        Dispara a poda em segundo plano quando o modelo (arrays congelados, área
+        de preparação e contagens ainda não gravadas) passa do orçamento.
+        
+        Se o treino for mais rápido que a poda, ele espera a poda em andamento
+        ao passar de PRUNE_TOLERANCE vezes o orçamento; a geração não espera.
+        """
+        if not self.memory_budget:
+            return
+        usage = self.memory_usage()
+        if self._pruning:
+            if usage > self.memory_budget * self.PRUNE_TOLERANCE:
+                self._pruning_done.wait()
+            return
+        if usage <= self.memory_budget:
             return
         
-        # Gera n-gramas
-        for i in range(len(words) - n + 1):
-            # Chave é uma tupla com as n-1 primeiras palavras
-            key = tuple(words[i:i+n-1])
-            # Valor é a próxima palavra
-            value = words[i+n-1]
-            
-            if key not in self.ngrams:
-                self.ngrams[key] = []
-            self.ngrams[key].append(value)
+        self._pruning = True
+        self._pruning_done.clear()
+        with self._lock:
+            snapshot = self.ngrams.copy()
+            self._pruning_replay = []
+        
+        def prune():
+            nonlocal snapshot
+            # Poda até 80% do orçamento para não disparar de novo logo em seguida,
+            # deixando espaço para as contagens ainda não gravadas
+            target = int(self.memory_budget * 0.8) - self.pending_max_bytes
+            try:
+                while snapshot is not None:
+                    # A cópia é consolidada antes da poda, então as contagens
+                    # em preparação também podem ser removidas
+                    pruned, stats = snapshot.pruned(self.prune_min_count, target)
+                    reachable = pruned.memory_usage() <= target
+                    with self._lock:
+                        replayed = len(self._pruning_replay)
+                        for words, order in self._pruning_replay:
+                            pruned.train(words, order)
+                        self.ngrams = pruned
+                        self._compact_requested = True
+                        # O que foi treinado durante a poda pode ter passado do
+                        # orçamento de novo: poda outra vez antes de liberar o treino
+                        snapshot = None
+                        if replayed and reachable and self.memory_usage() > self.memory_budget:
+                            snapshot = pruned.copy()
+                            self._pruning_replay = []
+                    self.pruning_stats['runs'] += 1
+                    for key, value in stats.items():
+                        self.pruning_stats[key] += value
+                    print(f"Modelo podado: {stats['entries_pruned']} pares, "
+                          f"{stats['contexts_evicted']} contextos e "
+                          f"{stats['words_removed']} palavras removidos, "
+                          f"{stats['bytes_reclaimed'] / 1024 / 1024:.1f} MB liberados")
+                    if not reachable:
+                        print(f"Orçamento de memória do modelo pequeno demais: "
+                              f"{pruned.memory_usage() / 1024 / 1024:.1f} MB após a poda")
+            except Exception as e:
+                print(f"Erro ao podar modelo: {e}")
+            finally:
+                with self._lock:
+                    self._pruning_replay = None
+                self._pruning = False
+                self._pruning_done.set()
+            # Grava a imagem podada para que as contagens removidas não voltem
+            # dos deltas no próximo carregamento
+            self._maybe_compact()
+        threading.Thread(target=prune, daemon=True).start()
+    
+    def get_stats(self):
+        """Uso de memória estimado e estatísticas acumuladas da poda"""
+        stats = dict(self.pruning_stats)
+        stats['memory_usage'] = self.memory_usage()
+        stats['memory_budget'] = self.memory_budget
+        stats['contexts'] = len(self.ngrams)
+        return stats
+    
+    def train_batch(self, texts, n=None):
+        """Treina o modelo com vários textos de uma vez"""
+        for text in texts:
+            self.train(text, n)
+    
+    def _next_word(self, history):
+        """
+        Sorteia a próxima palavra pelo maior contexto conhecido (backoff).
+        
+        Cada ordem custa uma consulta de hash, então o custo por palavra é
+        O(ordem). Os unigramas só são usados quando o modelo tem ordem 1, para
+        que a geração pare ao chegar a uma palavra sem sucessores.
+        """
+        min_context = 1 if self.order > 1 else 0
+        for size in range(min(self.order - 1, len(history)), min_context - 1, -1):
+            context = tuple(history[len(history) - size:])
+            if None in context:
+                # Palavra desconhecida no contexto: tenta os contextos menores
+                continue
+            next_id = self.ngrams.sample(context)
+            if next_id is not None:
+                return next_id
+        return None
+    
+    def generate_stream(self, seed_text, max_length=50):
+        """
+        Gera texto a partir de um texto semente, produzindo uma palavra por vez.
+        
+        Só as palavras novas são produzidas (a semente não é repetida).
+        """
+        words = seed_text.split()
+        if len(words) == 0:
+            return
+        
+        # Usa as últimas order-1 palavras como semente (desconhecidas viram None)
+        table = self.ngrams
+        history = [table.lookup([word]) for word in words[-max(self.order - 1, 1):]]
+        history = [ids[0] if ids else None for ids in history]
+        
+        # Gera novas palavras até o limite
+        for _ in range(max_length):
+            # A trava só é disputada com o treino; a poda trabalha em uma cópia
+            with self._lock:
+                if self.ngrams is not table:
+                    # A poda trocou a tabela (e os ids do vocabulário)
+                    translated = self._translate(np.array([-1 if word_id is None else word_id
+                                                           for word_id in history]), table, self.ngrams)
+                    history = [word_id if word_id >= 0 else None for word_id in translated.tolist()]
+                    table = self.ngrams
+                next_id = self._next_word(history)
+                if next_id is None:
+                    break
+                word = table.word(next_id)
+            yield word
+            history = history[1:] + [next_id] if len(history) >= self.order - 1 else history + [next_id]
     
     def generate(self, seed_text, max_length=50):
         """Gera texto a partir de um texto semente"""
         words = seed_text.split()
         if len(words) == 0:
             return ""
+        return ' '.join(words + list(self.generate_stream(seed_text, max_length)))
+    
+    def generate_batch(self, seed_text, k=16, max_length=50):
+        """
+        Gera k textos candidatos a partir da mesma semente, todos de uma vez.
         
-        # Usa os últimos n-1 tokens como semente (assumindo n=2)
-        n = 2  # Para simplificar, usamos bigrams (n=2)
-        current = tuple(words[-min(n-1, len(words)):])  # Últimas n-1 palavras ou menos
+        Cada passo sorteia a próxima palavra dos k candidatos com uma única
+        consulta vetorizada que já inclui o backoff (NGramTable.sample_batch),
+        então o custo por passo é quase o de uma única geração.
         
-        result = list(words)
+        Returns:
+            Lista com os candidatos que geraram ao menos uma palavra
+        """
+        words = seed_text.split()
+        if len(words) == 0:
+            return []
         
-        # Gera novas palavras até o limite
-        for _ in range(max_length):
-            if current in self.ngrams:
-                # Escolhe próxima palavra aleatoriamente
-                next_word = random.choice(self.ngrams[current])
-                result.append(next_word)
-                
-                # Atualiza a chave atual
-                if len(current) >= n-1:
-                    current = current[1:] + (next_word,)
-                else:
-                    current = current + (next_word,)
-            else:
-                # Se não encontrar n-grama, tenta com menos palavras
-                if len(current) > 1:
-                    current = current[1:]
-                else:
+        # Semente comum a todos os candidatos (-1 marca palavra desconhecida)
+        # seguida das palavras geradas por cada um
+        table = self.ngrams
+        seed_ids = [table.lookup([word]) for word in words[-max(self.order - 1, 1):]]
+        seed_ids = [ids[0] if ids else -1 for ids in seed_ids]
+        seed_length = len(seed_ids)
+        tokens = np.full((k, seed_length + max_length), -1, dtype=np.int32)
+        tokens[:, :seed_length] = seed_ids
+        generated = [[] for _ in range(k)]
+        alive = np.arange(k)
+        min_context = 1 if self.order > 1 else 0
+        # Os contextos só podem usar as posições depois da última palavra
+        # desconhecida (as geradas nunca são -1), como em _next_word
+        known_from = max((i + 1 for i, word_id in enumerate(seed_ids) if word_id < 0), default=0)
+        
+        for position in range(seed_length, seed_length + max_length):
+            with self._lock:
+                if self.ngrams is not table:
+                    # A poda trocou a tabela (e os ids do vocabulário); as
+                    # palavras removidas por ela passam a ser desconhecidas
+                    tokens[:, :position] = self._translate(tokens[:, :position], table, self.ngrams)
+                    table = self.ngrams
+                    missing = np.flatnonzero((tokens[alive, :position] < 0).any(axis=0))
+                    if len(missing):
+                        known_from = max(known_from, int(missing[-1]) + 1)
+                size = min(self.order - 1, position - known_from)
+                if size < min_context:
                     break
+                next_ids = table.sample_batch(tokens[alive, position - size:position], min_context)
+                found = next_ids >= 0
+                alive = alive[found]
+                for row, word_id in zip(alive.tolist(), next_ids[found].tolist()):
+                    generated[row].append(table.word(word_id))
+            
+            if not len(alive):
+                break
+            tokens[alive, position] = next_ids[found]
         
-        return ' '.join(result)
+        return [' '.join(words + candidate) for candidate in generated if candidate]
+    
+    @staticmethod
+    def _translate(ids, source, target):
+        """Converte ids de source nos ids das mesmas palavras em target (-1 se não existirem)"""
+        translated = np.full(ids.shape, -1, dtype=np.int32)
+        for word_id in np.unique(ids[ids >= 0]).tolist():
+            new_ids = target.lookup([source.word(word_id)])
+            if new_ids:
+                translated[ids == word_id] = new_ids[0]
+        return translated
+    
+    def score(self, text):
+        """
+        Pontuação média (log) do texto segundo o "stupid backoff".
+        
+        Returns:
+            Média de log S(palavra | contexto) por palavra; -inf para texto vazio
+            ou com palavras nunca vistas
+        """
+        # A poda pode trocar a tabela (e os ids) a qualquer momento
+        table = self.ngrams
+        ids = table.lookup(text.split())
+        if not ids:
+            return float('-inf')
+        total = 0.0
+        for i, word_id in enumerate(ids):
+            context = tuple(ids[max(0, i - self.order + 1):i])
+            probability = table.backoff_score(context, word_id, self.BACKOFF_ALPHA)
+            if probability <= 0:
+                return float('-inf')
+            total += np.log(probability)
+        return total / len(ids)
     
     def save_model(self):
-        """Salva modelo no disco"""
+        """
+        Salva as contagens novas em um arquivo delta.
+        
+        O custo depende só do que foi treinado desde o último salvamento; a
+        imagem base completa é regravada em segundo plano quando os deltas se
+        acumulam (ver compact_model).
+        """
+        if not os.path.exists(LANGUAGE_MODEL_FILE):
+            self.compact_model()
+            return
         try:
-            with open('language_model.pkl', 'wb') as f:
-                pickle.dump(self.ngrams, f)
-            print(f"Modelo salvo: {len(self.ngrams)} n-gramas")
+            with self._lock:
+                self._write_delta()
         except Exception as e:
             print(f"Erro ao salvar modelo: {e}")
+        self._maybe_compact()
+    
+    def _write_delta(self):
+        """Grava as contagens pendentes no próximo arquivo delta (chamado com a trava)"""
+        if not self._pending.modified:
+            return
+        os.makedirs(LANGUAGE_MODEL_DELTA_DIR, exist_ok=True)
+        seq = self._delta_seq + 1
+        path = os.path.join(LANGUAGE_MODEL_DELTA_DIR, f"delta_{seq:09d}.bin")
+        self._pending.save(path)
+        self._delta_seq = seq
+        self.delta_files.append((path, os.path.getsize(path)))
+        self._pending = NGramTable()
+    
+    def compact_model(self):
+        """Grava a imagem base com todas as contagens e apaga os deltas incluídos nela"""
+        with self._compact_lock:
+            with self._lock:
+                try:
+                    self._write_delta()
+                except Exception as e:
+                    print(f"Erro ao salvar modelo: {e}")
+                    return
+                # A imagem base vai ser substituída: o modelo deixa de ler do
+                # arquivo mapeado (no Windows ele não poderia ser trocado)
+                self.ngrams.detach()
+                # Os arrays da cópia são compartilhados; a consolidação e a
+                # gravação acontecem fora da trava
+                snapshot = self.ngrams.copy()
+                snapshot.checkpoint = self._delta_seq
+                covered, self.delta_files = self.delta_files, []
+                requested, self._compact_requested = self._compact_requested, False
+            
+            try:
+                snapshot.save(LANGUAGE_MODEL_FILE)
+                print(f"Modelo salvo: {len(snapshot)} n-gramas")
+            except Exception as e:
+                self._compact_failures += 1
+                delay = min(60 * 2 ** (self._compact_failures - 1), 3600)
+                self._compact_retry_at = time.time() + delay
+                print(f"Erro ao salvar modelo: {e} (nova compactação em {delay} s)")
+                with self._lock:
+                    self.delta_files = covered + self.delta_files
+                    self._compact_requested = self._compact_requested or requested
+                return
+            self._compact_failures = 0
+            self._compact_retry_at = 0.0
+            
+            # O cabeçalho da imagem registra o último delta incluído, então uma
+            # queda antes desta limpeza não faz os deltas serem somados de novo
+            for path, _ in covered:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"Erro ao remover delta do modelo: {e}")
+    
+    def _maybe_compact(self):
+        """Dispara a compactação em segundo plano quando os deltas se acumulam"""
+        # A verificação e a marcação são feitas juntas: o treino e a poda
+        # chamam este método de threads diferentes
+        with self._lock:
+            if self._compacting:
+                return
+            # O limite acompanha o tamanho da imagem para manter o custo amortizado constante
+            base_size = os.path.getsize(LANGUAGE_MODEL_FILE) if os.path.exists(LANGUAGE_MODEL_FILE) else 0
+            delta_bytes = sum(size for _, size in self.delta_files)
+            over_hard_limit = (len(self.delta_files) >= self.compact_hard_max_deltas
+                               or delta_bytes >= max(self.compact_hard_min_bytes, base_size))
+            if time.time() < self._compact_retry_at and not over_hard_limit:
+                return
+            if (not self._compact_requested and not over_hard_limit
+                    and len(self.delta_files) < self.compact_max_deltas
+                    and delta_bytes < max(self.compact_min_bytes, base_size // 4)):
+                return
+            
+            self._compacting = True
+        
+        def compact():
+            try:
+                self.compact_model()
+            finally:
+                self._compacting = False
+            # Uma poda terminada durante a gravação pede outra (a imagem gravada
+            # ainda tem as contagens removidas)
+            if self._compact_requested and not self._compact_failures:
+                self._maybe_compact()
+        threading.Thread(target=compact, daemon=True).start()
     
     def load_model(self):
-        """Carrega modelo do disco"""
-        if os.path.exists('language_model.pkl'):
+        """Carrega modelo do disco (imagem base + deltas)"""
+        if os.path.exists(LANGUAGE_MODEL_FILE):
             try:
-                with open('language_model.pkl', 'rb') as f:
-                    self.ngrams = pickle.load(f)
+                # Os arrays são mapeados, não lidos: as páginas são carregadas sob demanda
+                self.ngrams = NGramTable.open(LANGUAGE_MODEL_FILE)
                 print(f"Modelo carregado: {len(self.ngrams)} n-gramas")
             except Exception as e:
                 print(f"Erro ao carregar modelo: {e}")
                 # Inicializa com dados de exemplo
                 self._initialize_default_model()
+        elif os.path.exists(LEGACY_LANGUAGE_MODEL_FILE):
+            self._migrate_pickle()
         else:
             # Inicializa com dados de exemplo
             self._initialize_default_model()
+        self._load_deltas()
+    
+    def _load_deltas(self):
+        """Soma à imagem base os arquivos delta ainda não incluídos nela"""
+        self.delta_files = []
+        self._delta_seq = self.ngrams.checkpoint
+        if not os.path.isdir(LANGUAGE_MODEL_DELTA_DIR):
+            return
+        
+        applied = 0
+        for name in sorted(os.listdir(LANGUAGE_MODEL_DELTA_DIR)):
+            match = re.fullmatch(r'delta_(\d+)\.bin', name)
+            if not match:
+                continue
+            seq = int(match.group(1))
+            path = os.path.join(LANGUAGE_MODEL_DELTA_DIR, name)
+            if seq <= self.ngrams.checkpoint:
+                # Já incluído na imagem (compactação interrompida antes da limpeza)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            self._delta_seq = max(self._delta_seq, seq)
+            try:
+                self.ngrams.apply_delta(NGramTable.open(path))
+            except Exception as e:
+                print(f"Erro ao aplicar delta do modelo {name}: {e}")
+                continue
+            self.delta_files.append((path, os.path.getsize(path)))
+            applied += 1
+        if applied:
+            print(f"Deltas do modelo aplicados: {applied} arquivos")
+    
+    def _migrate_pickle(self):
+        """Converte o language_model.pkl antigo para o formato binário"""
+        try:
+            self.ngrams = load_pickle(LEGACY_LANGUAGE_MODEL_FILE)
+            self.ngrams.save(LANGUAGE_MODEL_FILE)
+            os.replace(LEGACY_LANGUAGE_MODEL_FILE, LEGACY_LANGUAGE_MODEL_FILE + '.bak')
+            print(f"Modelo convertido para {LANGUAGE_MODEL_FILE}: {len(self.ngrams)} n-gramas")
+        except Exception as e:
+            print(f"Erro ao converter modelo: {e}")
+            self.ngrams = NGramTable()
+            self._initialize_default_model()
     
     def _initialize_default_model(self):
         """Treina o modelo com frases padrão"""
@@ -317,67 +1100,53 @@ class WebSearchModule:
     """Módulo para realizar pesquisas na web e extrair informações"""
     
     def __init__(self, cache_size=100):
-        self.online = self._check_connection()
-        self.cache = {}
-        self.cache_size = cache_size
-        self.cache_keys = deque(maxlen=cache_size)
-        self.load_cache()
-    
-    def _check_connection(self):
-        """Verifica se há conexão com a internet"""
-        try:
-            # Tenta conectar ao Google para testar a conexão
-            socket.create_connection(("www.google.com", 80), timeout=2)
-            return True
-        except (OSError, socket.timeout):
-            print("Aviso: Sem conexão com a internet. Modo offline ativado.")
-            return False
+        # Estado da conexão mantido em segundo plano, lido sem acessar a rede
+        self.connectivity = get_connectivity_monitor()
+        # Conexões reaproveitadas entre buscas (keep-alive, novas tentativas)
+        self.http = get_http_session()
+        # Cache compartilhado com ImprovedWebSearch e WebEnabledBot
+        self.web_cache = get_web_cache()
+        self.web_cache.ensure_capacity(cache_size)
     
-    def load_cache(self):
-        """Carrega o cache de pesquisas do disco"""
-        if os.path.exists('web_cache.json'):
-            try:
-                with open('web_cache.json', 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                    self.cache = cache_data.get('cache', {})
-                    self.cache_keys = deque(cache_data.get('keys', []), maxlen=self.cache_size)
-                print(f"Cache de pesquisas carregado: {len(self.cache)} entradas")
-            except Exception as e:
-                print(f"Erro ao carregar cache de pesquisas: {e}")
+    @property
+    def online(self):
+        """Indica se há conexão com a internet (último estado do monitor)"""
+        return self.connectivity.online
     
     def save_cache(self):
-        """Salva o cache de pesquisas no disco"""
-        try:
-            cache_data = {
-                'cache': self.cache,
-                'keys': list(self.cache_keys)
-            }
-            with open('web_cache.json', 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-            print(f"Cache de pesquisas salvo: {len(self.cache)} entradas")
-        except Exception as e:
-            print(f"Erro ao salvar cache de pesquisas: {e}")
+        """Grava as alterações pendentes do cache de pesquisas no disco"""
+        self.web_cache.flush()
     
     def search(self, query, max_results=3):
         """Realiza uma pesquisa na web e retorna os resultados"""
         # Normaliza a consulta
         normalized_query = query.lower().strip()
         
-        # Verifica se a consulta está no cache
-        if normalized_query in self.cache:
+        # Verifica se a consulta está no cache; um resultado vencido ainda é
+        # usado enquanto uma nova busca o renova em segundo plano
+        cached = self.web_cache.get(RESULTS_NAMESPACE, normalized_query,
+                                    revalidate=lambda: self._fetch_results(query, max_results))
+        if cached is not None:
             print(f"Usando resultados em cache para: {normalized_query}")
-            return self.cache[normalized_query]
+            return cached[:max_results]
         
-        # Se estiver offline, retorna vazio
-        if not self.online:
+        search_results = self._fetch_results(query, max_results)
+        if search_results is None:
             return []
         
+        # Adiciona ao cache (as entradas usadas há mais tempo saem quando ele enche);
+        # o arquivo é gravado depois, em segundo plano
+        self.web_cache.put(RESULTS_NAMESPACE, normalized_query, search_results)
+        
+        return search_results
+    
+    def _fetch_results(self, query, max_results=3):
+        """Busca os resultados na web; retorna None se estiver offline, se a busca falhar ou não tiver resultados"""
+        # Se estiver offline, não há o que buscar
+        if not self.online:
+            return None
+        
         try:
-            # Verifica novamente a conexão antes de fazer a requisição
-            self.online = self._check_connection()
-            if not self.online:
-                return []
-            
             # Codifica a consulta para URL
             encoded_query = quote_plus(query)
             
@@ -391,11 +1160,8 @@ class WebSearchModule:
             
             # Simulando uma pesquisa básica usando DuckDuckGo (sem API key)
             ddg_url = f"https://html.duckduckgo.com/html/?q={encoded_query}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
             
-            response = requests.get(ddg_url, headers=headers, timeout=5)
+            response = self.http.get(ddg_url, timeout=5)
             
             # Extrai resultados básicos do HTML (simplificado)
             search_results = []
@@ -421,25 +1187,18 @@ class WebSearchModule:
                         'snippet': clean_snippet,
                         'url': url
                     })
+            else:
+                print(f"Falha na pesquisa web (status code {response.status_code})")
             
-            # Adiciona ao cache
-            self.cache[normalized_query] = search_results
-            self.cache_keys.append(normalized_query)
-            
-            # Se o cache atingiu o tamanho máximo, remove o item mais antigo
-            if len(self.cache) > self.cache_size:
-                oldest_key = self.cache_keys[0]
-                if oldest_key in self.cache:
-                    del self.cache[oldest_key]
-            
-            # Salva o cache atualizado
-            self.save_cache()
-            
-            return search_results
+            return search_results or None
             
+        except requests.ConnectionError as e:
+            print(f"Erro de conexão ao realizar pesquisa web: {e}")
+            self.connectivity.report_failure()
+            return None
         except Exception as e:
             print(f"Erro ao realizar pesquisa web: {e}")
-            return []
+            return None
     
     def get_info_from_web(self, query):
         """Obtém informações da web e as formata para uso pelo bot"""
@@ -532,13 +1291,30 @@ class AutoLearningModule:
         return min(1.0, final_score)
 
 class SelfEvolvingBot:
-    def __init__(self):
+    def __init__(self, knowledge_backend=None):
+        """
+        Args:
+            knowledge_backend: 'json' (padrão) ou 'sqlite'; se omitido, usa a
+                variável de ambiente BOT_KNOWLEDGE_BACKEND
+        
+        A variável de ambiente BOT_MODEL_MEMORY_MB define o orçamento de memória
+        do modelo de linguagem (sem limite por padrão) e BOT_GENERATION_CANDIDATES
+        o número de candidatos gerados e reordenados por resposta (padrão: 1, a
+        resposta é produzida palavra por palavra; com mais, ela só aparece
+        depois de escolhido o melhor candidato).
+        """
         print("Inicializando Self-Evolving Bot...")
-        self.knowledge_base = KnowledgeBase()
+        self.knowledge_base = self._create_knowledge_base(
+            knowledge_backend or os.environ.get('BOT_KNOWLEDGE_BACKEND', 'json')
+        )
         self.memory_module = MemoryModule()
-        self.language_model = SimpleLanguageModel()
+        memory_mb = os.environ.get('BOT_MODEL_MEMORY_MB')
+        self.language_model = SimpleLanguageModel(
+            memory_budget=int(float(memory_mb) * 1024 * 1024) if memory_mb else None
+        )
         self.web_search = WebSearchModule()
         self.auto_learning = AutoLearningModule(self.knowledge_base, self.language_model)
+        self.generation_candidates = max(1, int(os.environ.get('BOT_GENERATION_CANDIDATES', 1)))
         
         self.response_fallbacks = [
             "Desculpe, ainda estou aprendendo sobre esse assunto. Pode me ensinar?",
@@ -565,6 +1341,16 @@ class SelfEvolvingBot:
             "significado de", "definição de"
         ]
     
+    def _create_knowledge_base(self, backend):
+        """Cria a base de conhecimento com o armazenamento escolhido"""
+        if backend == 'sqlite':
+            try:
+                from knowledge_store import SQLiteKnowledgeBase
+                return SQLiteKnowledgeBase()
+            except Exception as e:
+                print(f"Erro ao abrir base de conhecimento SQLite: {e}. Usando JSON.")
+        return KnowledgeBase()
+    
     def _load_default_training_data(self):
         """Carrega dados de treinamento padrão"""
         examples = [
@@ -581,11 +1367,65 @@ class SelfEvolvingBot:
             ("Você aprende sozinho?", "Sim! Além do modo de treinamento, agora também tenho um sistema de aprendizado automático que me permite aprender durante conversas normais.")
         ]
         
-        # Adiciona exemplos à base de conhecimento
-        for question, answer in examples:
-            self.knowledge_base.add_knowledge(question, answer)
-            # Treina o modelo de linguagem
-            self.language_model.train(answer)
+        # A versão é derivada do próprio conteúdo: qualquer alteração nos
+        # exemplos dispara um novo carregamento, caso contrário nada é refeito
+        seed_version = hashlib.sha1(
+            json.dumps(examples, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        state = self._load_bot_state()
+        model_seeded = state.get('seed_version') == seed_version
+        # O marcador não basta para a base: ela pode ter sido trocada (outro
+        # backend) ou apagada desde que os exemplos foram carregados
+        if model_seeded and self._has_knowledge(examples):
+            return
+        
+        # Adiciona à base os exemplos que faltam; o modelo de linguagem só é
+        # treinado se esta versão dos exemplos ainda não foi usada nele
+        self.knowledge_base.add_knowledge_bulk(
+            examples, language_model=None if model_seeded else self.language_model
+        )
+        if model_seeded:
+            print("Dados de treinamento padrão restaurados na base de conhecimento")
+            return
+        self.language_model.save_model()
+        
+        state['seed_version'] = seed_version
+        self._save_bot_state(state)
+        print(f"Dados de treinamento padrão carregados (versão {seed_version[:8]})")
+    
+    def _has_knowledge(self, pairs):
+        """Indica se a base de conhecimento já contém todos os pares (pergunta, resposta)"""
+        for input_text, response in pairs:
+            responses = self.knowledge_base._get_responses(input_text.lower().strip())
+            if responses is None:
+                return False
+            if not isinstance(responses, list):
+                responses = [responses]
+            if response not in responses:
+                return False
+        return True
+    
+    def _load_bot_state(self):
+        """Carrega os metadados do estado do bot"""
+        if os.path.exists(BOT_STATE_FILE):
+            try:
+                with open(BOT_STATE_FILE, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if isinstance(state, dict):
+                    return state
+            except Exception as e:
+                print(f"Erro ao carregar estado do bot: {e}")
+        return {}
+    
+    def _save_bot_state(self, state):
+        """Salva os metadados do estado do bot"""
+        try:
+            tmp_path = BOT_STATE_FILE + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, BOT_STATE_FILE)
+        except Exception as e:
+            print(f"Erro ao salvar estado do bot: {e}")
     
     def _should_search_web(self, input_text):
         """Determina se deve realizar uma busca na web com base no texto de entrada"""
@@ -615,6 +1455,23 @@ class SelfEvolvingBot:
         return self.auto_learning.toggle_auto_learning()
     
     def generate_response(self, input_text):
+        stream = self.generate_response_stream(input_text)
+        while True:
+            try:
+                next(stream)
+            except StopIteration as stop:
+                return stop.value
+    
+    def generate_response_stream(self, input_text):
+        """
+        Versão em fluxo de generate_response.
+        
+        Produz trechos de texto assim que ficam prontos (a concatenação deles é
+        a resposta) e retorna a resposta completa. Respostas da base, da web e
+        das memórias e os candidatos reordenados saem em um único trecho; com
+        generation_candidates = 1, o modelo de linguagem produz a resposta
+        palavra por palavra, reduzindo o tempo até a primeira palavra.
+        """
         # 1. Tenta obter resposta da base de conhecimento
         response = self.knowledge_base.get_response(input_text)
         
@@ -630,6 +1487,7 @@ class SelfEvolvingBot:
                 )
                 # Treina o modelo com essa resposta
                 self.language_model.train(web_response)
+                yield web_response
                 return web_response
         
         # 3. Se ainda não encontrou, busca memórias relevantes
@@ -638,20 +1496,36 @@ class SelfEvolvingBot:
             if relevant_memories:
                 most_relevant = relevant_memories[0]
                 # Treina o modelo com essa memória
-                self.language_model.train(most_relevant['response'])
+                self.language_model.train(most_relevant.response)
                 # Usa a resposta armazenada
-                response = most_relevant['response']
+                response = most_relevant.response
         
-        # 4. Se ainda não encontrou, gera resposta com o modelo de linguagem
-        if not response:
-            language_response = self.language_model.generate(input_text)
-            if language_response and len(language_response.split()) > len(input_text.split()):
-                response = language_response
+        # 4. Se ainda não encontrou, gera candidatos com o modelo de linguagem e
+        # fica com o melhor segundo a mesma avaliação do aprendizado automático
+        streamed = False
+        if not response and self.generation_candidates > 1:
+            candidates = self.language_model.generate_batch(input_text, self.generation_candidates)
+            if candidates:
+                response = max(candidates,
+                               key=lambda text: self.auto_learning._assess_response_quality(input_text, text))
+        elif not response:
+            seed = ' '.join(input_text.split())
+            generated = []
+            for word in self.language_model.generate_stream(input_text):
+                # A resposta começa com a semente; cada trecho acrescenta uma palavra
+                yield f"{seed} {word}" if not generated else f" {word}"
+                generated.append(word)
+            if generated:
+                response = ' '.join([seed] + generated)
+                streamed = True
         
         # 5. Resposta padrão quando não tem conhecimento suficiente
         if not response:
             response = random.choice(self.response_fallbacks)
         
+        if not streamed:
+            yield response
+        
         # Armazena a interação na memória
         self.memory_module.add_memory(input_text, response)
         
@@ -687,7 +1561,8 @@ class SelfEvolvingBot:
     
     def save_state(self):
         """Salva todo o estado do bot"""
-        self.knowledge_base.save_knowledge()
+        # O conhecimento já é persistido no journal a cada adição
+        self.knowledge_base.flush()
         self.memory_module.save_memories()
         self.language_model.save_model()
         self.web_search.save_cache()
@@ -0,0 +1,20 @@
+"""Testes da inicialização do SelfEvolvingBot"""
+import pytest
+
+pytest.importorskip('torch')
+
+from self_evolving_bot import SelfEvolvingBot
+
+
+def test_default_knowledge_is_seeded_in_each_backend(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    question = "Qual é seu nome?"
+
+    bot = SelfEvolvingBot(knowledge_backend='json')
+    assert bot.knowledge_base._get_responses(question.lower())
+    bot.knowledge_base.flush()
+
+    # O marcador em bot_state.json já existe, mas o banco novo está vazio
+    bot = SelfEvolvingBot(knowledge_backend='sqlite')
+    assert bot.knowledge_base._get_responses(question.lower())
+    bot.knowledge_base.close()
@@ -0,0 +1,32 @@
+"""Testes dos padrões de intenção da KnowledgeBase"""
+import re
+
+import pytest
+
+pytest.importorskip('torch')
+
+from self_evolving_bot import KnowledgeBase
+
+
+@pytest.fixture
+def knowledge_base(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return KnowledgeBase()
+
+
+@pytest.mark.parametrize('pattern, text', [
+    (r'(?i)xyzzy', 'XYZZY'),
+    (r'(?P<p0>plugh)', 'plugh'),
+    (r'(\w)\1', 'aa'),
+])
+def test_pattern_that_cannot_be_combined(knowledge_base, pattern, text):
+    knowledge_base.add_pattern(pattern, ['resposta'])
+    assert knowledge_base._match_pattern(text) == pattern
+    # Os demais padrões continuam funcionando
+    assert knowledge_base._match_pattern('oi') == next(iter(knowledge_base.patterns))
+
+
+def test_invalid_pattern_is_rejected(knowledge_base):
+    with pytest.raises(re.error):
+        knowledge_base.add_pattern('(abc', ['resposta'])
+    assert '(abc' not in knowledge_base.patterns
@@ -0,0 +1,23 @@
+"""Testes do importador em lote"""
+import pytest
+
+pytest.importorskip('torch')
+
+from knowledge_import import import_pairs
+from self_evolving_bot import KnowledgeBase
+
+
+def test_import_skips_repeated_pairs_without_compacting(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    knowledge_base = KnowledgeBase()
+    knowledge_base.compact_min_entries = 10
+    compactions = []
+    monkeypatch.setattr(knowledge_base, 'save_knowledge', lambda: compactions.append(1))
+
+    pairs = [(f"Pergunta {i % 50}", f"resposta {i % 50}") for i in range(300)]
+    stats = import_pairs(knowledge_base, pairs, chunk_size=20)
+
+    assert stats['read'] == 300
+    assert stats['added'] == 50
+    assert knowledge_base.journal_entries == 50
+    assert not compactions
@@ -0,0 +1,98 @@
+"""Testes do SimpleLanguageModel"""
+import random
+import time
+
+import pytest
+
+pytest.importorskip('torch')
+
+from ngram_table import NGramTable
+from self_evolving_bot import SimpleLanguageModel
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    # Os arquivos do modelo são gravados no diretório atual
+    monkeypatch.chdir(tmp_path)
+    model = SimpleLanguageModel()
+    model.train("alfa beta gama delta")
+    return model
+
+
+def test_generate_skips_unknown_seed_word(model):
+    assert model.generate("alfa") == "alfa beta gama delta"
+    assert model.generate("xyzzy alfa") == "xyzzy alfa beta gama delta"
+
+
+def test_generate_batch_skips_unknown_seed_word(model):
+    assert model.generate_batch("alfa", k=4) == ["alfa beta gama delta"] * 4
+    assert model.generate_batch("xyzzy alfa", k=4) == ["xyzzy alfa beta gama delta"] * 4
+
+
+def test_unknown_last_seed_word_generates_nothing(model):
+    assert model.generate("alfa xyzzy") == "alfa xyzzy"
+    assert model.generate_batch("alfa xyzzy", k=4) == []
+
+
+def test_failed_compaction_backs_off(model, monkeypatch):
+    save = NGramTable.save
+    model.save_model()
+    model.train("epsilon zeta")
+    model.save_model()
+
+    def fail(table, path):
+        raise PermissionError("arquivo em uso")
+
+    monkeypatch.setattr(NGramTable, 'save', fail)
+    model.compact_model()
+    assert model._compact_failures == 1
+    assert len(model.delta_files) == 1
+
+    # Os deltas voltaram para a fila, mas a compactação automática espera
+    model.compact_max_deltas = 1
+    model._maybe_compact()
+    assert not model._compacting
+
+    # Passado o limite rígido, a compactação é tentada mesmo durante a espera
+    monkeypatch.setattr(NGramTable, 'save', save)
+    model.compact_hard_max_deltas = 1
+    model._maybe_compact()
+    deadline = time.time() + 10
+    while model._compacting and time.time() < deadline:
+        time.sleep(0.01)
+    assert model._compact_failures == 0
+    assert model.delta_files == []
+
+
+def _wait_background(model):
+    """Espera a poda e a compactação em segundo plano terminarem"""
+    model._pruning_done.wait()
+    deadline = time.time() + 30
+    while (model._pruning or model._compacting or model._compact_requested) and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_memory_stays_near_budget_under_training(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    budget = 200 * 1024
+    model = SimpleLanguageModel(memory_budget=budget)
+    rng = random.Random(1)
+    vocabulary = [f"palavra{i}" for i in range(3000)]
+
+    peak = 0
+    for _ in range(3000):
+        model.train(' '.join(rng.choice(vocabulary) for _ in range(12)))
+        peak = max(peak, model.memory_usage())
+    _wait_background(model)
+
+    # Uma frase nova passa pouco da folga antes de o treino esperar a poda
+    assert peak <= budget * SimpleLanguageModel.PRUNE_TOLERANCE + 20 * 1024
+    assert model.memory_usage() <= budget
+    assert model._pending.memory_usage() <= model.pending_max_bytes
+    assert model.pruning_stats['runs'] > 0
+
+    # As contagens removidas pela poda não voltam dos deltas
+    reloaded = SimpleLanguageModel(memory_budget=budget)
+    assert reloaded.memory_usage() <= budget
+    # A gravação em segundo plano usa o diretório atual, restaurado no fim do teste
+    _wait_background(reloaded)
@@ -0,0 +1,89 @@
+"""Testes do formato binário da NGramTable"""
+import gc
+import os
+import random
+
+import pytest
+
+from ngram_table import NGramTable
+
+
+def _mapped_files():
+    """Arquivos mapeados pelo processo (Linux)"""
+    if not os.path.exists('/proc/self/maps'):
+        pytest.skip("/proc/self/maps indisponível")
+    with open('/proc/self/maps') as f:
+        return f.read()
+
+
+def _counts(table, words):
+    return table.successor_counts(table.lookup(words))
+
+
+def test_save_over_open_file(tmp_path):
+    path = str(tmp_path / 'modelo.bin')
+    table = NGramTable()
+    table.train("o gato subiu no telhado".split(), 3)
+    table.save(path)
+
+    table = NGramTable.open(path)
+    assert path in _mapped_files()
+    table.train("o gato desceu do telhado".split(), 3)
+    table.save(path)
+    gc.collect()
+    # O mapeamento do arquivo antigo foi fechado antes da troca
+    assert path not in _mapped_files()
+
+    reopened = NGramTable.open(path)
+    gato = reopened.lookup(["gato"])
+    assert _counts(reopened, ["o"]) == {gato[0]: 2}
+    assert len(_counts(reopened, ["o", "gato"])) == 2
+    assert reopened.word(table.lookup(["desceu"])[0]) == "desceu"
+
+
+def _random_table(words=2000, texts=3000, seed=1):
+    rng = random.Random(seed)
+    vocabulary = [f"w{i}" for i in range(words)]
+    table = NGramTable()
+    for _ in range(texts):
+        table.train([rng.choice(vocabulary) for _ in range(12)], 3)
+    # Uma frase frequente, que deve sobreviver à poda
+    for _ in range(50):
+        table.train("o gato subiu no telhado".split(), 3)
+    return table
+
+
+def test_pruned_stops_at_target():
+    table = _random_table()
+    target = 400_000
+    pruned, stats = table.pruned(2, target)
+
+    assert pruned.memory_usage() <= target
+    # Só o necessário é removido (a estimativa por par erra pouco)
+    assert pruned.memory_usage() >= target * 0.9
+    assert stats['entries_pruned'] > 0
+
+    # Os ids mudam, mas as contagens mantidas continuam as mesmas
+    gato = pruned.lookup(["gato"])[0]
+    assert _counts(pruned, ["o"]) == {gato: 50}
+    assert pruned.word(next(iter(_counts(pruned, ["o", "gato"])))) == "subiu"
+
+
+def test_pruned_drops_unused_words():
+    # Vocabulário grande e pouco repetido: o vocabulário pesa no orçamento
+    table = _random_table(words=20000, texts=500)
+    target = 400_000
+    pruned, stats = table.pruned(2, target)
+
+    assert pruned.memory_usage() <= target
+    assert stats['words_removed'] > 0
+    assert pruned.vocab_size == table.vocab_size - stats['words_removed']
+    assert pruned.lookup(["telhado"])[0] >= 0
+
+
+def test_pruned_without_target_keeps_unigrams():
+    table = _random_table(texts=200)
+    pruned, stats = table.pruned(2)
+    assert stats['entries_pruned'] > 0
+    assert pruned.vocab_size == table.vocab_size
+    assert len(_counts(pruned, [])) == table.vocab_size
@@ -0,0 +1,36 @@
+"""Testes da busca em vários serviços"""
+import asyncio
+import time
+
+from search_orchestrator import SearchBackend, SearchOrchestrator
+
+
+def _orchestrator():
+    def slow(query):
+        time.sleep(0.2)
+        return [f"lento: {query}"]
+
+    def empty(query):
+        return []
+
+    return SearchOrchestrator([
+        SearchBackend("Lento", slow, deadline=5),
+        SearchBackend("Vazio", empty, deadline=5),
+    ])
+
+
+def test_search_returns_winning_backend():
+    orchestrator = _orchestrator()
+    assert orchestrator.search_with_backend("gato") == (["lento: gato"], "Lento")
+    stats = orchestrator.get_stats()
+    assert stats["Lento"]["wins"] == 1
+    assert stats["Vazio"]["empty"] == 1
+
+
+def test_search_inside_running_loop():
+    orchestrator = _orchestrator()
+
+    async def caller():
+        return orchestrator.search("gato")
+
+    assert asyncio.run(caller()) == ["lento: gato"]
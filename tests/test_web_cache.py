@@ -0,0 +1,28 @@
+"""Testes do cache de pesquisas compartilhado"""
+import threading
+
+from web_cache import RESULTS_NAMESPACE, WebCache
+
+
+def _revalidated(cache, key, fetch):
+    """Lê uma entrada vencida e espera a renovação em segundo plano terminar"""
+    value = cache.get(RESULTS_NAMESPACE, key, revalidate=fetch)
+    for thread in threading.enumerate():
+        if thread.name == 'WebCacheRevalidate':
+            thread.join()
+    return value
+
+
+def test_failed_revalidation_keeps_stale_value(tmp_path):
+    cache = WebCache(str(tmp_path / 'cache.json'))
+    results = [{'title': 'Título', 'snippet': 'Trecho', 'url': 'https://exemplo.com'}]
+    cache.put(RESULTS_NAMESPACE, 'consulta', results, ttl=-1)
+
+    for fetch in (lambda: None, lambda: []):
+        assert _revalidated(cache, 'consulta', fetch) == results
+    assert cache.revalidations == 0
+
+    novos = [{'title': 'Novo', 'snippet': '', 'url': 'https://exemplo.com/novo'}]
+    assert _revalidated(cache, 'consulta', lambda: novos) == results
+    assert cache.revalidations == 1
+    assert cache._entries[(RESULTS_NAMESPACE, 'consulta')]['value'] == novos
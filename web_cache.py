@@ -0,0 +1,468 @@
+"""
+Cache de pesquisas web compartilhado.
+
+WebSearchModule, ImprovedWebSearch e WebEnabledBot usam a mesma instância
+(get_web_cache()) e o mesmo arquivo. As entradas ficam separadas por
+namespace: RESULTS_NAMESPACE guarda listas de resultados por consulta
+normalizada (WebSearchModule e ImprovedWebSearch, que compartilham as
+entradas) e RESPONSES_NAMESPACE guarda as respostas prontas do WebEnabledBot.
+
+O cache é LRU: uma leitura move a entrada para o fim da fila e, quando o
+número de entradas ou o tamanho total passa do limite, saem as usadas há mais
+tempo. Cada entrada tem sua validade (TTL). Uma entrada vencida há menos de
+stale_while_revalidate segundos ainda é devolvida a quem passar uma função
+de revalidação, que é chamada em segundo plano para renovar o valor.
+
+A gravação é adiada (write-behind): put() só marca o cache como alterado, e
+uma thread grava o arquivo a cada flush_interval segundos se houver
+alterações, além de uma última vez ao encerrar o processo. O arquivo é
+gravado em um temporário e renomeado, então uma queda no meio da gravação não
+corrompe o cache. Com um caminho terminado em ".gz" o arquivo é comprimido
+com gzip (BOT_WEB_CACHE_GZIP=1 na instância compartilhada).
+
+Formato do arquivo (versão 1):
+    {"version": 1, "saved_at": <timestamp>,
+     "entries": [{"namespace": ..., "key": ..., "stored_at": <timestamp>,
+                  "expires_at": <timestamp ou null>, "value": ...}, ...]}
+com as entradas da usada há mais tempo para a mais recente. Os formatos
+antigos ({"cache": ..., "keys": [...]} e {"queries": ..., "last_updated": ...},
+que podiam aparecer misturados no mesmo arquivo) são convertidos ao carregar.
+"""
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+WEB_CACHE_FILE = 'web_cache.json'
+WEB_CACHE_VERSION = 1
+
+RESULTS_NAMESPACE = 'results'
+RESPONSES_NAMESPACE = 'responses'
+
+# Validade padrão das entradas de cada namespace, em segundos (None = não vencem)
+DEFAULT_TTLS = {
+    RESULTS_NAMESPACE: 7 * 24 * 60 * 60,
+    RESPONSES_NAMESPACE: 24 * 60 * 60,
+}
+
+
+class WebCache:
+    """Cache LRU de pesquisas com validade por entrada e um único formato em disco"""
+
+    def __init__(self, path: str = WEB_CACHE_FILE,
+                 max_entries: int = 500,
+                 max_bytes: int = 8 * 1024 * 1024,
+                 ttls: Optional[Dict[str, Optional[float]]] = None,
+                 stale_while_revalidate: float = 24 * 60 * 60,
+                 flush_interval: float = 30.0):
+        """
+        Args:
+            path: Arquivo do cache (comprimido com gzip se terminar em ".gz")
+            max_entries: Número máximo de entradas (somando todos os namespaces)
+            max_bytes: Tamanho máximo dos valores guardados (medido em JSON)
+            ttls: Validade padrão por namespace, em segundos (padrão: DEFAULT_TTLS)
+            stale_while_revalidate: Por quanto tempo depois de vencer uma entrada
+                ainda pode ser usada enquanto é renovada
+            flush_interval: Intervalo entre gravações em segundo plano, em segundos
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.stale_while_revalidate = stale_while_revalidate
+        self.flush_interval = flush_interval
+        self.compress = path.endswith('.gz')
+        # (namespace, chave) -> {'value', 'stored_at', 'expires_at', 'size'},
+        # da usada há mais tempo para a mais recente
+        self._entries: 'OrderedDict[Tuple[str, str], Dict[str, Any]]' = OrderedDict()
+        self._bytes = 0
+        self._revalidating = set()
+        self._lock = threading.RLock()
+        # Alterações feitas e alterações já gravadas; diferentes = há o que gravar
+        self._changes = 0
+        self._saved_changes = 0
+        self._flush_lock = threading.Lock()
+        # Arquivo no outro formato (com/sem gzip) lido no lugar de path, apagado
+        # depois da primeira gravação
+        self._replaced_path: Optional[str] = None
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.revalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item: Tuple[str, str]):
+        return item in self._entries
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def dirty(self) -> bool:
+        """Indica se há alterações ainda não gravadas"""
+        return self._changes != self._saved_changes
+
+    def ensure_capacity(self, max_entries: int):
+        """Garante espaço para pelo menos max_entries entradas"""
+        with self._lock:
+            self.max_entries = max(self.max_entries, max_entries)
+
+    def get(self, namespace: str, key: str,
+            revalidate: Optional[Callable[[], Any]] = None) -> Optional[Any]:
+        """
+        Retorna o valor guardado ou None.
+
+        Args:
+            namespace: Namespace da entrada
+            key: Chave da entrada
+            revalidate: Função que busca o valor de novo. Se a entrada estiver
+                vencida, mas dentro da janela stale_while_revalidate, o valor
+                antigo é retornado e a função roda em segundo plano; o valor
+                que ela retornar substitui a entrada, a menos que seja None ou
+                vazio (a busca falhou e o valor antigo continua valendo).
+        """
+        item = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(item)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            now = time.time()
+            expires_at = entry['expires_at']
+            if expires_at is None or now < expires_at:
+                self._entries.move_to_end(item)
+                self.hits += 1
+                return entry['value']
+
+            if revalidate is None or now >= expires_at + self.stale_while_revalidate:
+                self._remove(item)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(item)
+            self.hits += 1
+            self.stale_hits += 1
+            start = item not in self._revalidating
+            if start:
+                self._revalidating.add(item)
+            value = entry['value']
+            ttl = expires_at - entry['stored_at']
+
+        if start:
+            threading.Thread(target=self._revalidate, args=(item, revalidate, ttl),
+                             name='WebCacheRevalidate', daemon=True).start()
+        return value
+
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Guarda um valor, removendo as entradas usadas há mais tempo se o cache
+        passar dos limites.
+
+        Args:
+            ttl: Validade em segundos (padrão: a do namespace)
+        """
+        item = (namespace, key)
+        size = self._entry_size(key, value)
+        now = time.time()
+        if ttl is None:
+            ttl = self.ttls.get(namespace)
+        expires_at = now + ttl if ttl is not None else None
+
+        with self._lock:
+            self._remove(item)
+            if size > self.max_bytes:
+                print(f"Resultado grande demais para o cache de pesquisas ({size} bytes): {key}")
+                return
+            self._entries[item] = {'value': value, 'stored_at': now,
+                                   'expires_at': expires_at, 'size': size}
+            self._bytes += size
+            self._changes += 1
+            self.evictions += self._evict()
+
+    def clear(self, namespace: Optional[str] = None):
+        """Remove todas as entradas (ou só as de um namespace)"""
+        with self._lock:
+            self._changes += 1
+            if namespace is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                for item in [item for item in self._entries if item[0] == namespace]:
+                    self._remove(item)
+
+    def stats(self) -> Dict[str, Any]:
+        """Uso do cache desde o início do processo"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'revalidations': self.revalidations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    @staticmethod
+    def _entry_size(key: str, value: Any) -> int:
+        """Tamanho aproximado da entrada: chave e valor em JSON (UTF-8)"""
+        encoded = json.dumps(value, ensure_ascii=False)
+        return len(key.encode('utf-8')) + len(encoded.encode('utf-8'))
+
+    def _remove(self, item: Tuple[str, str]):
+        entry = self._entries.pop(item, None)
+        if entry is not None:
+            self._bytes -= entry['size']
+            self._changes += 1
+
+    def _evict(self) -> int:
+        """Remove as entradas usadas há mais tempo até caber nos limites (chamado com a trava)"""
+        removed = 0
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry['size']
+            removed += 1
+        return removed
+
+    def _purge_expired(self) -> int:
+        """Remove as entradas vencidas além da janela de revalidação (chamado com a trava)"""
+        limit = time.time() - self.stale_while_revalidate
+        expired = [item for item, entry in self._entries.items()
+                   if entry['expires_at'] is not None and entry['expires_at'] <= limit]
+        for item in expired:
+            self._remove(item)
+        return len(expired)
+
+    def _revalidate(self, item: Tuple[str, str], revalidate: Callable[[], Any], ttl: float):
+        """Busca o valor de uma entrada vencida em segundo plano"""
+        try:
+            value = revalidate()
+        except Exception as e:
+            print(f"Erro ao renovar entrada do cache de pesquisas: {e}")
+            value = None
+        finally:
+            with self._lock:
+                self._revalidating.discard(item)
+
+        # Uma busca que falhou ou veio vazia não apaga um valor bom
+        if value:
+            self.put(item[0], item[1], value, ttl=ttl)
+            with self._lock:
+                self.revalidations += 1
+
+    def load(self):
+        """Carrega o cache do disco, convertendo os formatos antigos"""
+        # Aceita o arquivo no outro formato (com/sem gzip) se o configurado não existir
+        other_path = self.path[:-3] if self.compress else self.path + '.gz'
+        source = self.path if os.path.exists(self.path) else other_path
+        if not os.path.exists(source):
+            return
+        try:
+            with open(source, 'rb') as f:
+                raw = f.read()
+            if raw[:2] == b'\x1f\x8b':
+                raw = gzip.decompress(raw)
+            data = json.loads(raw.decode('utf-8'))
+        except (ValueError, OSError) as e:
+            print(f"Erro ao carregar cache de pesquisas: {e}")
+            return
+        if not isinstance(data, dict):
+            print("Formato de cache inválido. Criando novo cache.")
+            return
+
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            version = data.get('version')
+            if version == WEB_CACHE_VERSION:
+                for entry in data.get('entries', []):
+                    try:
+                        self._load_entry(entry['namespace'], entry['key'], entry['value'],
+                                         float(entry['stored_at']), entry.get('expires_at'))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+            elif version is not None:
+                print(f"Versão do cache de pesquisas desconhecida ({version}). Criando novo cache.")
+                return
+            else:
+                self._migrate(data, source)
+                print("Cache de pesquisas convertido para o formato novo.")
+
+            self._purge_expired()
+            self._evict()
+            print(f"Cache de pesquisas carregado: {len(self._entries)} entradas")
+            self._saved_changes = self._changes
+            if version is None or source != self.path:
+                # Convertido: grava já no formato configurado
+                self._replaced_path = source if source != self.path else None
+                self._changes += 1
+
+        if version is None or source != self.path:
+            self.flush()
+
+    def _load_entry(self, namespace: str, key: str, value: Any,
+                    stored_at: float, expires_at: Optional[float] = None):
+        """Insere uma entrada lida do disco no fim da fila (chamado com a trava)"""
+        if expires_at is None:
+            ttl = self.ttls.get(namespace)
+            expires_at = stored_at + ttl if ttl is not None else None
+        else:
+            expires_at = float(expires_at)
+        size = self._entry_size(key, value)
+        self._remove((namespace, key))
+        self._entries[(namespace, key)] = {'value': value, 'stored_at': stored_at,
+                                           'expires_at': expires_at, 'size': size}
+        self._bytes += size
+
+    def _migrate(self, data: Dict[str, Any], source: str):
+        """Converte os formatos antigos do WebSearchModule/ImprovedWebSearch e do WebEnabledBot"""
+        migrated = []
+        try:
+            mtime = os.path.getmtime(source)
+        except OSError:
+            mtime = time.time()
+
+        # {"cache": {consulta: resultados}, "keys": [...]}: "keys" traz a ordem
+        # de inserção, mas pode ter perdido as chaves mais antigas
+        cache = data.get('cache')
+        if isinstance(cache, dict):
+            keys = [key for key in data.get('keys', []) if key in cache]
+            known = set(keys)
+            ordered = [key for key in cache if key not in known]
+            ordered += list(dict.fromkeys(reversed(keys)))[::-1]
+            for key in ordered:
+                migrated.append((mtime, RESULTS_NAMESPACE, key, cache[key]))
+
+        # {"queries": {entrada: {"timestamp": iso, "result": texto}}, "last_updated": iso}
+        queries = data.get('queries')
+        if isinstance(queries, dict):
+            for key, entry in queries.items():
+                if not isinstance(entry, dict) or 'result' not in entry:
+                    continue
+                try:
+                    stored_at = datetime.fromisoformat(entry['timestamp']).timestamp()
+                except (KeyError, TypeError, ValueError):
+                    stored_at = mtime
+                migrated.append((stored_at, RESPONSES_NAMESPACE, key, entry['result']))
+
+        migrated.sort(key=lambda item: item[0])
+        for stored_at, namespace, key, value in migrated:
+            self._load_entry(namespace, key, value, stored_at)
+
+    def flush(self) -> bool:
+        """Grava o cache no disco se houver alterações; retorna True se gravou"""
+        if not self.dirty:
+            return False
+        return self.save()
+
+    def save(self) -> bool:
+        """
+        Grava o cache no disco.
+
+        O conteúdo vai para um arquivo temporário que depois substitui o
+        anterior, então uma queda no meio da gravação mantém o arquivo antigo
+        intacto.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self.expirations += self._purge_expired()
+                changes = self._changes
+                data = {
+                    'version': WEB_CACHE_VERSION,
+                    'saved_at': time.time(),
+                    'entries': [
+                        {'namespace': namespace, 'key': key, 'stored_at': entry['stored_at'],
+                         'expires_at': entry['expires_at'], 'value': entry['value']}
+                        for (namespace, key), entry in self._entries.items()
+                    ]
+                }
+            count = len(data['entries'])
+            try:
+                raw = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                if self.compress:
+                    raw = gzip.compress(raw, compresslevel=6)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(raw)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Erro ao salvar cache de pesquisas: {e}")
+                return False
+
+            with self._lock:
+                self._saved_changes = max(self._saved_changes, changes)
+            if self._replaced_path is not None:
+                try:
+                    os.remove(self._replaced_path)
+                except OSError:
+                    pass
+                self._replaced_path = None
+        print(f"Cache de pesquisas salvo: {count} entradas")
+        return True
+
+    def start(self):
+        """Inicia a thread que grava as alterações periodicamente"""
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._run_flusher, name='WebCacheFlusher', daemon=True)
+        self._flusher.start()
+
+    def close(self):
+        """Para a thread de gravação e grava as alterações pendentes"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _run_flusher(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+_shared_cache: Optional[WebCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_web_cache() -> WebCache:
+    """
+    Instância compartilhada, carregada do disco no primeiro uso.
+
+    A variável de ambiente BOT_WEB_CACHE_MB define o tamanho máximo do cache
+    (padrão: 8 MB) e BOT_WEB_CACHE_GZIP=1 grava o arquivo comprimido
+    (web_cache.json.gz). As alterações são gravadas em segundo plano e ao
+    encerrar o processo.
+    """
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            cache_mb = os.environ.get('BOT_WEB_CACHE_MB')
+            compress = os.environ.get('BOT_WEB_CACHE_GZIP', '').strip() == '1'
+            _shared_cache = WebCache(
+                path=WEB_CACHE_FILE + '.gz' if compress else WEB_CACHE_FILE,
+                max_bytes=int(float(cache_mb) * 1024 * 1024) if cache_mb else 8 * 1024 * 1024
+            )
+            _shared_cache.load()
+            _shared_cache.start()
+            atexit.register(_shared_cache.close)
+        return _shared_cache
@@ -1,11 +1,12 @@
-import os
-import json
-from datetime import datetime
 from typing import Optional, Dict, List, Union, Any
 
+from web_cache import RESPONSES_NAMESPACE, get_web_cache
+
 # Variáveis globais
 WEB_AVAILABLE = False
-WEB_CACHE_FILE = "web_cache.json"
+
+# Validade de uma resposta da web guardada em cache (1 dia)
+WEB_RESPONSE_MAX_AGE = 24 * 60 * 60
 
 # Tenta importar o WebSearcher de improved_web_search
 try:
@@ -84,12 +85,8 @@ class WebEnabledBot:
         self.auto_learn = auto_learn
         self.web_enabled = web_enabled and WEB_AVAILABLE
         self.web_searcher = WebSearcher() if self.web_enabled else None
-        self.web_cache = self._load_web_cache()
-        
-        # Garantir que a chave 'queries' exista no cache
-        if "queries" not in self.web_cache:
-            self.web_cache["queries"] = {}
-            self._save_web_cache()
+        # Cache compartilhado com WebSearchModule e ImprovedWebSearch
+        self.web_cache = get_web_cache()
         
         # Adicionar métodos de compatibilidade
         self._add_compatibility_methods()
@@ -121,62 +118,29 @@ class WebEnabledBot:
         if not hasattr(self, 'save_state'):
             self.save_state = lambda: self._save_web_cache()
         
-    def _load_web_cache(self) -> Dict:
-        """Carrega o cache de pesquisas web do arquivo."""
-        default_cache = {"queries": {}, "last_updated": datetime.now().isoformat()}
-        
-        if os.path.exists(WEB_CACHE_FILE):
-            try:
-                with open(WEB_CACHE_FILE, 'r', encoding='utf-8') as f:
-                    cache = json.load(f)
-                    
-                # Garantir que o cache tenha a estrutura correta
-                if not isinstance(cache, dict):
-                    print("Formato de cache inválido. Criando novo cache.")
-                    return default_cache
-                    
-                # Garantir que a chave 'queries' exista
-                if "queries" not in cache:
-                    print("Cache não contém a chave 'queries'. Adicionando-a.")
-                    cache["queries"] = {}
-                    
-                return cache
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Erro ao carregar cache web: {e}. Criando novo cache.")
-        
-        return default_cache
-    
     def _save_web_cache(self):
-        """Salva o cache de pesquisas web no arquivo."""
-        try:
-            # Garantir que as chaves necessárias existam antes de salvar
-            if "queries" not in self.web_cache:
-                self.web_cache["queries"] = {}
-                
-            self.web_cache["last_updated"] = datetime.now().isoformat()
-            
-            with open(WEB_CACHE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.web_cache, f, ensure_ascii=False, indent=2)
-        except IOError as e:
-            print(f"Erro ao salvar cache web: {e}")
+        """Grava as alterações pendentes do cache de pesquisas web no arquivo."""
+        self.web_cache.flush()
     
-    def get_response(self, user_input: str) -> str:
+    def get_response(self, user_input: str, basic_response: Optional[str] = None) -> str:
         """
         Obtém uma resposta para a entrada do usuário, usando a web se necessário.
         
         Args:
             user_input: A entrada do usuário
+            basic_response: Resposta do bot base, se já tiver sido gerada
             
         Returns:
             A resposta do bot
         """
         # Primeiro tenta responder com o conhecimento existente
-        if hasattr(self.base_bot, 'get_response'):
-            basic_response = self.base_bot.get_response(user_input)
-        elif hasattr(self.base_bot, 'generate_response'):
-            basic_response = self.base_bot.generate_response(user_input)
-        else:
-            basic_response = "Desculpe, não consigo processar sua solicitação no momento."
+        if basic_response is None:
+            if hasattr(self.base_bot, 'get_response'):
+                basic_response = self.base_bot.get_response(user_input)
+            elif hasattr(self.base_bot, 'generate_response'):
+                basic_response = self.base_bot.generate_response(user_input)
+            else:
+                basic_response = "Desculpe, não consigo processar sua solicitação no momento."
         
         # Se a busca web não estiver habilitada, retorna apenas a resposta básica
         if not self.web_enabled or not self.web_searcher:
@@ -194,33 +158,16 @@ class WebEnabledBot:
         
         needs_web_search = forced_search or any(indicator.lower() in basic_response.lower() for indicator in uncertainty_indicators)
         
-        # Garantir que a chave 'queries' exista
-        if "queries" not in self.web_cache:
-            self.web_cache["queries"] = {}
-        
         if needs_web_search:
-            # Verifica se a consulta já está no cache
-            if user_input in self.web_cache["queries"]:
-                cache_entry = self.web_cache["queries"][user_input]
-                
-                # Verificar se o cache tem formato válido
-                if not isinstance(cache_entry, dict) or "timestamp" not in cache_entry or "result" not in cache_entry:
-                    # Cache inválido, reconstruir
-                    print("Formato de cache inválido para esta consulta. Atualizando...")
+            # Verifica se a consulta já está no cache; uma resposta vencida ainda é
+            # usada enquanto uma nova busca a renova em segundo plano
+            web_info = self.web_cache.get(RESPONSES_NAMESPACE, user_input,
+                                          revalidate=lambda: self._search_web(user_input))
+            if web_info is not None:
+                if isinstance(web_info, str) and len(web_info.strip()) > 0:
+                    return f"Com base em informações da web: {web_info}"
                 else:
-                    try:
-                        cache_age = datetime.now() - datetime.fromisoformat(cache_entry["timestamp"])
-                        
-                        # Se o cache for recente (menos de 1 dia), usa-o
-                        if cache_age.days < 1:
-                            web_info = cache_entry["result"]
-                            if web_info:
-                                if isinstance(web_info, str) and len(web_info.strip()) > 0:
-                                    return f"Com base em informações da web: {web_info}"
-                                else:
-                                    print(f"Cache contém resultado inválido: {web_info}")
-                    except (ValueError, TypeError) as e:
-                        print(f"Erro ao processar timestamp do cache: {e}")
+                    print(f"Cache contém resultado inválido: {web_info}")
             
             # Realiza a busca na web
             try:
@@ -232,12 +179,8 @@ class WebEnabledBot:
                     print(f"Busca web retornou resultado vazio ou inválido: '{web_result}'")
                     return f"{basic_response} [Nota: Tentei buscar informações adicionais na web, mas não encontrei dados relevantes.]"
                 
-                # Atualiza o cache
-                self.web_cache["queries"][user_input] = {
-                    "timestamp": datetime.now().isoformat(),
-                    "result": web_result
-                }
-                self._save_web_cache()
+                # Atualiza o cache (gravado em disco depois, em segundo plano)
+                self.web_cache.put(RESPONSES_NAMESPACE, user_input, web_result, ttl=WEB_RESPONSE_MAX_AGE)
                 
                 return f"Com base em informações da web: {web_result}"
             except Exception as e:
@@ -247,6 +190,15 @@ class WebEnabledBot:
         
         return basic_response
     
+    def _search_web(self, user_input: str) -> Optional[str]:
+        """Busca na web para renovar o cache; retorna None se não houver resultado válido"""
+        if not self.web_searcher or not getattr(self.web_searcher, 'online', True):
+            return None
+        web_result = self.web_searcher.search(user_input)
+        if not web_result or not isinstance(web_result, str) or len(web_result.strip()) == 0:
+            return None
+        return web_result
+    
     def learn(self, user_input: str, response: str):
         """
         Permite que o bot aprenda com a interação se o auto-aprendizado estiver ativado.
@@ -316,15 +268,30 @@ class WebEnabledBot:
         Returns:
             A resposta do bot
         """
-        # Garantir que o cache esteja corretamente inicializado
-        if not hasattr(self, 'web_cache') or self.web_cache is None:
-            self.web_cache = self._load_web_cache()
-            
-        if "queries" not in self.web_cache:
-            self.web_cache["queries"] = {}
-            
         return self.get_response(user_input)
 
+    def generate_response_stream(self, user_input: str):
+        """
+        Versão em fluxo de generate_response.
+        
+        Repassa os trechos do bot base à medida que são gerados. Se a resposta
+        completa precisar de uma busca na web, a resposta final (valor de
+        retorno do gerador) substitui o texto já exibido.
+        
+        Args:
+            user_input: A entrada do usuário
+            
+        Returns:
+            A resposta do bot
+        """
+        if not hasattr(self.base_bot, 'generate_response_stream'):
+            response = self.generate_response(user_input)
+            yield response
+            return response
+        
+        basic_response = yield from self.base_bot.generate_response_stream(user_input)
+        return self.get_response(user_input, basic_response=basic_response)
+
 def get_web_enabled_bot(base_bot, auto_learn=True, web_enabled=False):
     """
     Cria e retorna um bot com capacidade web.